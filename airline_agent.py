@@ -12,6 +12,15 @@ from typing import Optional, List
 from dotenv import load_dotenv
 from livekit.agents import MetricsCollectedEvent
 from context import AIRLINE_CONTEXT
+from flight_connections import ConnectionFinder, format_duration
+from flight_search import DEFAULT_RESULT_LIMIT, FlightCalendar, parse_travel_dates
+from flight_status import FlightStatusBoard, FlightStatusIngestor, watch_key
+from ids import new_id
+from line_feed import StatusNotifier
+from seat_inventory import SeatInventory, normalize_cabin
+from state_store import session_state
+from tool_cache import cache_stats, cached_tool
+from location_resolver import LOCATIONS
 
 # OpenAI client(s)
 from openai import OpenAI
@@ -45,9 +54,6 @@ load_dotenv(dotenv_path=".env")
 # OpenAI client for helper calls (mirrors your usage)
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 today = datetime.now().date()
-# Session data fallback
-if not hasattr(RunContext, "session_data"):
-    RunContext.session_data = {}
 
 
 # --------------------- Sample Conversation between the User and the Agent ------------------------
@@ -404,6 +410,12 @@ DUMMY_CANCELLATION_POLICY = (
     "Non-refundable fares can only be rebooked for a change fee of PKR 10,000 plus fare difference."
 )
 
+# Per-route, date-sorted index over the schedule for window searches
+FLIGHT_CALENDAR = FlightCalendar(DUMMY_FLIGHTS)
+# One/two-stop itineraries when a route has no direct flight
+CONNECTIONS = ConnectionFinder(DUMMY_FLIGHTS, min_connection={"DXB": 90, "LHR": 90, "IST": 75})
+CONNECTION_SEARCH_DAYS = 7
+
 # Dummy booking storage (for simulation only)
 # ---------------- Dummy Booking Records ----------------
 from datetime import datetime, timedelta, timezone
@@ -450,6 +462,21 @@ DUMMY_BOOKINGS = [
     },
 ]
 
+# Seats per cabin on every flight, and cabin fares relative to the listed (economy) fare
+CABIN_SEATS = {"economy": 150, "business": 24, "first": 8}
+CABIN_FARE_MULTIPLIER = {"economy": 1.0, "business": 2.5, "first": 4.0}
+
+FLIGHTS_BY_NUMBER = {f["flight_number"].upper(): f for f in DUMMY_FLIGHTS}
+SEATS = SeatInventory(DUMMY_FLIGHTS, CABIN_SEATS, CABIN_FARE_MULTIPLIER)
+for _booking in DUMMY_BOOKINGS:
+    if _booking["status"] == "Confirmed":
+        SEATS.take(_booking["flight_number"], normalize_cabin(_booking["seat_class"]), _booking["num_passengers"])
+
+# Live flight status: feed updates land in FLIGHT_STATUS and are pushed to watching sessions
+FLIGHT_STATUS = FlightStatusBoard(DUMMY_FLIGHTS)
+FLIGHT_STATUS_UPDATES = StatusNotifier()
+FLIGHT_STATUS_INGESTOR = FlightStatusIngestor(FLIGHT_STATUS, FLIGHT_STATUS_UPDATES)
+
 #     # --- Filler audio list (short clips, e.g. wav files)
 FILLER_AUDIO = [
     "audio/filler_1.wav",
@@ -500,23 +527,29 @@ from typing import Optional
 
 class FlightStatusInput(BaseModel):
     flight_number: Optional[str] = Field(None, description="Flight number like SB101")
-    origin: Optional[str] = Field(None, description="Origin airport code like KHI")
+    origin: Optional[str] = Field(None, description="Origin city or airport code like Karachi or KHI")
     destination: Optional[str] = Field(
-        None, description="Destination airport code like DXB"
+        None, description="Destination city or airport code like Dubai or DXB"
     )
     date: Optional[str] = Field(None, description="Date of flight in YYYY-MM-DD format")
 
 
 class FlightSearchInput(BaseModel):
     location: Optional[str] = Field(None, description="City or airport to search from")
-    origin: Optional[str] = Field(None, description="Origin airport code like KHI")
+    origin: Optional[str] = Field(None, description="Origin city or airport code like Karachi or KHI")
     destination: Optional[str] = Field(
-        None, description="Destination airport code like DXB"
+        None, description="Destination city or airport code like Dubai or DXB"
     )
     # date: Optional[str] = Field(None, description="Flight date in YYYY-MM-DD format")
     date: Optional[str] = Field(
         None,
-        description="Date of travel (accepts phrases like 'tomorrow', 'next Monday', 'Oct 20', etc.)",
+        description="Date of travel (accepts phrases like 'tomorrow', 'next Monday', 'any day next week', 'Oct 20', etc.)",
+    )
+    flex_days: int = Field(
+        0, ge=0, le=7, description="Also include flights up to this many days before/after the date"
+    )
+    sort_by: str = Field(
+        "date", description="'date' (earliest first) or 'fare' (cheapest first)"
     )
 
 
@@ -583,6 +616,25 @@ def send_email(to_email: str, subject: str, body: str) -> bool:
         return False
 
 
+def resolve_airport(text: Optional[str]) -> Optional[str]:
+    """Lower-case airport code for a city/airport name or code; unknown text passes through."""
+    if not text:
+        return None
+    return (LOCATIONS.airport_code(text) or text.strip()).lower()
+
+
+def watch_flight(context: Optional[RunContext], flight_number: str, day: str, booking_id: Optional[str] = None) -> None:
+    """Push later status changes for this flight to the caller's session."""
+    if not context:
+        return
+    state = session_state(context)
+    queue = state.setdefault("flight_updates", asyncio.Queue())
+    key = watch_key(flight_number, day)
+    if booking_id:
+        state.setdefault("watched_bookings", {}).setdefault(key, set()).add(booking_id)
+    FLIGHT_STATUS_UPDATES.watch(key, queue)
+
+
 def get_random_filler():
     return random.choice(FILLER_AUDIO) if FILLER_AUDIO else None
 
@@ -624,8 +676,8 @@ class AirlineAgent(Agent):
         Situation:
             Called when the user asks for the status of a specific flight.
             The user may provide a flight number (preferred) or a combination
-            of origin, destination, and date. Uses stored dummy data to
-            simulate real-time flight information retrieval.
+            of origin, destination, and date. Status and gate come from the
+            live status board; later changes are pushed to the session.
 
         Args:
             context (RunContext): Conversation context provided by LiveKit.
@@ -648,35 +700,36 @@ class AirlineAgent(Agent):
         """
         logger.info(f"🔍 Checking flight status: {flight_info}")
 
-        matched_flights = []
+        flight = None
 
         if flight_info.flight_number:
-            matched_flights = [
-                f
-                for f in DUMMY_FLIGHTS
-                if f["flight_number"].lower() == flight_info.flight_number.lower()
-            ]
+            flight = FLIGHTS_BY_NUMBER.get(flight_info.flight_number.strip().upper())
         elif flight_info.origin and flight_info.destination:
-            matched_flights = [
-                f
-                for f in DUMMY_FLIGHTS
-                if f["origin"].lower() == flight_info.origin.lower()
-                and f["destination"].lower() == flight_info.destination.lower()
-                and (not flight_info.date or f["date"] == flight_info.date)
-            ]
+            window = None
+            if flight_info.date:
+                window = parse_travel_dates(flight_info.date, datetime.now().date())
+                if window is None:
+                    return {"error": f"I couldn't understand the date '{flight_info.date}'. Could you say it another way?"}
+            matched_flights = FLIGHT_CALENDAR.search(
+                origin=resolve_airport(flight_info.origin),
+                destination=resolve_airport(flight_info.destination),
+                window=window,
+            )
+            flight = matched_flights[0] if matched_flights else None
 
-        if not matched_flights:
+        if not flight:
             return {"error": "No matching flight found. Please check the details."}
 
-        flight = matched_flights[0]
+        live = FLIGHT_STATUS.get(flight["flight_number"], flight["date"]) or {}
+        watch_flight(context, flight["flight_number"], flight["date"])
         return {
             "flight_number": flight["flight_number"],
             "route": f"{flight['origin']} → {flight['destination']}",
             "departure": flight["departure"],
             "arrival": flight["arrival"],
             "terminal": flight["terminal"],
-            "gate": flight["gate"],
-            "status": flight["status"],
+            "gate": live.get("gate") or flight["gate"],
+            "status": live.get("status") or flight["status"],
             "date": flight["date"],
         }
 
@@ -688,62 +741,39 @@ class AirlineAgent(Agent):
         context: RunContext = None,
     ) -> dict:
         """
-        Enhanced version — searches flights even when date is None,
-        and supports both city names and airport codes.
+        Searches flights by route (city names, codes or Urdu spellings) and a
+        travel date or date phrase ("tomorrow", "any day next week"), optionally
+        widened by +/- flex_days and ranked by date or by fare. Date is optional.
         """
         logger.info(f"🔍 Searching flights: {search_info}")
 
-        city_to_code = {
-            "karachi": "khi",
-            "lahore": "lhe",
-            "islamabad": "isb",
-            "dubai": "dxb",
-            "doha": "doh",
-            "jeddah": "jed",
-            "riyadh": "ruh",
-        }
-
-        location = search_info.location.lower() if search_info.location else None
-        origin = search_info.origin.lower() if search_info.origin else None
-        destination = (
-            search_info.destination.lower() if search_info.destination else None
+        # Resolve city names, codes and Urdu spellings to airport codes
+        location = resolve_airport(search_info.location)
+        origin = resolve_airport(search_info.origin)
+        destination = resolve_airport(search_info.destination)
+
+        # Normalize the date phrase once into a window
+        window = None
+        if search_info.date:
+            window = parse_travel_dates(search_info.date, datetime.now().date())
+            if window is None:
+                return {"error": f"I couldn't understand the date '{search_info.date}'. Could you say it another way?"}
+
+        matched_flights = FLIGHT_CALENDAR.search(
+            origin=origin,
+            destination=destination,
+            window=window,
+            flex_days=search_info.flex_days,
+            sort_by="fare" if search_info.sort_by.lower().startswith(("fare", "cheap", "price")) else "date",
+            either=location,
         )
-        date = search_info.date
-
-        # Auto-convert city names to airport codes if applicable
-        if origin in city_to_code:
-            origin = city_to_code[origin]
-        if destination in city_to_code:
-            destination = city_to_code[destination]
-
-        matched_flights = []
-        for flight in DUMMY_FLIGHTS:
-            # Skip date filtering if it's None
-            if date and flight["date"] != date:
-                continue
-            if location:
-                if location in (
-                    flight["origin"].lower(),
-                    flight["destination"].lower(),
-                ):
-                    matched_flights.append(flight)
-            elif origin and destination:
-                if (
-                    flight["origin"].lower() == origin
-                    and flight["destination"].lower() == destination
-                ):
-                    matched_flights.append(flight)
-            elif origin:
-                if flight["origin"].lower() == origin:
-                    matched_flights.append(flight)
-            elif destination:
-                if flight["destination"].lower() == destination:
-                    matched_flights.append(flight)
 
+        if not matched_flights and origin and destination:
+            return self._connection_options(origin, destination, window, search_info.flex_days)
         if not matched_flights:
             return {"message": "No flights found for your search."}
 
-        return {
+        result = {
             "message": f"Found {len(matched_flights)} flights.",
             "flights": [
                 {
@@ -755,7 +785,53 @@ class AirlineAgent(Agent):
                     "date": f["date"],
                     "status": f["status"],
                 }
-                for f in matched_flights
+                for f in matched_flights[:DEFAULT_RESULT_LIMIT]
+            ],
+        }
+        if len(matched_flights) > DEFAULT_RESULT_LIMIT:
+            result["message"] += f" Showing the top {DEFAULT_RESULT_LIMIT}."
+        if window:
+            flex = timedelta(days=search_info.flex_days)
+            start, end = window.start - flex, window.end + flex
+            result["dates"] = str(start) if start == end else f"{start} to {end}"
+        return result
+
+    def _connection_options(self, origin: str, destination: str, window, flex_days: int) -> dict:
+        """Fastest connecting itineraries over the requested dates (next week if none)."""
+        today = datetime.now().date()
+        if window:
+            first = max(window.start - timedelta(days=flex_days), today)
+            last = window.end + timedelta(days=flex_days)
+        else:
+            first, last = today, today + timedelta(days=CONNECTION_SEARCH_DAYS - 1)
+        itineraries = []
+        day = first
+        while day <= last and (day - first).days < CONNECTION_SEARCH_DAYS:
+            itineraries.extend(CONNECTIONS.find(origin, destination, day))
+            day += timedelta(days=1)
+        if not itineraries:
+            return {"message": "No flights found for your search, including connections."}
+
+        itineraries.sort(key=lambda it: (it.elapsed_minutes, it.fare))
+        return {
+            "message": f"No direct flights. Found {len(itineraries)} connecting options.",
+            "connections": [
+                {
+                    "route": " → ".join([leg["origin"] for leg in it.legs] + [it.legs[-1]["destination"]]),
+                    "stops": it.stops,
+                    "total_time": format_duration(it.elapsed_minutes),
+                    "fare": f"PKR {it.fare:,}",
+                    "legs": [
+                        {
+                            "flight_number": leg["flight_number"],
+                            "date": leg["date"],
+                            "departure": leg["departure"],
+                            "arrival": leg["arrival"],
+                        }
+                        for leg in it.legs
+                    ],
+                }
+                for it in itineraries[:DEFAULT_RESULT_LIMIT]
             ],
         }
 
@@ -808,59 +884,81 @@ class AirlineAgent(Agent):
         """
         logger.info(f"🧾 Booking flight: {booking_info}")
 
-        # Find the flight
-        flight = next(
-            (
-                f
-                for f in DUMMY_FLIGHTS
-                if f["flight_number"].lower() == booking_info.flight_number.lower()
-            ),
-            None,
-        )
+        # Find the flight and cabin
+        flight = FLIGHTS_BY_NUMBER.get(booking_info.flight_number.strip().upper())
         if not flight:
             return {"error": "Invalid flight number. Please check and try again."}
+        cabin = normalize_cabin(booking_info.seat_class)
+        if cabin not in CABIN_SEATS:
+            return {"error": f"Seat class must be one of: {', '.join(c.title() for c in CABIN_SEATS)}."}
+        number, passengers = flight["flight_number"], booking_info.num_passengers
+        state = session_state(context) if context else None
 
-        # Extract fare amount numerically
-        try:
-            fare_amount = int(re.sub(r"[^\d]", "", flight["fare"]))
-        except ValueError:
-            fare_amount = 0
-
-        total_cost = fare_amount * booking_info.num_passengers
-        total_fare_str = f"PKR {total_cost:,.0f}"
-
-        # If user has not confirmed yet, return preview
+        # Preview: hold the seats while the caller confirms (replaces any earlier hold)
         if not booking_info.confirm:
+            previous = state.pop("pending_flight_hold", None) if state is not None else None
+            if previous:
+                SEATS.cancel_hold(previous["hold_id"])
+            hold = SEATS.hold(number, cabin, passengers)
+            if hold is None:
+                return {
+                    "error": f"Not enough {cabin} seats left on {number} for {passengers} passengers.",
+                    "seats_left": SEATS.cabins(number),
+                }
+            if state is not None:
+                state["pending_flight_hold"] = {"hold_id": hold.hold_id, "flight_number": number, "cabin": cabin, "passengers": passengers}
+            else:
+                SEATS.cancel_hold(hold.hold_id)
             preview = {
                 "passenger": booking_info.full_name,
-                "flight_number": flight["flight_number"],
+                "flight_number": number,
                 "route": f"{flight['origin']} → {flight['destination']}",
                 "departure": flight["departure"],
                 "arrival": flight["arrival"],
-                "seat_class": booking_info.seat_class.title(),
-                "fare": flight["fare"],
-                "num_passengers": booking_info.num_passengers,
-                "total_fare": total_fare_str,
+                "seat_class": cabin.title(),
+                "fare": f"PKR {hold.payload['fare_each']:,}",
+                "num_passengers": passengers,
+                "total_fare": f"PKR {hold.payload['total']:,}",
                 "requires_confirmation": True,
             }
             return {"booking_preview": preview}
 
-        # If confirmed, finalize booking
-        booking_id = f"BK{random.randint(10000, 99999)}"
+        # Confirm: sell the held seats, or take them directly if the hold is gone
+        sold = None
+        pending = state.pop("pending_flight_hold", None) if state is not None else None
+        if pending:
+            if (pending["flight_number"], pending["cabin"], pending["passengers"]) == (number, cabin, passengers):
+                sold = SEATS.confirm(pending["hold_id"])
+            else:
+                # the caller changed the booking since the preview; give those seats back
+                SEATS.cancel_hold(pending["hold_id"])
+        if sold is None:
+            quote = SEATS.quote(number, cabin, passengers)
+            if quote is None or not SEATS.take(number, cabin, passengers):
+                return {
+                    "error": f"Sorry, the {cabin} seats on {number} were just taken.",
+                    "seats_left": SEATS.cabins(number),
+                }
+            sold = quote._asdict()
+        total_fare_str = f"PKR {sold['total']:,}"
+
+        booking_id = new_id("BK")
         record = {
             "booking_id": booking_id,
             "passenger": booking_info.full_name,
             "email": booking_info.email,
-            "flight_number": flight["flight_number"],
+            "flight_number": number,
             "route": f"{flight['origin']} → {flight['destination']}",
-            "seat_class": booking_info.seat_class,
-            "num_passengers": booking_info.num_passengers,
+            "seat_class": cabin.title(),
+            "num_passengers": passengers,
             "total_fare": total_fare_str,
             "date": flight["date"],
             "timestamp": datetime.utcnow().isoformat(),
+            "status": "Confirmed",
         }
 
         DUMMY_BOOKINGS.append(record)
+        watch_flight(context, number, flight["date"], booking_id)
 
         # Prepare email body
         email_body = (
@@ -869,7 +967,7 @@ class AirlineAgent(Agent):
             f"Booking ID: {booking_id}\n"
             f"Flight: {flight['flight_number']} ({flight['origin']} → {flight['destination']})\n"
             f"Departure: {flight['departure']} | Arrival: {flight['arrival']}\n"
-            f"Class: {booking_info.seat_class.title()}\n"
+            f"Class: {cabin.title()}\n"
             f"Passengers: {booking_info.num_passengers}\n"
             f"Total Fare: {total_fare_str}\n"
             f"Date: {flight['date']}\n\n"
@@ -950,18 +1048,11 @@ class AirlineAgent(Agent):
         if not matched_booking:
             return {"error": "No booking found for the provided details."}
 
-        # Get flight status if available
-        flight = next(
-            (
-                f
-                for f in DUMMY_FLIGHTS
-                if f["flight_number"].lower()
-                == matched_booking["flight_number"].lower()
-            ),
-            None,
-        )
-
-        current_status = flight["status"] if flight else "Flight not found in schedule"
+        # Latest status for the booked flight and date; keep the caller posted on changes
+        live = FLIGHT_STATUS.get(matched_booking["flight_number"], matched_booking["date"])
+        current_status = live["status"] if live else "Flight not found in schedule"
+        if live and matched_booking.get("status") != "Cancelled":
+            watch_flight(context, live["flight_number"], live["date"], matched_booking["booking_id"])
 
         booking_status = {
             "booking_id": matched_booking["booking_id"],
@@ -981,6 +1072,7 @@ class AirlineAgent(Agent):
 
     # ---------------- Flow: Baggage allowance policies ----------------
     @function_tool()
+    @cached_tool()
     async def baggage_allowance(
         self,
         seat_class: Optional[str] = None,
@@ -1056,6 +1148,15 @@ class AirlineAgent(Agent):
 
 def prewarm(proc: JobProcess):
     proc.userdata["vad"] = silero.VAD.load()
+    # flight status updates (JSON or CSV lines) appended to this file flow into FLIGHT_STATUS
+    status_feed = os.getenv("AIRLINE_STATUS_FEED")
+    if status_feed:
+        proc.userdata["status_feed_stop"] = FLIGHT_STATUS_INGESTOR.start_tail(status_feed)
+    # or pushed over TCP; only this process sees them, so use with a single job process
+    status_feed_port = os.getenv("AIRLINE_STATUS_FEED_PORT")
+    if status_feed_port:
+        host = os.getenv("AIRLINE_STATUS_FEED_HOST", "127.0.0.1")
+        proc.userdata["status_feed_server_stop"] = FLIGHT_STATUS_INGESTOR.start_serve(host, int(status_feed_port))
 
 
 async def entrypoint(ctx: JobContext):
@@ -1073,6 +1174,21 @@ async def entrypoint(ctx: JobContext):
     )
 
     usage_collector = metrics.UsageCollector()
+    state = session_state(session)
+    flight_updates = state.setdefault("flight_updates", asyncio.Queue())
+
+    async def relay_flight_updates():
+        while True:
+            update = await flight_updates.get()
+            bookings = state.get("watched_bookings", {}).get(watch_key(update["flight_number"], update["date"]))
+            booking = f" (booking {', '.join(sorted(bookings))})" if bookings else ""
+            gate = f", departing from gate {update['gate']}" if update.get("gate") else ""
+            await session.say(
+                f"Quick update on flight {update['flight_number']} on {update['date']}{booking}: "
+                f"it is now {update['status']}{gate}."
+            )
+
+    relay_task = asyncio.create_task(relay_flight_updates())
 
     @session.on("metrics_collected")
     def _on_metrics_collected(ev: MetricsCollectedEvent):
@@ -1082,8 +1198,14 @@ async def entrypoint(ctx: JobContext):
     async def log_usage():
         summary = usage_collector.get_summary()
         logger.info(f"Usage summary: {summary}")
+        logger.info(f"Tool cache: {cache_stats()}")
+
+    async def stop_flight_updates():
+        FLIGHT_STATUS_UPDATES.unwatch_all(flight_updates)
+        relay_task.cancel()
 
     ctx.add_shutdown_callback(log_usage)
+    ctx.add_shutdown_callback(stop_flight_updates)
 
     await session.start(
         agent=AirlineAgent(),
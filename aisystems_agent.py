@@ -35,13 +35,14 @@ from typing import Optional
 import re
 from openai import OpenAI
 
+from ids import new_id
+from state_store import session_state
+
 logger = logging.getLogger("aisystems-voice-agent")
 load_dotenv(dotenv_path=".env")
 
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-if not hasattr(RunContext, "session_data"):
-    RunContext.session_data = {}
 
 CONTACT_INFO = {
     "address": "D-38, Block 5 Clifton, Karachi, Pakistan",
@@ -400,7 +401,7 @@ class AISystemsAgent(Agent):
             f"Creating contact request preview for {contact.name} <{contact.email}>"
         )
 
-        contact_id = f"CTC{random.randint(10000, 99999)}"
+        contact_id = new_id("CTC")
 
         summary_lines = [
             f"Contact Request Preview (ID: {contact_id})",
@@ -415,7 +416,7 @@ class AISystemsAgent(Agent):
         summary = "\n".join(summary_lines)
 
         # save pending contact in session (until user confirms)
-        context.session_data["pending_contact"] = {
+        session_state(context)["pending_contact"] = {
             "id": contact_id,
             "request": contact.model_dump(),
             "status": "pending",
@@ -443,14 +444,14 @@ class AISystemsAgent(Agent):
         Returns:
             dict: Result of the operation with status and message.
         """
-        pending = context.session_data.get("pending_contact")
+        pending = session_state(context).get("pending_contact")
         if not pending:
             return {"error": "No pending contact request to process."}
 
         if action.lower() == "confirm":
             pending["status"] = "confirmed"
-            context.session_data["last_contact"] = pending
-            context.session_data.pop("pending_contact", None)
+            session_state(context)["last_contact"] = pending
+            session_state(context).pop("pending_contact", None)
 
             # --- Email Sending ---
             request = pending["request"]
@@ -489,7 +490,7 @@ class AISystemsAgent(Agent):
             }
 
         elif action.lower() == "cancel":
-            context.session_data.pop("pending_contact", None)
+            session_state(context).pop("pending_contact", None)
             logger.info("Pending contact request cancelled by user.")
             return {
                 "status": "cancelled",
@@ -32,15 +32,21 @@ from livekit import rtc
 from livekit.agents import metrics
 from livekit.agents.llm import ChatMessage
 
+from courier_rates import RateCard
+from ids import new_id
+from location_resolver import COUNTRY, LOCATIONS
+from pickup_dispatcher import PickupDispatcher
+from line_feed import StatusNotifier
+from tracking_ingest import TrackingIngestor
+from tracking_store import TrackingStore
+from state_store import session_state
+
 logger = logging.getLogger("courier-voice-agent")
 load_dotenv(dotenv_path=".env")
 
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 today = datetime.now().date()
 
-# Session data fallback
-if not hasattr(RunContext, "session_data"):
-    RunContext.session_data = {}
 
 
 
@@ -80,20 +86,29 @@ PRICING = {
         "base": 150,  # PKR base
         "per_kg": 200,  # PKR per kg
         "zone_multiplier": {"A": 1.0, "B": 1.25, "C": 1.6},
+        "service_multiplier": {"standard": 1.0, "express": 1.5, "overnight": 2.5},
         "cod_fee_pct": 0.02,  # 2% on COD amount
     },
     "international": {
         "base": 1200,
         "per_kg": 1500,
         "country_surcharge": {"UAE": 1.0, "UK": 1.5, "USA": 1.8, "SAUDI": 1.2, "QATAR": 1.0},
+        "service_multiplier": {"economy": 1.0, "standard": 1.0, "express": 1.6},
     },
 }
 
-# Simulated drivers / pickup agents
+# Resolved city names / ISO country codes -> the service-area keys above
+DOMESTIC_AREA_BY_CITY = {
+    "Karachi": "KHI", "Lahore": "LHE", "Islamabad": "ISB",
+    "Hyderabad": "HYD", "Gwadar": "GWADAR", "Rawalpindi": "RWP",
+}
+INTERNATIONAL_BY_COUNTRY = {"AE": "UAE", "GB": "UK", "SA": "SAUDI", "US": "USA", "QA": "QATAR"}
+
+# Simulated drivers / pickup agents (riders work hourly pickup windows 09:00-18:00)
 PICKUP_AGENTS = [
-    {"id": "AGT001", "name": "Hamza", "area": "KHI", "available": True},
-    {"id": "AGT002", "name": "Ayesha", "area": "LHE", "available": True},
-    {"id": "AGT003", "name": "Bilal", "area": "ISB", "available": False},
+    {"id": "AGT001", "name": "Hamza", "area": "KHI", "on_duty": True},
+    {"id": "AGT002", "name": "Ayesha", "area": "LHE", "on_duty": True},
+    {"id": "AGT003", "name": "Bilal", "area": "ISB", "on_duty": False},
 ]
 
 # existing bookings / pickups (in-memory)
@@ -121,6 +136,8 @@ SHIPMENTS = {
     "CR1000001": {
         "sender": "Ali Khan",
         "recipient": "Sara Ahmed",
+        "reference": "ALK-ORD-5521",
+        "recipient_phone": "+92 300 1234567",
         "origin": "KHI",
         "destination": "LHE",
         "weight_kg": 2.5,
@@ -149,10 +166,10 @@ FILLER_AUDIO = [
 # ---------------------- Utilities ----------------------
 
 def generate_tracking_id() -> str:
-    return f"CR{random.randint(1000000, 9999999)}"
+    return new_id("CR")
 
 def generate_pickup_booking_id() -> str:
-    return f"BKP{random.randint(1000, 9999)}"
+    return new_id("BKP")
 
 def send_email(to_email: str, subject: str, body: str) -> bool:
     # simple wrapper like in your other agents
@@ -181,22 +198,55 @@ def send_email(to_email: str, subject: str, body: str) -> bool:
         logger.error(f"Failed to send email: {e}")
         return False
 
-def find_agent_for_area(area_code: str) -> Optional[Dict]:
-    for a in PICKUP_AGENTS:
-        if a["area"] == area_code and a["available"]:
-            return a
-    return None
+def build_dispatcher() -> PickupDispatcher:
+    dispatcher = PickupDispatcher(PICKUP_AGENTS)
+    for b in PICKUP_BOOKINGS:
+        if b["status"] == "confirmed" and b.get("assigned_agent"):
+            dispatcher.assign(b["assigned_agent"], date.fromisoformat(b["date"]), b["time"])
+    return dispatcher
+
+DISPATCHER = build_dispatcher()
+
+TRACKING = TrackingStore.from_records(SHIPMENTS)
+TRACKING_UPDATES = StatusNotifier()
+TRACKING_INGESTOR = TrackingIngestor(TRACKING, TRACKING_UPDATES)
+
+def watch_shipment(context: Optional[RunContext], tracking_id: str) -> None:
+    """Push later scanner updates for this shipment to the caller's session."""
+    if context:
+        queue = session_state(context).setdefault("tracking_updates", asyncio.Queue())
+        TRACKING_UPDATES.watch(tracking_id, queue)
+
+def windows_payload(windows) -> List[Dict]:
+    return [{"date": str(w.day), "window": f"{w.start}-{w.end}"} for w in windows]
+
+def resolve_area_code(location: str) -> str:
+    """
+    Service-area key for a code, city or country name ("Karachi", "khi", "کراچی",
+    "Saudi Arabia" -> "SAUDI"). Unknown places come back upper-cased unchanged.
+    """
+    code = location.strip().upper()
+    if code in SERVICE_AREAS["domestic"] or code in SERVICE_AREAS["international"]:
+        return code
+    loc = LOCATIONS.resolve(location)
+    if loc is None:
+        return code
+    if loc.type != COUNTRY and loc.name in DOMESTIC_AREA_BY_CITY:
+        return DOMESTIC_AREA_BY_CITY[loc.name]
+    country = LOCATIONS.country_of(location)
+    return INTERNATIONAL_BY_COUNTRY.get(country.code, code) if country else code
 
 # ---------------------- Pydantic Models ----------------------
 
 class TrackQuery(BaseModel):
     tracking_id: Optional[str] = None
     reference: Optional[str] = None
+    recipient_phone: Optional[str] = None
 
     @model_validator(mode="after")
     def at_least_one(cls, v):
-        if not v.tracking_id and not v.reference:
-            raise ValueError("Provide tracking_id or reference.")
+        if not v.tracking_id and not v.reference and not v.recipient_phone:
+            raise ValueError("Provide tracking_id, reference or recipient_phone.")
         return v
 
 class PricingRequest(BaseModel):
@@ -219,6 +269,10 @@ class PickupRequest(BaseModel):
     cod: Optional[bool] = False
     cod_amount: Optional[float] = 0.0
 
+    @field_validator("area_code")
+    def resolve_area(cls, v):
+        return resolve_area_code(v)
+
     @field_validator("pickup_date")
     def validate_future(cls, v):
         if v < date.today():
@@ -252,43 +306,14 @@ class CancelPickupRequest(BaseModel):
 
 # ---------------------- Core Helper Logic ----------------------
 
+RATE_CARD = RateCard(SERVICE_AREAS, PRICING)
+
+
 def calculate_domestic_price(origin: str, destination: str, weight_kg: float, service_level: str = "standard", cod_amount: float = 0.0) -> Tuple[int, dict]:
-    origin_info = SERVICE_AREAS["domestic"].get(origin.upper())
-    dest_info = SERVICE_AREAS["domestic"].get(destination.upper())
-    if not origin_info or not dest_info:
-        raise ValueError("Origin or destination not in domestic coverage.")
-
-    zone = dest_info["zone"]
-    base = PRICING["domestic"]["base"]
-    per_kg = PRICING["domestic"]["per_kg"]
-    multiplier = PRICING["domestic"]["zone_multiplier"].get(zone, 1.0)
-
-    # service level surcharge
-    if service_level == "express":
-        svc_mult = 1.5
-    elif service_level == "overnight":
-        svc_mult = 2.5
-    else:
-        svc_mult = 1.0
-
-    cost = int((base + (per_kg * weight_kg)) * multiplier * svc_mult)
-    cod_fee = int(cost * PRICING["domestic"]["cod_fee_pct"] + (cod_amount * PRICING["domestic"]["cod_fee_pct"] if cod_amount else 0))
-    return cost + cod_fee, {"base": base, "per_kg": per_kg, "zone": zone, "svc_mult": svc_mult, "cod_fee": cod_fee}
+    return RATE_CARD.quote_domestic(origin, destination, weight_kg, service_level, cod_amount)
 
 def calculate_international_price(origin: str, country: str, weight_kg: float, service_level: str = "economy") -> Tuple[int, dict]:
-    country = country.upper()
-    if country not in SERVICE_AREAS["international"]:
-        raise ValueError("Country not supported for international shipping.")
-    base = PRICING["international"]["base"]
-    per_kg = PRICING["international"]["per_kg"]
-    surcharge = PRICING["international"]["country_surcharge"].get(country, 1.4)
-    # simple service level multiplier
-    if service_level == "express":
-        svc_mult = 1.6
-    else:
-        svc_mult = 1.0
-    cost = int((base + (per_kg * weight_kg)) * surcharge * svc_mult)
-    return cost, {"base": base, "per_kg": per_kg, "surcharge": surcharge, "svc_mult": svc_mult}
+    return RATE_CARD.quote_international(origin, country, weight_kg, service_level)
 
 # ---------------------- Agent ----------------------
 
@@ -323,25 +348,30 @@ class CourierAgent(Agent):
     async def track_shipment(self, query: TrackQuery, context: RunContext = None) -> dict:
         logger.info(f"🔍 Tracking: {query}")
         if query.tracking_id:
-            info = SHIPMENTS.get(query.tracking_id.upper())
-            if not info:
+            snapshot = TRACKING.snapshot(query.tracking_id)
+            if not snapshot:
                 return {"error": f"No shipment found with tracking {query.tracking_id}."}
-            return {
-                "tracking_id": query.tracking_id.upper(),
-                "status": info["status"],
-                "last_location": info["last_location"],
-                "estimated_delivery": info.get("estimated_delivery"),
-                "events": info.get("events", []),
-            }
-        # reference-based lookup (not implemented in dummy)
-        return {"error": "Reference lookup not available in demo."}
+            watch_shipment(context, snapshot["tracking_id"])
+            return snapshot
+
+        if query.reference:
+            matches = TRACKING.find_by_reference(query.reference)
+        else:
+            matches = TRACKING.find_by_phone(query.recipient_phone)
+        if not matches:
+            return {"error": "No shipment found for those details. Please share the tracking number."}
+        if len(matches) == 1:
+            watch_shipment(context, matches[0])
+            return TRACKING.snapshot(matches[0])
+        # several parcels: status only, the caller picks one to hear the events for
+        return {"shipments": [TRACKING.snapshot(t, events=0) for t in matches]}
 
     # ---------------- pricing quote ----------------
     @function_tool()
     async def get_pricing_quote(self, request: PricingRequest, context: RunContext = None) -> dict:
         logger.info(f"💲 Pricing request: {request}")
-        origin = request.origin.upper()
-        destination = request.destination.upper()
+        origin = resolve_area_code(request.origin)
+        destination = resolve_area_code(request.destination)
         weight = request.weight_kg
         service_level = request.service_level.lower()
 
@@ -376,7 +406,7 @@ class CourierAgent(Agent):
     # ---------------- check service area ----------------
     @function_tool()
     async def check_service_area(self, location: str, context: RunContext = None) -> dict:
-        loc = location.strip().upper()
+        loc = resolve_area_code(location)
         logger.info(f"🌐 Checking service area for: {loc}")
         if loc in SERVICE_AREAS["domestic"]:
             info = SERVICE_AREAS["domestic"][loc]
@@ -395,11 +425,23 @@ class CourierAgent(Agent):
         if request.area_code.upper() not in SERVICE_AREAS["domestic"]:
             return {"error": f"Pickup area {request.area_code} not covered for local pickup."}
 
-        # 2) find agent availability
-        agent = find_agent_for_area(request.area_code.upper())
-        if agent is None:
-            # suggest alternate times or next-day pickup
-            return {"error": "No pickup agent currently available in your area. We can schedule next-day pickup between 09:00-14:00. Would you like to schedule that?"}
+        # 2) hold a rider for the requested pickup window (drops any earlier preview's hold)
+        area = request.area_code.upper()
+        if context:
+            previous = session_state(context).pop("pending_pickup_preview", None)
+            if previous and previous.get("hold_id"):
+                DISPATCHER.cancel_hold(previous["hold_id"])
+        if DISPATCHER.window_for(request.pickup_time) is None:
+            return {"error": "Pickups run between 09:00 and 18:00. Please choose a time in that range."}
+        hold = DISPATCHER.hold(area, request.pickup_date, request.pickup_time)
+        if hold is None:
+            return {
+                "error": "No pickup rider is free in that window.",
+                "next_available": windows_payload(
+                    DISPATCHER.next_available(area, request.pickup_date, request.pickup_time)
+                ),
+            }
+        slot = hold.payload
 
         # 3) pricing (estimate)
         # split local service choice
@@ -416,11 +458,12 @@ class CourierAgent(Agent):
         preview_id = generate_pickup_booking_id()
         preview = {
             "preview_id": preview_id,
-            "assigned_agent": agent["id"],
-            "agent_name": agent["name"],
+            "assigned_agent": slot["agent_id"],
+            "agent_name": slot["agent_name"],
             "estimated_price": f"PKR {price:,}",
             "pickup_date": str(request.pickup_date),
             "pickup_time": request.pickup_time,
+            "pickup_window": slot["window"],
             "pieces": request.pieces,
             "weight_kg": request.weight_kg,
             "service": request.service,
@@ -430,20 +473,55 @@ class CourierAgent(Agent):
         # If user hasn't confirmed, return preview only
         # (the LLM should ask user to confirm; if confirm action sent, call book_pickup with same payload + confirm flag)
         # For demo: allow user to pass through preview_id to confirm
-        # We'll store preview temporarily in RunContext.session_data to allow confirm flow
+        # We'll store preview temporarily in this session's state to allow confirm flow
         if context:
-            context.session_data["pending_pickup_preview"] = {"preview": preview, "request": request.dict()}
+            session_state(context)["pending_pickup_preview"] = {
+                "preview": preview, "request": request.dict(), "hold_id": hold.hold_id,
+            }
+        else:
+            DISPATCHER.cancel_hold(hold.hold_id)
         return {"pickup_preview": preview}
 
+    @function_tool()
+    async def find_pickup_windows(self, area_code: str, pickup_date: Optional[str] = None, after_time: Optional[str] = None, context: RunContext = None) -> dict:
+        """
+        Next pickup windows with a free rider in an area, starting at the given
+        date (YYYY-MM-DD, default today) and time (HH:MM, default now).
+        """
+        area = resolve_area_code(area_code)
+        if area not in SERVICE_AREAS["domestic"]:
+            return {"error": f"Pickup area {area_code} not covered for local pickup."}
+        now = datetime.now()
+        try:
+            day = date.fromisoformat(pickup_date) if pickup_date else now.date()
+        except ValueError:
+            return {"error": "Date must be YYYY-MM-DD."}
+        start = after_time or (now.strftime("%H:%M") if day == now.date() else "00:00")
+        if not re.match(r"^\d{1,2}:\d{2}$", start):
+            return {"error": "Time must be HH:MM (24h)."}
+        windows = DISPATCHER.next_available(area, max(day, now.date()), start)
+        if not windows:
+            return {"error": f"No pickup riders are free in {area} over the next week."}
+        return {"area": area, "next_available": windows_payload(windows)}
+
     @function_tool()
     async def confirm_pickup(self, preview_id: str, context: RunContext = None) -> dict:
         if not context:
             return {"error": "No context provided."}
-        pending = context.session_data.get("pending_pickup_preview")
+        pending = session_state(context).get("pending_pickup_preview")
         if not pending or pending["preview"]["preview_id"] != preview_id:
             return {"error": "No matching pickup preview found. Please request a new pickup."}
 
         req = pending["request"]
+        if DISPATCHER.confirm(pending["hold_id"]) is None:
+            session_state(context).pop("pending_pickup_preview", None)
+            pickup_date = date.fromisoformat(str(req["pickup_date"]))
+            return {
+                "error": "That pickup window was released before confirmation. Please pick another window.",
+                "next_available": windows_payload(
+                    DISPATCHER.next_available(req["area_code"], pickup_date, req["pickup_time"])
+                ),
+            }
         booking_id = generate_pickup_booking_id()
         assigned_agent = pending["preview"]["assigned_agent"]
 
@@ -456,7 +534,7 @@ class CourierAgent(Agent):
             "weight_kg": req["weight_kg"],
             "pieces": req["pieces"],
             "service": req["service"],
-            "date": req["pickup_date"],
+            "date": str(req["pickup_date"]),
             "time": req["pickup_time"],
             "status": "confirmed",
             "assigned_agent": assigned_agent,
@@ -464,11 +542,6 @@ class CourierAgent(Agent):
         }
         PICKUP_BOOKINGS.append(record)
 
-        # mark agent unavailable temporarily (demo)
-        for a in PICKUP_AGENTS:
-            if a["id"] == assigned_agent:
-                a["available"] = False
-
         # send email
         email_body = (
             f"Dear {req['sender_name']},\n\n"
@@ -479,7 +552,7 @@ class CourierAgent(Agent):
         send_email(req["email"], f"Pickup Confirmation - {booking_id}", email_body)
 
         # clear pending preview
-        context.session_data.pop("pending_pickup_preview", None)
+        session_state(context).pop("pending_pickup_preview", None)
 
         return {"booking_id": booking_id, "message": "Pickup confirmed and assigned.", "assigned_agent": assigned_agent}
 
@@ -506,11 +579,12 @@ class CourierAgent(Agent):
         dt_pickup = datetime.fromisoformat(f"{booking['date']}T{booking['time']}:00")
         if (dt_pickup - datetime.now()) < timedelta(hours=2):
             return {"error": "Cannot cancel within 2 hours of scheduled pickup."}
+        if booking["status"] == "cancelled":
+            return {"message": f"Booking {booking['booking_id']} is already cancelled."}
         booking["status"] = "cancelled"
-        # free agent
-        for a in PICKUP_AGENTS:
-            if a["id"] == booking.get("assigned_agent"):
-                a["available"] = True
+        # free the rider's slot in that window
+        if booking.get("assigned_agent"):
+            DISPATCHER.release(booking["assigned_agent"], date.fromisoformat(booking["date"]), booking["time"])
         send_email(booking["email"], f"Pickup Cancelled - {booking['booking_id']}", f"Your pickup {booking['booking_id']} has been cancelled.")
         return {"message": f"Booking {booking['booking_id']} cancelled."}
 
@@ -519,14 +593,8 @@ class CourierAgent(Agent):
     async def simulate_shipment_update(self, tracking_id: str, new_status: str, location: Optional[str] = None, context: RunContext = None) -> dict:
         logger.info(f"🔧 Simulate update {tracking_id} -> {new_status}")
         key = tracking_id.upper()
-        if key not in SHIPMENTS:
+        if TRACKING.append_event(key, new_status, location) is None:
             return {"error": "Tracking ID not found."}
-        info = SHIPMENTS[key]
-        event = {"ts": str(datetime.utcnow()), "text": new_status + (f" at {location}" if location else "")}
-        info["events"].append(event)
-        info["status"] = new_status
-        if location:
-            info["last_location"] = location
         return {"message": "Updated", "tracking_id": key, "status": new_status}
 
     # ---------------- cancellation policy ----------------
@@ -538,6 +606,15 @@ class CourierAgent(Agent):
 
 def prewarm(proc: JobProcess):
     proc.userdata["vad"] = silero.VAD.load()
+    # scanner events (JSON or CSV lines) appended to this file flow into TRACKING
+    scan_feed = os.getenv("COURIER_SCAN_FEED")
+    if scan_feed:
+        proc.userdata["scan_feed_stop"] = TRACKING_INGESTOR.start_tail(scan_feed)
+    # or pushed over TCP; only this process sees them, so use with a single job process
+    scan_feed_port = os.getenv("COURIER_SCAN_FEED_PORT")
+    if scan_feed_port:
+        host = os.getenv("COURIER_SCAN_FEED_HOST", "127.0.0.1")
+        proc.userdata["scan_feed_server_stop"] = TRACKING_INGESTOR.start_serve(host, int(scan_feed_port))
 
 async def entrypoint(ctx: JobContext):
     filler_task = None
@@ -551,6 +628,15 @@ async def entrypoint(ctx: JobContext):
     agent = CourierAgent()
     usage_collector = metrics.UsageCollector()
     conversation_log = []
+    tracking_updates = session_state(session).setdefault("tracking_updates", asyncio.Queue())
+
+    async def relay_tracking_updates():
+        while True:
+            update = await tracking_updates.get()
+            where = f" at {update['last_location']}" if update.get("last_location") else ""
+            await session.say(f"Quick update on shipment {update['tracking_id']}: it is now {update['status']}{where}.")
+
+    relay_task = asyncio.create_task(relay_tracking_updates())
 
     @session.on("metrics_collected")
     def on_agent_metrics(agent_metrics: metrics.AgentMetrics):
@@ -595,6 +681,8 @@ async def entrypoint(ctx: JobContext):
     def on_finished(remote: rtc.RemoteParticipant):
         call_start = getattr(ctx, "call_start", None)
         call_end = datetime.utcnow()
+        TRACKING_UPDATES.unwatch_all(tracking_updates)
+        relay_task.cancel()
         duration_minutes = (call_end - call_start).total_seconds() / 60.0 if call_start else 0.0
         summary = usage_collector.get_summary()
         summary_dict = summary.__dict__ if hasattr(summary, "__dict__") else summary
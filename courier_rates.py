@@ -0,0 +1,168 @@
+# courier_rates.py
+"""
+Compiled courier rate card.
+
+The nested SERVICE_AREAS / PRICING dicts are flattened once into lookup arrays:
+destination -> zone multiplier (domestic) or country surcharge (international),
+and service level -> multiplier. `quote()` prices one parcel with plain floats;
+`quote_many()` prices arrays of parcels with NumPy. Both use the same operation
+order as the original formulas, so a batch quote matches the single quote to the
+rupee.
+"""
+
+import logging
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("courier-rates")
+
+DEFAULT_SERVICE_MULTIPLIER = 1.0
+DEFAULT_COUNTRY_SURCHARGE = 1.4
+
+DOMESTIC = 0
+INTERNATIONAL = 1
+UNPRICEABLE = -1
+
+
+class Quote(NamedTuple):
+    kind: str  # "domestic" | "international"
+    price: int
+    breakdown: dict
+
+
+class QuoteBatch(NamedTuple):
+    prices: np.ndarray  # int64, -1 where the parcel can't be priced
+    kinds: np.ndarray  # int8: DOMESTIC, INTERNATIONAL or UNPRICEABLE
+    cod_fees: np.ndarray  # int64
+
+
+class RateCard:
+    """Service-area and pricing tables compiled into flat lookups."""
+
+    def __init__(self, service_areas: Dict[str, dict], pricing: Dict[str, dict]) -> None:
+        domestic, international = pricing["domestic"], pricing["international"]
+        self.dom_base = domestic["base"]
+        self.dom_per_kg = domestic["per_kg"]
+        self.cod_fee_pct = domestic["cod_fee_pct"]
+        self.intl_base = international["base"]
+        self.intl_per_kg = international["per_kg"]
+
+        # area/country code -> (zone, zone multiplier) or surcharge
+        self.zones: Dict[str, str] = {
+            code: info["zone"] for code, info in service_areas["domestic"].items()
+        }
+        self.zone_mult: Dict[str, float] = {
+            code: domestic["zone_multiplier"].get(zone, 1.0) for code, zone in self.zones.items()
+        }
+        self.surcharge: Dict[str, float] = {
+            country: international["country_surcharge"].get(country, DEFAULT_COUNTRY_SURCHARGE)
+            for country in service_areas["international"]
+        }
+        self.dom_service: Dict[str, float] = dict(domestic.get("service_multiplier", {}))
+        self.intl_service: Dict[str, float] = dict(international.get("service_multiplier", {}))
+
+        # Index order for the vectorised path: every code gets one slot per table
+        self._codes = sorted(set(self.zones) | set(self.surcharge))
+        self._code_index = {code: i for i, code in enumerate(self._codes)}
+        self._is_domestic = np.array([c in self.zones for c in self._codes], dtype=bool)
+        self._is_country = np.array([c in self.surcharge for c in self._codes], dtype=bool)
+        self._zone_mult_arr = np.array([self.zone_mult.get(c, 1.0) for c in self._codes])
+        self._surcharge_arr = np.array([self.surcharge.get(c, 1.0) for c in self._codes])
+
+    # ------------------ Single parcel ------------------
+    def quote_domestic(
+        self, origin: str, destination: str, weight_kg: float,
+        service_level: str = "standard", cod_amount: float = 0.0,
+    ) -> Tuple[int, dict]:
+        origin, destination = origin.upper(), destination.upper()
+        if origin not in self.zones or destination not in self.zones:
+            raise ValueError("Origin or destination not in domestic coverage.")
+        multiplier = self.zone_mult[destination]
+        svc_mult = self.dom_service.get(service_level.lower(), DEFAULT_SERVICE_MULTIPLIER)
+        cost = int((self.dom_base + (self.dom_per_kg * weight_kg)) * multiplier * svc_mult)
+        cod_fee = int(cost * self.cod_fee_pct + (cod_amount * self.cod_fee_pct if cod_amount else 0))
+        return cost + cod_fee, {
+            "base": self.dom_base, "per_kg": self.dom_per_kg, "zone": self.zones[destination],
+            "svc_mult": svc_mult, "cod_fee": cod_fee,
+        }
+
+    def quote_international(
+        self, origin: str, country: str, weight_kg: float, service_level: str = "economy"
+    ) -> Tuple[int, dict]:
+        country = country.upper()
+        if country not in self.surcharge:
+            raise ValueError("Country not supported for international shipping.")
+        surcharge = self.surcharge[country]
+        svc_mult = self.intl_service.get(service_level.lower(), DEFAULT_SERVICE_MULTIPLIER)
+        cost = int((self.intl_base + (self.intl_per_kg * weight_kg)) * surcharge * svc_mult)
+        return cost, {
+            "base": self.intl_base, "per_kg": self.intl_per_kg, "surcharge": surcharge, "svc_mult": svc_mult,
+        }
+
+    def quote(
+        self, origin: str, destination: str, weight_kg: float,
+        service_level: str = "standard", cod_amount: float = 0.0,
+    ) -> Optional[Quote]:
+        """Domestic if both ends are domestic areas, else international by destination country."""
+        origin, destination = origin.upper(), destination.upper()
+        if origin in self.zones and destination in self.zones:
+            return Quote("domestic", *self.quote_domestic(origin, destination, weight_kg, service_level, cod_amount))
+        if destination in self.surcharge:
+            return Quote("international", *self.quote_international(origin, destination, weight_kg, service_level))
+        return None
+
+    # ------------------ Batch ------------------
+    def _lookup_codes(self, codes: Sequence[str]) -> np.ndarray:
+        """Index of each code in the rate tables, -1 for unknown codes."""
+        unique, inverse = np.unique(np.char.upper(np.asarray(codes, dtype=str)), return_inverse=True)
+        mapped = np.array([self._code_index.get(str(c), -1) for c in unique], dtype=np.int64)
+        return mapped[inverse.reshape(-1)]
+
+    def _service_mults(self, levels: np.ndarray, table: Dict[str, float]) -> np.ndarray:
+        unique, inverse = np.unique(levels, return_inverse=True)
+        mults = np.array([table.get(str(s), DEFAULT_SERVICE_MULTIPLIER) for s in unique])
+        return mults[inverse.reshape(-1)]
+
+    def quote_many(
+        self,
+        origins: Sequence[str],
+        destinations: Sequence[str],
+        weights_kg: Sequence[float],
+        service_levels: Optional[Sequence[str]] = None,
+        cod_amounts: Optional[Sequence[float]] = None,
+    ) -> QuoteBatch:
+        """Price many parcels at once; element i matches `quote()` on parcel i."""
+        n = len(weights_kg)
+        weights = np.asarray(weights_kg, dtype=np.float64)
+        levels = np.char.lower(np.asarray(service_levels if service_levels is not None else ["standard"] * n, dtype=str))
+        cod = np.asarray(cod_amounts if cod_amounts is not None else np.zeros(n), dtype=np.float64)
+
+        o_idx, d_idx = self._lookup_codes(origins), self._lookup_codes(destinations)
+        o_dom = (o_idx >= 0) & self._is_domestic[o_idx]
+        d_dom = (d_idx >= 0) & self._is_domestic[d_idx]
+        d_country = (d_idx >= 0) & self._is_country[d_idx]
+        domestic = o_dom & d_dom
+        international = ~domestic & d_country
+
+        kinds = np.full(n, UNPRICEABLE, dtype=np.int8)
+        kinds[domestic] = DOMESTIC
+        kinds[international] = INTERNATIONAL
+        prices = np.full(n, -1, dtype=np.int64)
+        cod_fees = np.zeros(n, dtype=np.int64)
+
+        if domestic.any():
+            w, d = weights[domestic], d_idx[domestic]
+            svc = self._service_mults(levels[domestic], self.dom_service)
+            cost = np.floor((self.dom_base + (self.dom_per_kg * w)) * self._zone_mult_arr[d] * svc)
+            fee = np.floor(cost * self.cod_fee_pct + cod[domestic] * self.cod_fee_pct)
+            cod_fees[domestic] = fee.astype(np.int64)
+            prices[domestic] = (cost + fee).astype(np.int64)
+
+        if international.any():
+            w, d = weights[international], d_idx[international]
+            svc = self._service_mults(levels[international], self.intl_service)
+            cost = np.floor((self.intl_base + (self.intl_per_kg * w)) * self._surcharge_arr[d] * svc)
+            prices[international] = cost.astype(np.int64)
+
+        return QuoteBatch(prices, kinds, cod_fees)
@@ -0,0 +1,328 @@
+# customer_store.py
+"""
+Unified insurance customer store backed by SQLite.
+
+Customers, policies, payments and claims live in one database keyed by
+case-normalized email, with indexes for the lookups the agent does per turn:
+
+- policy_number -> owner               (ownership checks when filing a claim)
+- (owner, date) on payments and claims (history, newest first)
+- claim_id                             (claim status)
+
+History is served a page at a time with keyset cursors over those indexes, and
+summaries are SQL aggregates, so tool output stays bounded however long a
+customer's history grows.
+
+Payments and claims are attributed to the *policy owner*, so history filed under
+an older or secondary email still shows up for the customer; that email is kept
+as an alias pointing at the owner.
+"""
+
+import base64
+import json
+import logging
+import sqlite3
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("customer-store")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS customers (
+    email TEXT PRIMARY KEY,
+    name  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS email_aliases (
+    alias TEXT PRIMARY KEY,
+    email TEXT NOT NULL REFERENCES customers(email)
+);
+CREATE TABLE IF NOT EXISTS policies (
+    policy_number TEXT PRIMARY KEY,
+    owner_email   TEXT NOT NULL REFERENCES customers(email),
+    type          TEXT NOT NULL,
+    coverage      TEXT,
+    premium       INTEGER NOT NULL,
+    next_due      TEXT,
+    status        TEXT
+);
+CREATE INDEX IF NOT EXISTS policies_by_owner ON policies(owner_email);
+CREATE TABLE IF NOT EXISTS payments (
+    transaction_id TEXT PRIMARY KEY,
+    policy_number  TEXT NOT NULL,
+    owner_email    TEXT NOT NULL,
+    date           TEXT NOT NULL,
+    amount         INTEGER NOT NULL,
+    method         TEXT
+);
+CREATE INDEX IF NOT EXISTS payments_by_owner_date ON payments(owner_email, date, transaction_id);
+-- Covering index so per-policy totals never touch the table rows
+CREATE INDEX IF NOT EXISTS payments_by_owner_policy ON payments(owner_email, policy_number, date, amount);
+CREATE TABLE IF NOT EXISTS claims (
+    claim_id      TEXT PRIMARY KEY,
+    policy_number TEXT NOT NULL,
+    owner_email   TEXT NOT NULL,
+    claim_type    TEXT NOT NULL,
+    incident_date TEXT NOT NULL,
+    description   TEXT,
+    status        TEXT NOT NULL,
+    attachments   TEXT NOT NULL DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS claims_by_owner_date ON claims(owner_email, incident_date, claim_id);
+"""
+
+POLICY_COLUMNS = ("policy_number", "type", "coverage", "premium", "next_due", "status")
+PAYMENT_COLUMNS = ("transaction_id", "policy_number", "date", "amount", "method")
+CLAIM_COLUMNS = (
+    "claim_id", "policy_number", "claim_type", "incident_date", "description", "status", "attachments",
+)
+DEFAULT_PAGE_SIZE = 5
+MAX_PAGE_SIZE = 20
+
+
+def normalize_email(email: str) -> str:
+    return (email or "").strip().lower()
+
+
+def encode_cursor(sort_key: str, record_id: str) -> str:
+    """Opaque cursor for the row after which the next page starts."""
+    return base64.urlsafe_b64encode(f"{sort_key}|{record_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        sort_key, record_id = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor.") from None
+    return sort_key, record_id
+
+
+def payment_cursor(payment: dict) -> str:
+    """Cursor for the payments page after `payment`."""
+    return encode_cursor(payment["date"], payment["transaction_id"])
+
+
+def _claim_row(row: sqlite3.Row) -> dict:
+    claim = dict(zip(CLAIM_COLUMNS, row))
+    claim["attachments"] = json.loads(claim["attachments"])
+    return claim
+
+
+class CustomerStore:
+    """SQLite-backed customer, policy, payment and claim records."""
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _query(self, sql: str, params: Iterable = ()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    # ------------------ Bulk loading ------------------
+    def bulk_load(
+        self,
+        users: Dict[str, dict],
+        payments: Optional[Dict[str, List[dict]]] = None,
+        claims: Optional[Dict[str, List[dict]]] = None,
+    ) -> None:
+        """
+        Load the legacy {email: ...} dicts in one transaction. History rows are
+        re-keyed to the owner of their policy; unknown policies are skipped.
+        """
+        customers, policies, aliases = [], [], {}
+        owners: Dict[str, str] = {}
+        for email, user in users.items():
+            email = normalize_email(email)
+            customers.append((email, user["name"]))
+            for p in user.get("policies", []):
+                owners[p["policy_number"]] = email
+                policies.append((p["policy_number"], email, *(p.get(c) for c in POLICY_COLUMNS[1:])))
+
+        def owner_of(history_email: str, record: dict) -> Optional[str]:
+            owner = owners.get(record["policy_number"])
+            if owner is None:
+                logger.warning(f"Skipping record for unknown policy {record['policy_number']}")
+            elif normalize_email(history_email) != owner:
+                aliases[normalize_email(history_email)] = owner
+            return owner
+
+        payment_rows = [
+            (p["transaction_id"], p["policy_number"], owner, p["date"], p["amount"], p.get("method"))
+            for email, rows in (payments or {}).items()
+            for p in rows
+            if (owner := owner_of(email, p))
+        ]
+        claim_rows = [
+            (
+                c["claim_id"], c["policy_number"], owner, c["claim_type"], c["incident_date"],
+                c.get("description"), c["status"], json.dumps(c.get("attachments") or []),
+            )
+            for email, rows in (claims or {}).items()
+            for c in rows
+            if (owner := owner_of(email, c))
+        ]
+
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO customers VALUES (?, ?)", customers)
+            self._conn.executemany("INSERT OR REPLACE INTO policies VALUES (?, ?, ?, ?, ?, ?, ?)", policies)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO email_aliases VALUES (?, ?)",
+                [(alias, email) for alias, email in aliases.items() if alias not in owners.values()],
+            )
+            self._conn.executemany("INSERT OR REPLACE INTO payments VALUES (?, ?, ?, ?, ?, ?)", payment_rows)
+            self._conn.executemany("INSERT OR REPLACE INTO claims VALUES (?, ?, ?, ?, ?, ?, ?, ?)", claim_rows)
+        logger.info(
+            f"Loaded {len(customers)} customers, {len(policies)} policies, "
+            f"{len(payment_rows)} payments, {len(claim_rows)} claims"
+        )
+
+    # ------------------ Lookups ------------------
+    def resolve_email(self, email: str) -> Optional[str]:
+        """Primary email for a customer email or alias, or None if unknown."""
+        email = normalize_email(email)
+        rows = self._query(
+            "SELECT email FROM customers WHERE email = ? "
+            "UNION ALL SELECT email FROM email_aliases WHERE alias = ? LIMIT 1",
+            (email, email),
+        )
+        return rows[0][0] if rows else None
+
+    def get_customer(self, email: str) -> Optional[dict]:
+        """{"email", "name", "policies": [...]} or None."""
+        primary = self.resolve_email(email)
+        if primary is None:
+            return None
+        name = self._query("SELECT name FROM customers WHERE email = ?", (primary,))[0][0]
+        policies = self._query(
+            f"SELECT {', '.join(POLICY_COLUMNS)} FROM policies WHERE owner_email = ? ORDER BY policy_number",
+            (primary,),
+        )
+        return {
+            "email": primary,
+            "name": name,
+            "policies": [dict(zip(POLICY_COLUMNS, row)) for row in policies],
+        }
+
+    def policy_owner(self, policy_number: str) -> Optional[str]:
+        rows = self._query("SELECT owner_email FROM policies WHERE policy_number = ?", (policy_number,))
+        return rows[0][0] if rows else None
+
+    def owns_policy(self, email: str, policy_number: str) -> bool:
+        primary = self.resolve_email(email)
+        return primary is not None and self.policy_owner(policy_number) == primary
+
+    def policy_batches(
+        self, batch_size: int = 100_000, status: Optional[str] = "Active"
+    ) -> Iterator[List[Tuple[str, int, Optional[str]]]]:
+        """(policy_number, premium, next_due) rows in batches, for portfolio-wide jobs."""
+        sql = "SELECT policy_number, premium, next_due FROM policies"
+        params: tuple = ()
+        if status:
+            sql, params = sql + " WHERE status = ?", (status,)
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            rows = cursor.fetchmany(batch_size)
+        while rows:
+            yield rows
+            with self._lock:
+                rows = cursor.fetchmany(batch_size)
+
+    # ------------------ Pagination and summaries ------------------
+    def _page(
+        self, table: str, columns: Tuple[str, ...], date_col: str, id_col: str,
+        email: str, limit: int, cursor: Optional[str], extra_where: str = "", extra_params: tuple = (),
+    ) -> Tuple[List[tuple], Optional[str]]:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        sql = f"SELECT {', '.join(columns)} FROM {table} WHERE owner_email = ?{extra_where}"
+        params: list = [self.resolve_email(email), *extra_params]
+        if cursor:
+            sort_key, record_id = decode_cursor(cursor)
+            sql += f" AND ({date_col}, {id_col}) < (?, ?)"
+            params += [sort_key, record_id]
+        sql += f" ORDER BY {date_col} DESC, {id_col} DESC LIMIT ?"
+        rows = self._query(sql, (*params, limit + 1))
+        if len(rows) <= limit:
+            return rows, None
+        last = dict(zip(columns, rows[limit - 1]))
+        return rows[:limit], encode_cursor(last[date_col], last[id_col])
+
+    def payments_page(
+        self, email: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """One page of payments, newest first, plus the cursor for the next page (or None)."""
+        rows, next_cursor = self._page(
+            "payments", PAYMENT_COLUMNS, "date", "transaction_id", email, limit, cursor
+        )
+        return [dict(zip(PAYMENT_COLUMNS, row)) for row in rows], next_cursor
+
+    def claims_page(
+        self,
+        email: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[str]]:
+        """One page of claims, newest incident first, optionally filtered by status."""
+        extra_where, extra_params = ("", ())
+        if status:
+            extra_where, extra_params = " AND status = ? COLLATE NOCASE", (status,)
+        rows, next_cursor = self._page(
+            "claims", CLAIM_COLUMNS, "incident_date", "claim_id", email, limit, cursor,
+            extra_where, extra_params,
+        )
+        return [_claim_row(row) for row in rows], next_cursor
+
+    def payment_summary(self, email: str) -> dict:
+        """Totals per policy and overall, straight from the (owner, date) index."""
+        rows = self._query(
+            "SELECT policy_number, COUNT(*), SUM(amount), MAX(date) FROM payments "
+            "WHERE owner_email = ? GROUP BY policy_number ORDER BY policy_number",
+            (self.resolve_email(email),),
+        )
+        per_policy = [
+            {"policy_number": policy, "payments": count, "total": total, "last_paid": last}
+            for policy, count, total, last in rows
+        ]
+        return {
+            "payments": sum(p["payments"] for p in per_policy),
+            "total": sum(p["total"] for p in per_policy),
+            "per_policy": per_policy,
+        }
+
+    def claim_summary(self, email: str) -> dict:
+        """Claim counts by status and overall."""
+        rows = self._query(
+            "SELECT status, COUNT(*) FROM claims WHERE owner_email = ? GROUP BY status ORDER BY status",
+            (self.resolve_email(email),),
+        )
+        by_status = {status: count for status, count in rows}
+        return {"claims": sum(by_status.values()), "by_status": by_status}
+
+    def get_claim(self, claim_id: str) -> Optional[dict]:
+        rows = self._query(
+            f"SELECT {', '.join(CLAIM_COLUMNS)}, owner_email FROM claims WHERE claim_id = ?", (claim_id,)
+        )
+        if not rows:
+            return None
+        claim = _claim_row(rows[0][:-1])
+        claim["owner_email"] = rows[0][-1]
+        return claim
+
+    # ------------------ Writes ------------------
+    def add_claim(self, email: str, claim: dict) -> None:
+        """Insert a claim for a policy the customer owns (caller checks ownership)."""
+        owner = self.policy_owner(claim["policy_number"]) or normalize_email(email)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO claims VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    claim["claim_id"], claim["policy_number"], owner, claim["claim_type"],
+                    claim["incident_date"], claim.get("description"), claim["status"],
+                    json.dumps(claim.get("attachments") or []),
+                ),
+            )
@@ -0,0 +1,165 @@
+# doctor_directory.py
+"""
+Doctor directory index: partial names, specializations and everyday synonyms.
+
+Name tokens go into a prefix trie ("fat ahm" finds Dr. Fatima Ahmed), and
+specializations are reachable through a synonym table ("skin doctor" ->
+Dermatologist). Full names are also in a trigram index so misheard names still
+resolve. Lookups touch only the postings for the query's own tokens, so cost
+doesn't grow with the size of the directory.
+"""
+
+import logging
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+from text_match import NGramIndex, PrefixTrie, normalize_text
+
+logger = logging.getLogger("doctor-directory")
+
+# Words callers wrap around a name or need ("I need to see a doctor for my skin")
+NOISE_WORDS = {
+    "a", "an", "the", "i", "me", "my", "need", "want", "see", "to", "for", "with",
+    "dr", "doctor", "doc", "please", "find", "book", "appointment", "someone",
+}
+MAX_PHRASE_WORDS = 3
+FUZZY_MIN_SCORE = 0.45
+
+
+class DoctorMatch(NamedTuple):
+    name: str
+    specialization: str
+    score: float
+    matched_on: str  # "name", "specialization" or "fuzzy"
+
+
+class DoctorDirectory:
+    """Ranked doctor lookup by (partial) name or specialization."""
+
+    def __init__(
+        self,
+        doctors: Dict[str, dict],
+        synonyms: Optional[Dict[str, Iterable[str]]] = None,
+    ) -> None:
+        self._names: List[str] = []
+        self._specializations: List[str] = []
+        self._name_keys: List[str] = []
+        self._by_specialization: Dict[str, List[int]] = {}
+        self._phrases: Dict[str, str] = {}
+        self._trie = PrefixTrie()
+        self._fuzzy = NGramIndex()
+
+        for name, info in doctors.items():
+            doctor_id = len(self._names)
+            specialization = info.get("specialization", "")
+            key = self._name_key(name)
+            self._names.append(name)
+            self._specializations.append(specialization)
+            self._name_keys.append(key)
+            self._by_specialization.setdefault(specialization, []).append(doctor_id)
+            for token in key.split():
+                self._trie.insert(token, doctor_id)
+            self._fuzzy.add(key)
+
+        for specialization in self._by_specialization:
+            self._add_phrase(specialization, specialization)
+        for specialization, phrases in (synonyms or {}).items():
+            if specialization not in self._by_specialization:
+                logger.warning(f"Synonyms given for unknown specialization '{specialization}'")
+                continue
+            for phrase in phrases:
+                self._add_phrase(phrase, specialization)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @staticmethod
+    def _name_key(name: str) -> str:
+        tokens = normalize_text(name).split()
+        return " ".join(t for t in tokens if t not in ("dr", "doctor"))
+
+    def _add_phrase(self, phrase: str, specialization: str) -> None:
+        key = normalize_text(phrase)
+        self._phrases[key] = specialization
+        if key.endswith("s"):
+            return
+        self._phrases.setdefault(f"{key}s", specialization)
+
+    # ------------------ Specializations ------------------
+    def resolve_specialization(self, text: str) -> Optional[str]:
+        """Canonical specialization mentioned in `text` ("heart doctor" -> "Cardiologist")."""
+        tokens = normalize_text(text).split()
+        for width in range(min(MAX_PHRASE_WORDS, len(tokens)), 0, -1):
+            for start in range(len(tokens) - width + 1):
+                specialization = self._phrases.get(" ".join(tokens[start : start + width]))
+                if specialization:
+                    return specialization
+        return None
+
+    def by_specialization(self, specialization: str) -> List[str]:
+        return [self._names[i] for i in self._by_specialization.get(specialization, [])]
+
+    # ------------------ Search ------------------
+    def _name_hits(self, tokens: List[str]) -> Dict[int, float]:
+        """Doctors whose name tokens start with every query token, with a coverage score."""
+        candidates: Optional[Set[int]] = None
+        exact_tokens: Dict[int, int] = {}
+        for token in tokens:
+            ids = self._trie.prefix(token)
+            candidates = set(ids) if candidates is None else candidates & ids
+            if not candidates:
+                return {}
+            for doctor_id in self._trie.exact(token):
+                exact_tokens[doctor_id] = exact_tokens.get(doctor_id, 0) + 1
+
+        query_chars = sum(len(t) for t in tokens)
+        scores: Dict[int, float] = {}
+        for doctor_id in candidates or ():
+            key = self._name_keys[doctor_id]
+            if key == " ".join(tokens):
+                scores[doctor_id] = 1.0
+                continue
+            coverage = query_chars / len(key.replace(" ", ""))
+            exact_share = exact_tokens.get(doctor_id, 0) / len(tokens)
+            scores[doctor_id] = 0.6 + 0.2 * coverage + 0.15 * exact_share
+        return scores
+
+    def search(self, query: str, limit: int = 5) -> List[DoctorMatch]:
+        """Best matches first: exact/partial names, then specialization, then fuzzy names."""
+        tokens = [t for t in normalize_text(query).split() if t not in NOISE_WORDS]
+        scores: Dict[int, float] = {}
+        matched_on: Dict[int, str] = {}
+
+        if tokens:
+            for doctor_id, score in self._name_hits(tokens).items():
+                scores[doctor_id], matched_on[doctor_id] = score, "name"
+
+        specialization = self.resolve_specialization(query)
+        if specialization:
+            for doctor_id in self._by_specialization[specialization]:
+                if doctor_id not in scores:
+                    scores[doctor_id], matched_on[doctor_id] = 0.7, "specialization"
+
+        if not scores and tokens:
+            for doctor_id, dice in self._fuzzy.search(" ".join(tokens), limit=limit):
+                if dice >= FUZZY_MIN_SCORE:
+                    scores[doctor_id], matched_on[doctor_id] = 0.6 * dice, "fuzzy"
+
+        ranked = sorted(scores, key=lambda i: (-scores[i], self._names[i]))[:limit]
+        return [
+            DoctorMatch(
+                self._names[i], self._specializations[i], round(scores[i], 3), matched_on[i]
+            )
+            for i in ranked
+        ]
+
+    def resolve_name(self, text: str) -> Optional[str]:
+        """
+        Full name of the one doctor `text` names ("Dr. Fatima" -> "Dr. Fatima Ahmed"),
+        or None if nobody or more than one doctor matches ("Dr. Khan").
+        """
+        if text in self._names:
+            return text
+        matches = [m for m in self.search(text, limit=2) if m.matched_on != "specialization"]
+        if not matches or (len(matches) > 1 and matches[0].score < 1.0):
+            return None
+        return matches[0].name
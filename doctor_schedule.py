@@ -0,0 +1,346 @@
+# doctor_schedule.py
+"""
+Doctor schedules compiled once from the human-readable `timings` strings.
+
+"Mon–Fri: 10 AM – 2 PM" becomes a weekday bitmask plus a (start, end) minute
+range per segment, so an availability check is a bit test and an integer compare.
+`parse_time` handles the "10:30 AM" / "14:00" forms the LLM sends with one regex,
+plus bare hours ("10") and spoken forms ("half past ten"); only anything more
+unusual falls back to dateparser, and a missing or failing dateparser just
+means the time is not understood. A bare hour could be AM or PM, so
+`ScheduleCalendar.resolve_time` picks the reading inside the doctor's hours.
+
+`AppointmentBook` splits each working window into fixed-length slots and keeps
+one occupancy bitmap per (doctor, date), so double-booking is impossible and
+`find_next_available` can scan forward day by day with bit tests.
+"""
+
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger("doctor-schedule")
+
+APPOINTMENT_SLOT_MINUTES = 30
+SEARCH_HORIZON_DAYS = 14
+
+DAY_INDEX = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+
+_TIME_RE = re.compile(
+    r"^\s*(\d{1,2})(?:[:.](\d{2}))?\s*(?:([ap])\.?\s*m?\.?)?\s*$", re.IGNORECASE
+)
+_DAYS_RE = re.compile(r"([A-Za-z]{3})[A-Za-z]*(?:\s*[–-]\s*([A-Za-z]{3})[A-Za-z]*)?")
+_SEGMENT_RE = re.compile(
+    r"(?P<days>[A-Za-z]{3}[A-Za-z]*(?:\s*[–-]\s*[A-Za-z]{3}[A-Za-z]*)?)\s*:\s*"
+    r"(?P<start>\d{1,2}(?::\d{2})?\s*[AaPp][Mm])\s*[–-]\s*(?P<end>\d{1,2}(?::\d{2})?\s*[AaPp][Mm])"
+)
+_NAMED_TIMES = {"noon": 12 * 60, "midday": 12 * 60, "midnight": 0}
+_HOUR_WORDS = {
+    word: i + 1
+    for i, word in enumerate(
+        ("one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten", "eleven", "twelve")
+    )
+}
+_MERIDIEM = r"(?:\s*([ap])\.?\s*m\.?)?"
+_BARE_HOUR_RE = re.compile(rf"^\s*(\d{{1,2}}|[a-z]+)(?:\s*o'?\s*clock)?{_MERIDIEM}\s*$", re.IGNORECASE)
+_SPOKEN_RE = re.compile(rf"^\s*(half|quarter)\s+(past|to)\s+(\d{{1,2}}|[a-z]+){_MERIDIEM}\s*$", re.IGNORECASE)
+DAYTIME_FIRST_HOUR = 7  # a bare "7".."11" reads as morning, "12".."6" as afternoon
+
+
+# ------------------ Time parsing ------------------
+def parse_time_fast(text: str) -> Optional[int]:
+    """Minutes after midnight for "10:30 AM", "2pm", "14:00", "9.15 am"; None otherwise."""
+    named = _NAMED_TIMES.get(text.strip().lower())
+    if named is not None:
+        return named
+    match = _TIME_RE.match(text)
+    if not match:
+        return None
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if minute > 59:
+        return None
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem.lower() == "p" else 0)
+    elif hour > 23 or match.group(2) is None:
+        # A bare "10" is ambiguous; let the fallback decide
+        return None
+    return hour * 60 + minute
+
+
+def _hour(text: str) -> Optional[int]:
+    hour = int(text) if text.isdigit() else _HOUR_WORDS.get(text.lower())
+    return hour if hour is not None and 0 <= hour <= 23 else None
+
+
+def _readings(hour: int, minute: int, meridiem: Optional[str]) -> Tuple[int, ...]:
+    """Minutes for an hour that may lack AM/PM; the daytime reading comes first."""
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return ()
+        return ((hour % 12 + (12 if meridiem.lower() == "p" else 0)) * 60 + minute,)
+    if hour == 0 or hour > 12:
+        return (hour * 60 + minute,)
+    am, pm = (hour % 12) * 60 + minute, (hour % 12 + 12) * 60 + minute
+    return (am, pm) if DAYTIME_FIRST_HOUR <= hour < 12 else (pm, am)
+
+
+@lru_cache(maxsize=512)
+def time_candidates(text: str) -> Tuple[int, ...]:
+    """
+    Every reading of a time phrase, most likely first: one for "10:30 AM" or
+    "14:00", two (AM and PM) for a bare "10" or "half past ten", none if the
+    phrase can't be understood.
+    """
+    minutes = parse_time_fast(text)
+    if minutes is not None:
+        return (minutes,)
+    match = _BARE_HOUR_RE.match(text)
+    hour = _hour(match.group(1)) if match else None
+    if hour is not None:
+        return _readings(hour, 0, match.group(2))
+    match = _SPOKEN_RE.match(text)
+    hour = _hour(match.group(3)) if match else None
+    if hour is not None:
+        offset = 30 if match.group(1).lower() == "half" else 15
+        if match.group(2).lower() == "to":  # "quarter to one" is 12:45
+            hour, offset = (hour - 1 if hour != 1 else 12), 60 - offset
+        return _readings(hour, offset, match.group(4)) if hour >= 0 else ()
+
+    try:
+        import dateparser  # slow to import and to call; only reached for unusual input
+    except ImportError:
+        logger.warning(f"dateparser is not installed; could not parse time '{text}'")
+        return ()
+    try:
+        parsed = dateparser.parse(text)
+    except (ValueError, TypeError, OverflowError) as e:
+        logger.warning(f"Could not parse time '{text}': {e}")
+        return ()
+    if parsed is None:
+        return ()
+    logger.debug(f"Time '{text}' needed the dateparser fallback")
+    return (parsed.hour * 60 + parsed.minute,)
+
+
+def parse_time(text: str) -> Optional[int]:
+    """Most likely minutes after midnight for a time phrase, or None if not understood."""
+    candidates = time_candidates(text)
+    return candidates[0] if candidates else None
+
+
+def format_minutes(minutes: int) -> str:
+    """630 -> "10:30 AM", the form appointment times are stored and read back in."""
+    return time(minutes // 60, minutes % 60).strftime("%I:%M %p").lstrip("0")
+
+
+# ------------------ Compiled schedules ------------------
+@dataclass(frozen=True)
+class DoctorSchedule:
+    name: str
+    timings: str
+    weekday_mask: int  # bit d set = works on weekday d (Monday = 0), any segment
+    ranges: Tuple[Tuple[int, int, int], ...]  # (weekday_mask, start, end) per segment
+    labels: Tuple[Tuple[str, str], ...]  # original "10 AM", "2 PM" text per segment
+
+    def works_on(self, day: date) -> bool:
+        return bool(self.weekday_mask >> day.weekday() & 1)
+
+    def window_for(self, day: date, minute: int) -> Optional[Tuple[int, int]]:
+        """(start, end) of the working segment covering day/minute, if any (end excluded)."""
+        bit = 1 << day.weekday()
+        for mask, start, end in self.ranges:
+            if mask & bit and start <= minute < end:
+                return start, end
+        return None
+
+    def slot_starts(self, day: date, slot_minutes: int) -> List[int]:
+        """Start minute of every whole slot the doctor works on `day`, ascending."""
+        bit = 1 << day.weekday()
+        starts: List[int] = []
+        for mask, start, end in self.ranges:
+            if mask & bit:
+                starts.extend(range(start, end - slot_minutes + 1, slot_minutes))
+        return sorted(starts)
+
+
+def _day_mask(days: str) -> int:
+    match = _DAYS_RE.fullmatch(days.strip())
+    if not match:
+        raise ValueError(f"Unrecognised day range '{days}'")
+    first = DAY_INDEX[match.group(1).lower()]
+    last = DAY_INDEX[(match.group(2) or match.group(1)).lower()]
+    mask = 0
+    day = first
+    while True:  # walks across the week boundary for ranges like Fri–Mon
+        mask |= 1 << day
+        if day == last:
+            return mask
+        day = (day + 1) % 7
+
+
+def compile_timings(name: str, timings: str) -> DoctorSchedule:
+    """Compile "Mon–Fri: 10 AM – 2 PM" (optionally several ';'-separated segments)."""
+    weekday_mask = 0
+    ranges: List[Tuple[int, int, int]] = []
+    labels: List[Tuple[str, str]] = []
+    for segment in _SEGMENT_RE.finditer(timings):
+        mask = _day_mask(segment.group("days"))
+        weekday_mask |= mask
+        start_label, end_label = segment.group("start").strip(), segment.group("end").strip()
+        ranges.append((mask, parse_time_fast(start_label), parse_time_fast(end_label)))
+        labels.append((start_label, end_label))
+    if not ranges:
+        raise ValueError(f"Could not parse timings for {name}: '{timings}'")
+    return DoctorSchedule(name, timings, weekday_mask, tuple(ranges), tuple(labels))
+
+
+class ScheduleCalendar:
+    """All doctors' schedules, compiled once at import time."""
+
+    def __init__(self, doctors: Dict[str, dict]) -> None:
+        self.schedules: Dict[str, DoctorSchedule] = {}
+        self.by_specialization: Dict[str, List[str]] = {}
+        for name, info in doctors.items():
+            try:
+                self.schedules[name] = compile_timings(name, info["timings"])
+            except ValueError as e:
+                logger.error(str(e))
+                continue
+            specialization = info.get("specialization", "").casefold()
+            self.by_specialization.setdefault(specialization, []).append(name)
+
+    def get(self, doctor_name: str) -> Optional[DoctorSchedule]:
+        return self.schedules.get(doctor_name)
+
+    def doctors_for(self, specialization: str) -> List[str]:
+        return list(self.by_specialization.get(specialization.casefold(), []))
+
+    def resolve_time(self, doctor_name: str, day: date, time_str: str) -> Optional[int]:
+        """
+        Minute for `time_str` on `day`: the reading inside the doctor's hours when
+        it is ambiguous ("10" for a 9 AM–5 PM doctor is 10 AM), else the most likely one.
+        """
+        candidates = time_candidates(time_str)
+        if not candidates:
+            return None
+        schedule = self.schedules.get(doctor_name)
+        if schedule is not None:
+            for minute in candidates:
+                if schedule.window_for(day, minute) is not None:
+                    return minute
+        return candidates[0]
+
+    def check(self, doctor_name: str, day: date, time_str: str) -> Tuple[bool, str]:
+        """(True, message) if the doctor works at that day/time, else (False, reason)."""
+        schedule = self.schedules.get(doctor_name)
+        if schedule is None:
+            return False, f"Doctor '{doctor_name}' not found."
+        if not schedule.works_on(day):
+            return False, f"{doctor_name} is only available {schedule.timings}."
+        minute = self.resolve_time(doctor_name, day, time_str)
+        if minute is None:
+            return False, f"Could not understand the time '{time_str}'."
+        if schedule.window_for(day, minute) is None:
+            hours = ", ".join(f"{start} and {end}" for start, end in schedule.labels)
+            return False, f"{doctor_name} is available only between {hours}."
+        return True, f"{doctor_name} is available at {format_minutes(minute)} on that day."
+
+
+# ------------------ Slot booking ------------------
+class Slot(NamedTuple):
+    doctor: str
+    day: date
+    minute: int
+
+    @property
+    def time_str(self) -> str:
+        return format_minutes(self.minute)
+
+
+class AppointmentBook:
+    """Fixed-length appointment slots with an occupancy bitmap per (doctor, date)."""
+
+    def __init__(
+        self, calendar: ScheduleCalendar, slot_minutes: int = APPOINTMENT_SLOT_MINUTES
+    ) -> None:
+        self.calendar = calendar
+        self.slot_minutes = slot_minutes
+        self._taken: Dict[Tuple[str, date], int] = {}
+        self._lock = threading.Lock()
+
+    def _bit(self, minute: int) -> int:
+        return 1 << (minute // self.slot_minutes)
+
+    def slot_for(self, doctor_name: str, day: date, minute: int) -> Optional[int]:
+        """Start of the working slot containing `minute`, or None outside working hours."""
+        schedule = self.calendar.get(doctor_name)
+        if schedule is None:
+            return None
+        for start in reversed(schedule.slot_starts(day, self.slot_minutes)):
+            if start <= minute < start + self.slot_minutes:
+                return start
+        return None
+
+    def is_free(self, doctor_name: str, day: date, minute: int) -> bool:
+        return not self._taken.get((doctor_name, day), 0) & self._bit(minute)
+
+    def reserve(self, doctor_name: str, day: date, minute: int) -> bool:
+        """Atomically take the slot starting at `minute`; False if already taken."""
+        key, bit = (doctor_name, day), self._bit(minute)
+        with self._lock:
+            taken = self._taken.get(key, 0)
+            if taken & bit:
+                return False
+            self._taken[key] = taken | bit
+            return True
+
+    def release(self, doctor_name: str, day: date, minute: int) -> None:
+        key = (doctor_name, day)
+        with self._lock:
+            if key in self._taken:
+                self._taken[key] &= ~self._bit(minute)
+
+    def _first_free(self, doctor_name: str, day: date, not_before: int) -> Optional[int]:
+        schedule = self.calendar.get(doctor_name)
+        if schedule is None or not schedule.works_on(day):
+            return None
+        taken = self._taken.get((doctor_name, day), 0)
+        for start in schedule.slot_starts(day, self.slot_minutes):
+            if start >= not_before and not taken & self._bit(start):
+                return start
+        return None
+
+    def find_next_available(
+        self,
+        specialization: Optional[str] = None,
+        after: Optional[datetime] = None,
+        doctors: Optional[Iterable[str]] = None,
+        horizon_days: int = SEARCH_HORIZON_DAYS,
+    ) -> Optional[Slot]:
+        """
+        Earliest free slot at or after `after` among `doctors` (or every doctor with
+        `specialization`), looking at most `horizon_days` ahead. Ties go to the
+        doctor listed first.
+        """
+        after = after or datetime.now()
+        names = list(doctors) if doctors is not None else self.calendar.doctors_for(specialization or "")
+        if not names:
+            return None
+        first_minute = after.hour * 60 + after.minute
+        for offset in range(horizon_days + 1):
+            day = after.date() + timedelta(days=offset)
+            not_before = first_minute if offset == 0 else 0
+            best: Optional[Slot] = None
+            for name in names:
+                start = self._first_free(name, day, not_before)
+                if start is not None and (best is None or start < best.minute):
+                    best = Slot(name, day, start)
+            if best is not None:
+                return best
+        return None
@@ -0,0 +1,205 @@
+# flight_connections.py
+"""
+Connecting itineraries for routes without a direct flight.
+
+Legs form a time-expanded graph: each departure is a node at (airport, local
+minute), and a leg can follow another when it leaves the arrival airport at
+least the minimum connection time later (and within a maximum layover). A
+priority queue ordered by total elapsed time pops itineraries fastest-first,
+so the search stops as soon as it has enough answers. Departures per airport
+are sorted by time, so each expansion is a bisect plus a short slice.
+Results are cached per (origin, destination, date).
+"""
+
+import bisect
+import heapq
+import logging
+import re
+from datetime import date
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from flight_search import parse_fare
+
+logger = logging.getLogger("flight-connections")
+
+MINUTES_PER_DAY = 24 * 60
+DEFAULT_MIN_CONNECTION_MINUTES = 60
+MAX_LAYOVER_MINUTES = 12 * 60
+MAX_STOPS = 2
+DEFAULT_OPTIONS = 3
+
+_DURATION_RE = re.compile(r"(?:(\d+)\s*h)?\s*(?:(\d+)\s*m)?")
+
+
+class Itinerary(NamedTuple):
+    legs: Tuple[dict, ...]
+    elapsed_minutes: int
+    fare: int
+
+    @property
+    def stops(self) -> int:
+        return len(self.legs) - 1
+
+
+class _Leg(NamedTuple):
+    origin: str
+    destination: str
+    depart: int  # minutes since epoch day, local time at origin
+    arrive: int  # minutes since epoch day, local time at destination
+    duration: int
+    index: int
+
+
+def _clock(hhmm: str) -> int:
+    hour, minute = map(int, hhmm.split(":"))
+    return hour * 60 + minute
+
+
+def _duration(text: str) -> int:
+    match = _DURATION_RE.fullmatch((text or "").strip())
+    if not match or not any(match.groups()):
+        return 0
+    return int(match.group(1) or 0) * 60 + int(match.group(2) or 0)
+
+
+def format_duration(minutes: int) -> str:
+    return f"{minutes // 60}h {minutes % 60:02d}m"
+
+
+class ConnectionFinder:
+    """One/two-stop itinerary search over a flight schedule."""
+
+    def __init__(
+        self,
+        flights: Iterable[dict],
+        min_connection: Optional[Dict[str, int]] = None,
+        default_min_connection: int = DEFAULT_MIN_CONNECTION_MINUTES,
+        max_layover: int = MAX_LAYOVER_MINUTES,
+    ) -> None:
+        self.flights: List[dict] = list(flights)
+        self.min_connection = {k.upper(): v for k, v in (min_connection or {}).items()}
+        self.default_min_connection = default_min_connection
+        self.max_layover = max_layover
+
+        self._legs: List[_Leg] = []
+        departures: Dict[str, List[_Leg]] = {}
+        self._feeders: Dict[str, Set[str]] = {}  # airport -> airports with a leg into it
+        for i, flight in enumerate(self.flights):
+            leg = self._to_leg(flight, i)
+            if leg is None:
+                continue
+            self._legs.append(leg)
+            departures.setdefault(leg.origin, []).append(leg)
+            self._feeders.setdefault(leg.destination, set()).add(leg.origin)
+
+        self._departures: Dict[str, List[_Leg]] = {}
+        self._departure_times: Dict[str, List[int]] = {}
+        for airport, legs in departures.items():
+            legs.sort(key=lambda leg: leg.depart)
+            self._departures[airport] = legs
+            self._departure_times[airport] = [leg.depart for leg in legs]
+        self._fares = [parse_fare(f.get("fare", "")) for f in self.flights]
+        self._cache: Dict[Tuple[str, str, date, int, int], List[Itinerary]] = {}
+
+    @staticmethod
+    def _to_leg(flight: dict, index: int) -> Optional[_Leg]:
+        try:
+            day = date.fromisoformat(flight["date"]).toordinal()
+            depart_clock, arrive_clock = _clock(flight["departure"]), _clock(flight["arrival"])
+        except (KeyError, ValueError):
+            return None
+        duration = _duration(flight.get("duration", ""))
+        if not duration:
+            duration = (arrive_clock - depart_clock) % MINUTES_PER_DAY
+        # clock times are local, so the arrival day is the one that best fits the
+        # flight time; anything else is the timezone difference (always < 12h)
+        day_offset = round((depart_clock + duration - arrive_clock) / MINUTES_PER_DAY)
+        return _Leg(
+            flight["origin"].upper(),
+            flight["destination"].upper(),
+            day * MINUTES_PER_DAY + depart_clock,
+            (day + day_offset) * MINUTES_PER_DAY + arrive_clock,
+            duration,
+            index,
+        )
+
+    def invalidate(self) -> None:
+        self._cache.clear()
+
+    def _next_legs(self, leg: _Leg) -> List[_Leg]:
+        """Departures from leg's arrival airport inside the connection window."""
+        airport = leg.destination
+        times = self._departure_times.get(airport)
+        if not times:
+            return []
+        earliest = leg.arrive + self.min_connection.get(airport, self.default_min_connection)
+        lo = bisect.bisect_left(times, earliest)
+        hi = bisect.bisect_right(times, leg.arrive + self.max_layover, lo)
+        return self._departures[airport][lo:hi]
+
+    def find(
+        self,
+        origin: str,
+        destination: str,
+        day: date,
+        max_stops: int = MAX_STOPS,
+        limit: int = DEFAULT_OPTIONS,
+    ) -> List[Itinerary]:
+        """Fastest itineraries (by total elapsed time) leaving `origin` on `day`."""
+        origin, destination = origin.upper(), destination.upper()
+        key = (origin, destination, day, max_stops, limit)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        feeders = self._feeders.get(destination)
+        if not feeders:
+            self._cache[key] = []
+            return []
+
+        start = day.toordinal() * MINUTES_PER_DAY
+        times = self._departure_times.get(origin, [])
+        lo = bisect.bisect_left(times, start)
+        hi = bisect.bisect_left(times, start + MINUTES_PER_DAY)
+
+        # (elapsed, tiebreak, path of legs)
+        queue: List[Tuple[int, int, Tuple[_Leg, ...]]] = []
+        counter = 0
+        for leg in self._departures.get(origin, [])[lo:hi]:
+            heapq.heappush(queue, (leg.duration, counter, (leg,)))
+            counter += 1
+
+        found: List[Itinerary] = []
+        expanded = 0
+        while queue and len(found) < limit:
+            elapsed, _, path = heapq.heappop(queue)
+            last = path[-1]
+            if last.destination == destination:
+                if len(path) > 1:  # direct flights are search_flights' job
+                    found.append(self._itinerary(path, elapsed))
+                continue
+            if len(path) > max_stops:
+                continue
+            expanded += 1
+            visited = {origin, *(leg.destination for leg in path)}
+            hops_left = max_stops + 1 - len(path)  # legs still allowed after this one
+            for nxt in self._next_legs(last):
+                if nxt.destination != destination:
+                    if hops_left == 1 or nxt.destination in visited:
+                        continue  # last hop must land at the destination
+                    if hops_left == 2 and nxt.destination not in feeders:
+                        continue  # no way to reach the destination in one more leg
+                layover = nxt.depart - last.arrive
+                heapq.heappush(queue, (elapsed + layover + nxt.duration, counter, path + (nxt,)))
+                counter += 1
+
+        logger.debug(f"Connections {origin}->{destination} {day}: {len(found)} found, {expanded} expanded")
+        self._cache[key] = found
+        return found
+
+    def _itinerary(self, path: Tuple[_Leg, ...], elapsed: int) -> Itinerary:
+        return Itinerary(
+            legs=tuple(self.flights[leg.index] for leg in path),
+            elapsed_minutes=elapsed,
+            fare=sum(self._fares[leg.index] for leg in path),
+        )
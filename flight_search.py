@@ -0,0 +1,227 @@
+# flight_search.py
+"""
+Flexible-date flight search.
+
+Travel-date phrases ("tomorrow", "next Monday", "any day next week", "Oct 20",
+"20th October", "next month") are normalized once per request into a date
+window without dateparser; only unusual phrasing falls back to it, and if it
+is missing or fails the phrase is reported as unparseable. Flights are kept in
+per-route arrays sorted by date, so a window (optionally widened by +/-N days)
+is two bisects per route, and results come back ranked by date or by fare.
+"""
+
+import bisect
+import calendar
+import logging
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger("flight-search")
+
+MAX_FLEX_DAYS = 7
+DEFAULT_RESULT_LIMIT = 5
+
+_WEEKDAYS = {name.lower(): i for i, name in enumerate(calendar.day_name)}
+_WEEKDAYS.update({name.lower(): i for i, name in enumerate(calendar.day_abbr)})
+_MONTHS = {name.lower(): i for i, name in enumerate(calendar.month_name) if name}
+_MONTHS.update({name.lower(): i for i, name in enumerate(calendar.month_abbr) if name})
+_MONTHS["sept"] = 9
+_DAY = r"(\d{1,2})(?:st|nd|rd|th)?"
+_MONTH = r"([a-z]+)\.?"
+_MONTH_DAY_RES = (
+    re.compile(rf"^{_MONTH} {_DAY}(?:,? (\d{{4}}))?$"),  # "oct 20", "october 20th, 2026"
+    re.compile(rf"^{_DAY} {_MONTH}(?:,? (\d{{4}}))?$"),  # "20 oct", "20th of october"
+)
+_IN_DAYS_RE = re.compile(r"\bin (\d{1,2}) days?\b")
+_NOISE_RE = re.compile(r"\b(any ?day|anytime|any time|sometime|on|the|of|during|flights?)\b")
+
+
+class DateWindow(NamedTuple):
+    start: date
+    end: date  # inclusive
+
+    @property
+    def exact(self) -> bool:
+        return self.start == self.end
+
+
+# ------------------ Date phrases ------------------
+def _week_of(day: date) -> DateWindow:
+    monday = day - timedelta(days=day.weekday())
+    return DateWindow(monday, monday + timedelta(days=6))
+
+
+def _month_window(year: int, month: int) -> DateWindow:
+    return DateWindow(date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1]))
+
+
+def _month_day(phrase: str, today: date) -> Optional[date]:
+    """"Oct 20" / "20th October" / "October 20, 2026"; without a year, the next such date."""
+    for pattern in _MONTH_DAY_RES:
+        match = pattern.match(phrase)
+        if not match:
+            continue
+        groups = match.groups()
+        month_name, day_text = (groups[0], groups[1]) if pattern is _MONTH_DAY_RES[0] else (groups[1], groups[0])
+        month = _MONTHS.get(month_name)
+        if month is None:
+            return None
+        year = int(groups[2]) if groups[2] else today.year
+        try:
+            day = date(year, month, int(day_text))
+            if not groups[2] and day < today:
+                day = date(year + 1, month, int(day_text))
+        except ValueError:  # "Feb 30", or Feb 29 outside a leap year
+            return None
+        return day
+    return None
+
+
+@lru_cache(maxsize=1024)
+def parse_travel_dates(text: str, today: date) -> Optional[DateWindow]:
+    """Date window for a travel-date phrase relative to `today`, or None if unparseable."""
+    phrase = _NOISE_RE.sub(" ", (text or "").strip().lower())
+    phrase = re.sub(r"\s+", " ", phrase).strip()
+    if not phrase:
+        return None
+
+    try:
+        day = date.fromisoformat(phrase)
+        return DateWindow(day, day)
+    except ValueError:
+        pass
+
+    fixed = {"today": 0, "tonight": 0, "tomorrow": 1, "day after tomorrow": 2}
+    if phrase in fixed:
+        day = today + timedelta(days=fixed[phrase])
+        return DateWindow(day, day)
+
+    match = _IN_DAYS_RE.search(phrase)
+    if match:
+        day = today + timedelta(days=int(match.group(1)))
+        return DateWindow(day, day)
+
+    if phrase in ("this week", "week"):
+        return DateWindow(today, _week_of(today).end)
+    if phrase == "next week":
+        return _week_of(today + timedelta(days=7))
+    if phrase in ("this weekend", "weekend"):
+        saturday = _week_of(today).start + timedelta(days=5)
+        return DateWindow(max(today, saturday), saturday + timedelta(days=1))
+    if phrase == "next weekend":
+        saturday = _week_of(today + timedelta(days=7)).start + timedelta(days=5)
+        return DateWindow(saturday, saturday + timedelta(days=1))
+    if phrase in ("this month", "month"):
+        return DateWindow(today, _month_window(today.year, today.month).end)
+    if phrase == "next month":
+        return _month_window(today.year + today.month // 12, today.month % 12 + 1)
+    if phrase in _MONTHS or (phrase.startswith("in ") and phrase[3:] in _MONTHS):
+        month = _MONTHS[phrase.split()[-1]]
+        year = today.year + (month < today.month)
+        window = _month_window(year, month)
+        return DateWindow(max(today, window.start), window.end)
+
+    day = _month_day(phrase, today)
+    if day is not None:
+        return DateWindow(day, day)
+
+    tokens = phrase.split()
+    if tokens and tokens[-1] in _WEEKDAYS and tokens[:-1] in ([], ["this"], ["next"]):
+        weekday = _WEEKDAYS[tokens[-1]]
+        if tokens[0] == "next":  # "next Monday" = Monday of next week
+            day = _week_of(today + timedelta(days=7)).start + timedelta(days=weekday)
+        else:  # "Monday" = the coming Monday (a week out if today is Monday)
+            day = today + timedelta(days=(weekday - today.weekday()) % 7 or 7)
+        return DateWindow(day, day)
+
+    try:
+        import dateparser  # slow to import; only needed for free-form dates
+    except ImportError:
+        logger.warning(f"dateparser is not installed; could not parse travel date '{text}'")
+        return None
+    try:
+        parsed = dateparser.parse(
+            phrase,
+            settings={"PREFER_DATES_FROM": "future", "RELATIVE_BASE": datetime(today.year, today.month, today.day)},
+        )
+    except (ValueError, TypeError, OverflowError) as e:
+        logger.warning(f"Could not parse travel date '{text}': {e}")
+        return None
+    if parsed is None:
+        return None
+    return DateWindow(parsed.date(), parsed.date())
+
+
+def parse_fare(fare: str) -> int:
+    """'PKR 45,000' -> 45000."""
+    digits = re.sub(r"[^\d]", "", fare or "")
+    return int(digits) if digits else 0
+
+
+# ------------------ Route calendars ------------------
+class FlightCalendar:
+    """Per-route flight lists sorted by (date, departure) with bisect window lookups."""
+
+    def __init__(self, flights: Iterable[dict]) -> None:
+        self.flights: List[dict] = list(flights)
+        routes: Dict[Tuple[str, str], List[Tuple[str, str, int]]] = {}
+        for i, flight in enumerate(self.flights):
+            key = (flight["origin"].upper(), flight["destination"].upper())
+            routes.setdefault(key, []).append((flight["date"], flight["departure"], i))
+
+        self._routes: Dict[Tuple[str, str], List[int]] = {}
+        self._dates: Dict[Tuple[str, str], List[str]] = {}
+        self._by_airport: Dict[str, List[Tuple[str, str]]] = {}
+        for key, rows in routes.items():
+            rows.sort()
+            self._routes[key] = [i for _, _, i in rows]
+            self._dates[key] = [d for d, _, _ in rows]
+            for airport in set(key):
+                self._by_airport.setdefault(airport, []).append(key)
+        self._fares = [parse_fare(f.get("fare", "")) for f in self.flights]
+
+    def _route_keys(
+        self, origin: Optional[str], destination: Optional[str], either: Optional[str]
+    ) -> List[Tuple[str, str]]:
+        if origin and destination:
+            key = (origin.upper(), destination.upper())
+            return [key] if key in self._routes else []
+        if either:
+            return self._by_airport.get(either.upper(), [])
+        if origin:
+            return [k for k in self._by_airport.get(origin.upper(), []) if k[0] == origin.upper()]
+        if destination:
+            return [k for k in self._by_airport.get(destination.upper(), []) if k[1] == destination.upper()]
+        return list(self._routes)
+
+    def search(
+        self,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+        window: Optional[DateWindow] = None,
+        flex_days: int = 0,
+        sort_by: str = "date",
+        either: Optional[str] = None,
+    ) -> List[dict]:
+        """
+        Flights on the matching routes inside `window` widened by `flex_days` on
+        each side (no window: all dates), ranked by date or by fare.
+        """
+        flex = timedelta(days=max(0, min(flex_days, MAX_FLEX_DAYS)))
+        low = str(window.start - flex) if window else None
+        high = str(window.end + flex) if window else None
+
+        found: List[int] = []
+        for key in self._route_keys(origin, destination, either):
+            dates, ids = self._dates[key], self._routes[key]
+            lo = bisect.bisect_left(dates, low) if low else 0
+            hi = bisect.bisect_right(dates, high) if high else len(dates)
+            found.extend(ids[lo:hi])
+
+        if sort_by == "fare":
+            found.sort(key=lambda i: (self._fares[i], self.flights[i]["date"], self.flights[i]["departure"]))
+        else:
+            found.sort(key=lambda i: (self.flights[i]["date"], self.flights[i]["departure"], self._fares[i]))
+        return [self.flights[i] for i in found]
@@ -0,0 +1,151 @@
+# flight_status.py
+"""
+Live flight status board.
+
+Operations pushes status changes as lines, either JSON
+({"flight", "date", "ts", "status", "gate"}) or CSV (flight,date,ts,status,gate),
+through a tailed file or a TCP socket. The board keeps only the latest status
+per (flight, date), indexed by flight number, so a status lookup is two dict
+hits. Timestamps are normalized to UTC on parsing (`line_feed.normalize_ts`),
+updates older than the one already applied are ignored, and every batch
+publishes the flights whose status or gate actually changed to the sessions
+watching them.
+"""
+
+import json
+import logging
+import threading
+from datetime import date
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from line_feed import LineFeedIngestor, StatusNotifier, normalize_ts
+
+logger = logging.getLogger("flight-status")
+
+
+class StatusUpdate(NamedTuple):
+    flight_number: str
+    date: str
+    ts: str
+    status: str
+    gate: Optional[str] = None
+
+
+def watch_key(flight_number: str, day: str) -> str:
+    """Notifier key for one flight on one date."""
+    return f"{flight_number.upper()}|{day}"
+
+
+def parse_status_line(line: str) -> Optional[StatusUpdate]:
+    """One feed line -> StatusUpdate, or None for blank/malformed lines or timestamps."""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        if line[0] == "{":
+            raw = json.loads(line)
+            number, day, ts, status, gate = raw["flight"], raw["date"], raw["ts"], raw["status"], raw.get("gate")
+        else:
+            parts = [p.strip() for p in line.split(",", 4)]
+            number, day, ts, status = parts[0], parts[1], parts[2], parts[3]
+            gate = parts[4] if len(parts) > 4 and parts[4] else None
+        date.fromisoformat(day)
+    except (ValueError, KeyError, IndexError, TypeError):
+        return None
+    ts = normalize_ts(ts)
+    if not number or ts is None or not status:
+        return None
+    return StatusUpdate(number.upper(), day, ts, status, gate)
+
+
+# ------------------ Status board ------------------
+class FlightStatusBoard:
+    """Latest status per (flight, date), seeded from the schedule."""
+
+    def __init__(self, flights: Iterable[dict]) -> None:
+        self._latest: Dict[str, Dict[str, dict]] = {}  # flight number -> date -> projection
+        self._lock = threading.Lock()
+        for flight in flights:
+            number = flight["flight_number"].upper()
+            self._latest.setdefault(number, {})[flight["date"]] = {
+                "flight_number": number,
+                "date": flight["date"],
+                "status": flight.get("status", "Scheduled"),
+                "gate": flight.get("gate"),
+                "updated_at": "",
+            }
+
+    def get(self, flight_number: str, day: Optional[str] = None) -> Optional[dict]:
+        """
+        Status of a flight on `day`. Without a date, the next scheduled date from
+        today (or the latest one, if every date is in the past).
+        """
+        dates = self._latest.get((flight_number or "").upper())
+        if not dates:
+            return None
+        if day is None:
+            today = str(date.today())
+            upcoming = [d for d in dates if d >= today]
+            day = min(upcoming) if upcoming else max(dates)
+        projection = dates.get(day)
+        return dict(projection) if projection else None
+
+    def apply_batch(self, updates: List[StatusUpdate]) -> Dict[str, dict]:
+        """Apply updates in order; returns {watch_key: projection} for flights that changed."""
+        changed: Dict[str, dict] = {}
+        with self._lock:
+            for update in updates:
+                current = self._latest.setdefault(update.flight_number, {}).get(update.date)
+                if current is None:
+                    current = {"flight_number": update.flight_number, "date": update.date,
+                               "status": None, "gate": None, "updated_at": ""}
+                    self._latest[update.flight_number][update.date] = current
+                if update.ts < current["updated_at"]:
+                    continue  # late or replayed update
+                current["updated_at"] = update.ts
+                gate = update.gate or current["gate"]
+                if update.status == current["status"] and gate == current["gate"]:
+                    continue
+                current["status"], current["gate"] = update.status, gate
+                changed[watch_key(update.flight_number, update.date)] = dict(current)
+        return changed
+
+
+# ------------------ Ingestion ------------------
+class FlightStatusIngestor(LineFeedIngestor):
+    """Applies a flight status feed to the board in batches and publishes changes."""
+
+    feed_name = "flight status feed"
+
+    def __init__(
+        self,
+        board: FlightStatusBoard,
+        notifier: Optional[StatusNotifier] = None,
+        batch_size: int = 500,
+    ) -> None:
+        self.board = board
+        self.notifier = notifier
+        self.batch_size = batch_size
+
+    def ingest_lines(self, lines: Iterable[str]) -> int:
+        """Apply every update in `lines`; returns how many flights changed."""
+        changed_total = 0
+        batch: List[StatusUpdate] = []
+        for line in lines:
+            update = parse_status_line(line)
+            if update is not None:
+                batch.append(update)
+            if len(batch) >= self.batch_size:
+                changed_total += self._flush(batch)
+                batch = []
+        if batch:
+            changed_total += self._flush(batch)
+        return changed_total
+
+    def _flush(self, batch: List[StatusUpdate]) -> int:
+        changed = self.board.apply_batch(batch)
+        if changed:
+            logger.info(f"Flight status changed: {', '.join(changed)}")
+            if self.notifier:
+                self.notifier.publish(changed)
+        return len(changed)
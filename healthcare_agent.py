@@ -1,15 +1,12 @@
 import os
-import random
 import smtplib
 import logging
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from pydantic import BaseModel, EmailStr, Field, field_validator
-from datetime import date as dt_date, datetime
-import dateparser
+from datetime import date as dt_date, datetime, timedelta
 import re
-from typing import Optional
-import dateparser
+from typing import Optional, Union
 from livekit.agents import (
     Agent,
     RunContext,
@@ -29,6 +26,11 @@ from livekit.agents import BackgroundAudioPlayer, AudioConfig, BuiltinAudioClip
 from datetime import datetime
 import re
 
+from doctor_directory import DoctorDirectory
+from doctor_schedule import AppointmentBook, ScheduleCalendar, format_minutes, parse_time
+from ids import new_id, normalize_id
+from tool_results import AppointmentResult, LabBookingResult, ToolError, token_budget
+
 logger = logging.getLogger("hospital-voice-agent")
 # logging.basicConfig(level=logging.INFO)
 
@@ -141,6 +143,20 @@ DOCTORS = {
     },
 }
 
+# Everyday words callers use for each specialization
+SPECIALIZATION_SYNONYMS = {
+    "Cardiologist": ["cardiology", "cardiac", "heart", "heart doctor", "heart specialist", "دل"],
+    "Dermatologist": ["dermatology", "skin", "skin doctor", "skin specialist", "hair", "acne", "جلد"],
+    "Pediatrician": ["paediatrician", "pediatrics", "child", "children", "kids", "child specialist", "بچوں"],
+    "Orthopedic Surgeon": ["orthopedic", "orthopaedic", "ortho", "bone", "bones", "joint", "fracture", "back pain", "ہڈی"],
+    "Gynecologist": ["gynaecologist", "gynecology", "gynae", "women", "pregnancy", "lady doctor"],
+    "Neurologist": ["neurology", "neuro", "brain", "nerves", "migraine", "headache"],
+    "Psychiatrist": ["psychiatry", "mental health", "depression", "anxiety", "therapist"],
+    "ENT Specialist": ["ent", "ear", "nose", "throat", "ear nose throat", "sinus"],
+    "Ophthalmologist": ["ophthalmology", "eye", "eyes", "eye doctor", "eye specialist", "vision", "آنکھ"],
+    "General Physician": ["gp", "general", "physician", "family doctor", "fever", "checkup", "general checkup"],
+}
+
 from datetime import date
 
 APPOINTMENTS = {
@@ -311,9 +327,13 @@ class AppointmentRequest(BaseModel):
 
     @field_validator("doctor_name")
     def validate_doctor_exists(cls, value):
-        if value not in DOCTORS:
-            raise ValueError(f"Doctor '{value}' is not available at this hospital.")
-        return value
+        # Callers say "Dr. Fatima"; store the full name the calendar and book use
+        doctor = DOCTOR_DIRECTORY.resolve_name(value)
+        if doctor is None:
+            raise ValueError(
+                f"Doctor '{value}' is not available at this hospital, or the name matches more than one doctor."
+            )
+        return doctor
 
     @field_validator("date")
     def validate_future_date(cls, value):
@@ -335,6 +355,7 @@ class CancelRequest(BaseModel):
 
     @field_validator("appointment_id")
     def validate_id_format(cls, v):
+        v = normalize_id(v)
         if not v.startswith("APT"):
             raise ValueError("Invalid appointment ID format.")
         if v not in APPOINTMENTS:
@@ -344,7 +365,8 @@ class CancelRequest(BaseModel):
 
 # ----------------- Helper Functions ---------------
 
-import calendar
+DOCTOR_CALENDAR = ScheduleCalendar(DOCTORS)
+DOCTOR_DIRECTORY = DoctorDirectory(DOCTORS, SPECIALIZATION_SYNONYMS)
 
 
 def is_doctor_available(
@@ -354,47 +376,48 @@ def is_doctor_available(
     Checks if the doctor is available on the requested day and time.
     Returns (True, message) if valid, else (False, reason).
     """
-    doc_info = DOCTORS.get(doctor_name)
-    if not doc_info:
-        return False, f"Doctor '{doctor_name}' not found."
-
-    timing_str = doc_info["timings"]  # e.g., "Mon–Fri: 10 AM – 2 PM"
-    match = re.match(
-        r"([A-Za-z]{3})[–-]([A-Za-z]{3}):\s*(\d{1,2}\s*[AP]M)\s*[–-]\s*(\d{1,2}\s*[AP]M)",
-        timing_str,
-    )
-    if not match:
-        return False, f"Could not parse timings for {doctor_name}."
-
-    start_day, end_day, start_time_str, end_time_str = match.groups()
-
-    # Convert to comparable objects
-    weekdays = list(calendar.day_abbr)  # ['Mon', 'Tue', ...]
-    start_index = weekdays.index(start_day)
-    end_index = weekdays.index(end_day)
-    appointment_day = appointment_date.weekday()  # Monday = 0
-
-    # Handle week wrap (e.g., Fri–Mon)
-    if start_index <= end_index:
-        day_in_range = start_index <= appointment_day <= end_index
-    else:
-        day_in_range = appointment_day >= start_index or appointment_day <= end_index
-
-    if not day_in_range:
-        return False, f"{doctor_name} is only available {timing_str}."
-
-    # Parse times to compare
-    start_time = datetime.strptime(start_time_str, "%I %p").time()
-    end_time = datetime.strptime(end_time_str, "%I %p").time()
-    requested_time = dateparser.parse(appointment_time_str).time()
-
-    if not (start_time <= requested_time <= end_time):
-        return (
-            False,
-            f"{doctor_name} is available only between {start_time_str} and {end_time_str}.",
+    return DOCTOR_CALENDAR.check(doctor_name, appointment_date, appointment_time_str)
+
+
+APPOINTMENT_BOOK = AppointmentBook(DOCTOR_CALENDAR)
+
+
+def _appointment_slot(appointment: dict) -> Optional[tuple]:
+    """(doctor, date, minute) of a stored appointment, or None if it can't be placed."""
+    minute = parse_time(appointment.get("time") or "")
+    if minute is None:
+        return None
+    return appointment["doctor"], dt_date.fromisoformat(appointment["date"]), minute
+
+
+for _appointment in APPOINTMENTS.values():
+    _slot = _appointment_slot(_appointment)
+    if _slot:
+        APPOINTMENT_BOOK.reserve(*_slot)
+
+
+def suggest_alternative(doctor_name: str, day: dt_date, minute: Optional[int]) -> str:
+    """Next free slot with the same doctor, plus an earlier one with a colleague if any."""
+    if minute is not None:
+        # start from the slot the requested time falls in, not the one after it
+        slot_start = APPOINTMENT_BOOK.slot_for(doctor_name, day, minute)
+        minute = minute if slot_start is None else slot_start
+    after = datetime.combine(day, datetime.min.time()) + timedelta(minutes=minute or 0)
+    after = max(after, datetime.now())
+    same = APPOINTMENT_BOOK.find_next_available(after=after, doctors=[doctor_name])
+    specialization = DOCTORS.get(doctor_name, {}).get("specialization", "")
+    any_doctor = APPOINTMENT_BOOK.find_next_available(specialization, after=after)
+
+    parts = []
+    if same:
+        parts.append(f"The next available slot with {doctor_name} is {same.day} at {same.time_str}.")
+    if any_doctor and any_doctor.doctor != doctor_name and (
+        same is None or (any_doctor.day, any_doctor.minute) < (same.day, same.minute)
+    ):
+        parts.append(
+            f"{any_doctor.doctor} ({specialization}) is available earlier, on {any_doctor.day} at {any_doctor.time_str}."
         )
-
-    return True, f"{doctor_name} is available at {appointment_time_str} on that day."
+    return " ".join(parts) or "There are no free slots in the next two weeks."
 
 
 # ------------------ HOSPITAL AGENT ------------------
@@ -436,54 +459,50 @@ class HospitalAgent(Agent):
 
     # -------- Get Doctor Details --------
     @function_tool()
-    async def get_doctor_details(self, doctor_name: str, context: RunContext) -> str:
+    async def get_doctor_details(self, doctor_name: str, context: RunContext) -> dict:
+        """
+        Looks up doctors by full or partial name ("Fatima", "Dr. Raza"), or by
+        specialization / need ("cardiologist", "skin doctor", "eye specialist").
+        """
         logger.info(f"🔍 Looking up details for doctor: {doctor_name}")
 
-        # Find all matching doctors (case-insensitive partial match)
-        matches = [
-            name for name in DOCTORS.keys() if doctor_name.lower() in name.lower()
-        ]
-
+        matches = DOCTOR_DIRECTORY.search(doctor_name)
         if not matches:
-            return f"❌ Sorry, no doctor found matching '{doctor_name}'."
-
-        if len(matches) == 1:
-            # Only one match → return full details
-            doc = DOCTORS[matches[0]]
-            return f"{matches[0]} ({doc['specialization']}), Timings: {doc['timings']}"
-
-        # Multiple matches → list them
-        match_details = "\n".join(
-            f"{name} ({DOCTORS[name]['specialization']}), Timings: {DOCTORS[name]['timings']}"
-            for name in matches
-        )
-        return (
-            f"Multiple doctors found matching '{doctor_name}':\n{match_details}\n"
-            "Please specify the full name."
-        )
+            return {"error": f"No doctor found matching '{doctor_name}'."}
+
+        doctors = [
+            {
+                "name": m.name,
+                "specialization": m.specialization,
+                "timings": DOCTORS[m.name]["timings"],
+            }
+            for m in matches
+        ]
+        if len(doctors) == 1 or matches[0].score == 1.0:
+            return doctors[0]
+        return {"matches": doctors, "note": "Ask the caller which doctor they mean."}
 
     # -------- Get Appointment Status --------
     @function_tool()
+    @token_budget()
     async def get_appointment_status(
         self, appointment_id: str, context: RunContext
-    ) -> str:
+    ) -> Union[AppointmentResult, ToolError]:
+        appointment_id = normalize_id(appointment_id)
         logger.info(f"📌 Checking status for appointment {appointment_id}")
 
         appointment = APPOINTMENTS.get(appointment_id)
         if not appointment:
             logger.warning(f"❌ Appointment ID {appointment_id} not found")
-            return f"❌ Appointment ID {appointment_id} not found."
-
-        return (
-            f"📋 Appointment Status\n\n"
-            f"ID: {appointment_id}\n"
-            f"Patient: {appointment['patient']}\n"
-            f"Doctor: {appointment['doctor']}\n"
-            f"Date: {appointment['date']}\n"
-            f"Time: {appointment.get('time', 'Not specified')}\n"
-            f"Location: {HOSPITAL_INFO['address']}\n"
-            f"Contact: {HOSPITAL_INFO['phone']}"
-        )
+            return {"error": f"Appointment ID {appointment_id} not found."}
+
+        return {
+            "appointment_id": appointment_id,
+            "patient": appointment["patient"],
+            "doctor": appointment["doctor"],
+            "date": appointment["date"],
+            "time": appointment.get("time") or "not specified",
+        }
 
     # -------- Schedule Appointment (with Pydantic) --------
     @function_tool()
@@ -498,18 +517,33 @@ class HospitalAgent(Agent):
         available, msg = is_doctor_available(
             request.doctor_name, request.date, request.time
         )
+        requested_minute = DOCTOR_CALENDAR.resolve_time(request.doctor_name, request.date, request.time)
         if not available:
             logger.warning(f"❌ Appointment rejected: {msg}")
-            return f"❌ Sorry, {msg} Please choose another time within their working hours."
+            return f"❌ Sorry, {msg} {suggest_alternative(request.doctor_name, request.date, requested_minute)}"
+
+        # --- Take the slot containing the time atomically; offer the next one if it's gone ---
+        slot_start = APPOINTMENT_BOOK.slot_for(request.doctor_name, request.date, requested_minute)
+        if slot_start is None or not APPOINTMENT_BOOK.reserve(
+            request.doctor_name, request.date, slot_start
+        ):
+            logger.warning(f"❌ Slot {request.date} {request.time} with {request.doctor_name} unavailable")
+            return (
+                f"❌ Sorry, {request.doctor_name} has no free appointment at {request.time} on {request.date}. "
+                f"{suggest_alternative(request.doctor_name, request.date, requested_minute)}"
+            )
 
         # --- Proceed with appointment booking ---
-        appointment_id = f"APT{len(APPOINTMENTS)+1:03d}"
+        slot_time = format_minutes(slot_start)
+        if slot_start != requested_minute:
+            logger.info(f"Requested {request.time} snapped to the {slot_time} slot")
+        appointment_id = new_id("APT")
         APPOINTMENTS[appointment_id] = {
             "patient": request.name,
             "email": request.email,
             "doctor": request.doctor_name,
             "date": str(request.date),
-            "time": request.time,
+            "time": slot_time,
         }
 
         confirmation_msg = (
@@ -517,7 +551,7 @@ class HospitalAgent(Agent):
             f"ID: {appointment_id}\n"
             f"Patient: {request.name}\n"
             f"Doctor: {request.doctor_name}\n"
-            f"Date: {request.date} at {request.time}\n\n"
+            f"Date: {request.date} at {slot_time}\n\n"
             f"Location: {HOSPITAL_INFO['address']}\n"
             f"Contact: {HOSPITAL_INFO['phone']}"
         )
@@ -532,6 +566,49 @@ class HospitalAgent(Agent):
 
         return confirmation_msg
 
+    # -------- Find Next Available Appointment --------
+    @function_tool()
+    async def find_next_available_appointment(
+        self,
+        context: RunContext,
+        specialization: Optional[str] = None,
+        doctor_name: Optional[str] = None,
+        after_date: Optional[dt_date] = None,
+        after_time: Optional[str] = None,
+    ) -> str:
+        """
+        Finds the earliest free appointment slot for a specialization (e.g. "Cardiologist")
+        or a specific doctor, optionally on/after a given date and time.
+        """
+        logger.info(f"🔎 Next available: specialization={specialization}, doctor={doctor_name}")
+
+        if not specialization and not doctor_name:
+            return "Please tell me which doctor or specialization you need."
+        if doctor_name:
+            resolved = DOCTOR_DIRECTORY.resolve_name(doctor_name)
+            if resolved is None:
+                return f"❌ Sorry, no single doctor matches '{doctor_name}'. Please ask for the doctor's full name."
+            doctor_name = resolved
+
+        after = datetime.now()
+        if after_date:
+            minute = parse_time(after_time) if after_time else 0
+            after = max(after, datetime.combine(after_date, datetime.min.time()) + timedelta(minutes=minute or 0))
+
+        if specialization and not doctor_name:
+            specialization = DOCTOR_DIRECTORY.resolve_specialization(specialization) or specialization
+        slot = APPOINTMENT_BOOK.find_next_available(
+            specialization, after=after, doctors=[doctor_name] if doctor_name else None
+        )
+        if slot is None:
+            who = doctor_name or f"a {specialization}"
+            return f"❌ Sorry, there are no free slots with {who} in the next two weeks."
+
+        return (
+            f"The next available appointment is with {slot.doctor} "
+            f"({DOCTORS[slot.doctor]['specialization']}) on {slot.day} at {slot.time_str}."
+        )
+
     # -------- Cancel Appointment --------
     @function_tool()
     async def cancel_appointment(
@@ -543,6 +620,9 @@ class HospitalAgent(Agent):
         if not appointment:
             logger.error(f"Appointment {request.appointment_id} vanished from store")
             return f"❌ Appointment ID {request.appointment_id} not found."
+        slot = _appointment_slot(appointment)
+        if slot:
+            APPOINTMENT_BOOK.release(*slot)
 
         msg = (
             f"✅ Appointment cancelled.\n\n"
@@ -576,7 +656,8 @@ class HospitalAgent(Agent):
 
     # ------------ Book Lab  Test ----------------------
     @function_tool()
-    async def book_lab_test(self, context: RunContext, request: LabTestRequest) -> str:
+    @token_budget()
+    async def book_lab_test(self, context: RunContext, request: LabTestRequest) -> LabBookingResult:
         """
         Books a lab test appointment for a patient.
         Sends an email confirmation after successful booking.
@@ -590,24 +671,20 @@ class HospitalAgent(Agent):
 
         convenience_fee = 500 if request.home_sample_collection else 0
         total_cost = test_cost + convenience_fee
-        booking_id = f"LAB{random.randint(1000, 9999)}"
+        booking_id = new_id("LAB")
         location = request.lab_location.title()
 
-        response = (
-            f"✅ **Lab Test Booking Confirmed!**\n\n"
-            f"🧾 **Booking ID:** {booking_id}\n"
-            f"👤 **Patient:** {request.patient_name}\n"
-            f"🧪 **Test:** {request.test_type.title()}\n"
-            f"📅 **Date:** {request.preferred_date}\n"
-            f"⏰ **Time:** {request.preferred_time}\n"
-            f"📍 **Lab Location:** {location}\n"
-            f"🏠 **Home Collection:** {'Yes' if request.home_sample_collection else 'No'}\n"
-            f"💰 **Test Cost:** Rs. {test_cost}\n"
-            f"{'🚗 Home Collection Fee: Rs. 500\n' if request.home_sample_collection else ''}"
-            f"💳 **Total Payable:** Rs. {total_cost}\n"
-            f"📞 Confirmation message will be sent to {request.contact_number}.\n\n"
-            f"🧾 **Preparation Instructions:**\n{preparation_guide}"
-        )
+        result: LabBookingResult = {
+            "booking_id": booking_id,
+            "patient": request.patient_name,
+            "test": request.test_type.title(),
+            "date": request.preferred_date,
+            "time": request.preferred_time,
+            "location": location,
+            "home_collection": request.home_sample_collection,
+            "total_rs": total_cost,
+            "preparation": preparation_guide,
+        }
 
         # 📨 Send email confirmation
         if request.email:
@@ -625,8 +702,6 @@ class HospitalAgent(Agent):
                 f"Stay healthy!\n\n"
                 f"— CityCare Hospital Team"
             )
-            await send_email_to_patient(
-                self, context, request.email, email_subject, email_body
-            )
+            send_email_to_patient(request.email, email_subject, email_body)
 
-        return response
+        return result
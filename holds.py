@@ -0,0 +1,80 @@
+# holds.py
+"""
+Short-lived holds for preview-then-confirm flows.
+
+A preview places a hold on some resource key with a TTL; confirming releases the
+hold and turns it into a real booking. Holds nobody confirms simply expire.
+"""
+
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Hashable, List, Optional
+
+DEFAULT_HOLD_TTL_SECONDS = 300  # 5 minutes for the caller to say "yes"
+
+
+@dataclass
+class Hold:
+    hold_id: str
+    key: Hashable
+    expires_at: float
+    payload: dict = field(default_factory=dict)
+
+
+class HoldRegistry:
+    """Thread-safe registry of expiring holds keyed by hold_id."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = DEFAULT_HOLD_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._holds: Dict[str, Hold] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._holds)
+
+    def place(
+        self, key: Hashable, payload: Optional[dict] = None, ttl: Optional[float] = None
+    ) -> Hold:
+        hold = Hold(
+            hold_id=uuid.uuid4().hex[:12],
+            key=key,
+            expires_at=self._clock() + (self.ttl_seconds if ttl is None else ttl),
+            payload=payload or {},
+        )
+        with self._lock:
+            self._holds[hold.hold_id] = hold
+        return hold
+
+    def get(self, hold_id: str) -> Optional[Hold]:
+        """Return a live hold, or None if unknown or expired."""
+        hold = self._holds.get(hold_id)
+        if hold is None or hold.expires_at <= self._clock():
+            return None
+        return hold
+
+    def release(self, hold_id: str) -> Optional[Hold]:
+        """
+        Remove and return a hold even if it has just expired, so the caller can
+        always free what it reserved; check `is_expired()` before honouring it.
+        """
+        with self._lock:
+            return self._holds.pop(hold_id, None)
+
+    def is_expired(self, hold: Hold) -> bool:
+        return hold.expires_at <= self._clock()
+
+    def pop_expired(self) -> List[Hold]:
+        """Drop every expired hold and return them so callers can free resources."""
+        now = self._clock()
+        with self._lock:
+            expired = [h for h in self._holds.values() if h.expires_at <= now]
+            for hold in expired:
+                del self._holds[hold.hold_id]
+        return expired
@@ -0,0 +1,195 @@
+# ids.py
+"""
+Shared ID service for bookings, orders, claims, pickups and shipments.
+
+IDs look like `RES0K3M8Q2Z4A7` and are made of a prefix, then 10 Crockford base32
+characters, then a check character:
+
+    30 bits  seconds since ID_EPOCH   -> IDs sort by creation second
+    15 bits  per-second sequence      -> unique within the same second
+     5 bits  node id                  -> tells worker processes apart
+
+The node id comes from AGENT_NODE_ID (give every worker process its own value)
+or, when that is unset, is drawn at random per process, including after a fork.
+Each second has its own atomic counter starting at a random offset, so two
+processes that drew the same node only collide if they mint overlapping runs in
+the same second. Minting takes no lock and never sleeps: when a second's 32768
+sequence values are used up, IDs move on to the next second instead of wrapping.
+Crockford's alphabet is in ASCII order, so plain string comparison of two IDs
+with the same prefix gives creation order to the second, and stores can
+range-scan with `lower_bound()`. The check character is Luhn mod 32, which
+catches any single misheard character and most swapped neighbours when an ID
+is read back by voice.
+"""
+
+import itertools
+import os
+import secrets
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"  # Crockford base32: no I, L, O, U
+BASE = len(ALPHABET)
+ID_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+TIME_BITS = 30
+SEQ_BITS = 15
+NODE_BITS = 5
+PAYLOAD_CHARS = (TIME_BITS + SEQ_BITS + NODE_BITS) // 5
+
+# Misheard or mistyped characters Crockford maps back onto the alphabet
+_ALIASES = str.maketrans({"I": "1", "L": "1", "O": "0", "U": "V"})
+_VALUES = {ch: i for i, ch in enumerate(ALPHABET)}
+_EPOCH_SECONDS = int(ID_EPOCH.timestamp())
+_SEQ_SIZE = 1 << SEQ_BITS
+_COUNTER_WINDOW = 60  # seconds of counters kept for callers that read the clock late
+
+
+def _process_node() -> int:
+    configured = os.getenv("AGENT_NODE_ID")
+    if configured is None:
+        return secrets.randbelow(1 << NODE_BITS)
+    if not configured.isdigit() or int(configured) >= 1 << NODE_BITS:
+        raise ValueError(f"AGENT_NODE_ID must be 0-{(1 << NODE_BITS) - 1}, got {configured!r}")
+    return int(configured)
+
+
+def _epoch_seconds(now: Optional[float]) -> int:
+    seconds = int(time.time() if now is None else now) - _EPOCH_SECONDS
+    return max(0, min(seconds, (1 << TIME_BITS) - 1))
+
+
+class _Sequence:
+    """Node id and per-second sequence counters of the current process."""
+
+    def __init__(self) -> None:
+        self._init_lock = threading.Lock()  # first use and forks only, never per ID
+        self._pid: Optional[int] = None
+        self._node = 0
+        self._latest = -1
+        self._counters: Dict[int, Tuple[itertools.count, int]] = {}  # second -> (counter, start)
+
+    def _reset(self) -> None:
+        with self._init_lock:
+            if self._pid == os.getpid():
+                return
+            self._node = _process_node()
+            self._latest = -1
+            self._counters = {}
+            self._pid = os.getpid()
+
+    def take(self, now: Optional[float]) -> Tuple[int, int, int]:
+        """(seconds, sequence, node) for the next ID."""
+        if self._pid != os.getpid():  # first use, or a forked worker
+            self._reset()
+        # a clock that steps back keeps minting in the latest second
+        seconds = max(_epoch_seconds(now), self._latest)
+        while True:
+            counter, start = self._counters.get(seconds) or self._counters.setdefault(
+                seconds, (itertools.count(), secrets.randbelow(_SEQ_SIZE))
+            )
+            used = next(counter)  # atomic: no two callers get the same value
+            if used < _SEQ_SIZE:
+                break
+            seconds += 1  # this second is full; borrow the next one
+        if seconds > self._latest:
+            self._latest = seconds
+            for old in list(self._counters):  # list() copies atomically under concurrent inserts
+                if old < seconds - _COUNTER_WINDOW:
+                    self._counters.pop(old, None)
+        return seconds, (start + used) % _SEQ_SIZE, self._node
+
+
+_sequence = _Sequence()
+
+
+# ------------------ Encoding ------------------
+def _encode(value: int, width: int) -> str:
+    chars = []
+    for _ in range(width):
+        value, digit = divmod(value, BASE)
+        chars.append(ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+def _decode(text: str) -> int:
+    value = 0
+    for ch in text:
+        value = value * BASE + _VALUES[ch]
+    return value
+
+
+def check_char(payload: str) -> str:
+    """Luhn mod 32 check character for a base32 payload."""
+    total = 0
+    factor = 2
+    for ch in reversed(payload):
+        addend = factor * _VALUES[ch]
+        total += addend // BASE + addend % BASE
+        factor = 1 if factor == 2 else 2
+    return ALPHABET[(BASE - total % BASE) % BASE]
+
+
+def _split(id_: str) -> Optional[tuple]:
+    """(prefix, payload, check) or None if the shape is wrong."""
+    body = id_[-(PAYLOAD_CHARS + 1):]
+    prefix = id_[: len(id_) - len(body)]
+    if len(body) != PAYLOAD_CHARS + 1 or any(ch not in _VALUES for ch in body):
+        return None
+    return prefix, body[:-1], body[-1]
+
+
+# ------------------ Public API ------------------
+def new_id(prefix: str, now: Optional[float] = None) -> str:
+    """Mint a new time-sortable ID such as `ORD0K3M8Q2Z4A7`."""
+    seconds, seq, node = _sequence.take(now)
+    value = (seconds << (SEQ_BITS + NODE_BITS)) | (seq << NODE_BITS) | node
+    payload = _encode(value, PAYLOAD_CHARS)
+    return f"{prefix}{payload}{check_char(payload)}"
+
+
+def normalize_id(spoken: str) -> str:
+    """Uppercase, drop spaces/dashes and map I/L/O/U to what the caller meant."""
+    cleaned = "".join(ch for ch in spoken.upper() if ch.isalnum())
+    parsed = _split(cleaned.translate(_ALIASES))
+    if parsed is None:
+        return cleaned
+    prefix, payload, check = parsed
+    return f"{cleaned[: len(prefix)]}{payload}{check}"
+
+
+def is_valid(id_: str) -> bool:
+    """True if `id_` was minted by `new_id` and its check character matches."""
+    parsed = _split(id_)
+    if parsed is None:
+        return False
+    _, payload, check = parsed
+    return check_char(payload) == check
+
+
+def created_at(id_: str) -> Optional[datetime]:
+    """UTC creation time (second precision) of a minted ID, or None for legacy IDs."""
+    if not is_valid(id_):
+        return None
+    _, payload, _ = _split(id_)
+    seconds = _decode(payload) >> (SEQ_BITS + NODE_BITS)
+    return datetime.fromtimestamp(_EPOCH_SECONDS + seconds, tz=timezone.utc)
+
+
+def lower_bound(prefix: str, when: datetime) -> str:
+    """Smallest possible ID minted at or after `when`, for range scans over sorted IDs."""
+    seconds = max(0, int(when.timestamp()) - _EPOCH_SECONDS)
+    return f"{prefix}{_encode(seconds << (SEQ_BITS + NODE_BITS), PAYLOAD_CHARS)}"
+
+
+def speakable(id_: str) -> str:
+    """Split an ID into short groups for text-to-speech readback: `ORD 0K3M 8Q2Z 4A7`."""
+    parsed = _split(id_)
+    if parsed is None:
+        return id_
+    prefix, payload, check = parsed
+    body = payload + check
+    groups = [body[i:i + 4] for i in range(0, len(body), 4)]
+    return " ".join([prefix, *groups]) if prefix else " ".join(groups)
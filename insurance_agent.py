@@ -6,7 +6,7 @@ import random
 import json
 import asyncio
 from datetime import datetime, date as dt_date
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Union
 from pydantic import BaseModel, EmailStr, field_validator, Field
 from livekit.agents import (
     Agent,
@@ -29,6 +29,11 @@ from livekit.agents.llm import ChatMessage
 from livekit import rtc
 import re
 from context import INSURANCE_CONTEXT
+from customer_store import DEFAULT_PAGE_SIZE, CustomerStore, encode_cursor, payment_cursor
+from ids import new_id, normalize_id
+from penalty_engine import penalty_for
+from tool_cache import cached_tool
+from tool_results import ClaimResult, PolicyResult, ToolError, token_budget
 
 logger = logging.getLogger("insurance-voice-agent")
 load_dotenv(dotenv_path=".env")
@@ -36,8 +41,6 @@ load_dotenv(dotenv_path=".env")
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 today = datetime.now().date()
 
-if not hasattr(RunContext, "session_data"):
-    RunContext.session_data = {}
 
 # --------------------- Sample Conversation between the User and the Agent ------------------------
 """
@@ -261,6 +264,10 @@ CLAIMS = {
     ],
 }
 
+# Unified, indexed store seeded from the dicts above (history is re-keyed to the policy owner)
+CUSTOMERS = CustomerStore(os.getenv("INSURANCE_DB_PATH", ":memory:"))
+CUSTOMERS.bulk_load(USERS, PAYMENT_HISTORY, CLAIMS)
+
 
 # ------------------ FILLER AUDIO ------------------
 FILLER_AUDIO = [
@@ -353,6 +360,7 @@ class InsuranceAgent(Agent):
 
     # -------- Get Contact Info --------
     @function_tool()
+    @cached_tool()
     async def get_contact_info(
         self, context: RunContext, field: Optional[str] = None
     ) -> str:
@@ -389,6 +397,7 @@ class InsuranceAgent(Agent):
 
     # -------- Get Policy Details --------
     @function_tool()
+    @cached_tool()
     async def get_policy_details(
         self, context: RunContext, policy_type: str
     ) -> str:
@@ -414,7 +423,10 @@ class InsuranceAgent(Agent):
 
     # -------- Get Policy Info --------
     @function_tool()
-    async def get_policy_info(self, context: RunContext, user_email: str) -> str:
+    @token_budget()
+    async def get_policy_info(
+        self, context: RunContext, user_email: str
+    ) -> Union[PolicyResult, ToolError]:
         """
         Retrieve all active policy information for a given customer email.
 
@@ -423,56 +435,78 @@ class InsuranceAgent(Agent):
             user_email (str): Email of the user requesting policy details.
 
         Returns:
-            str: List of policies with number, type, coverage, premium, next due date, and status.
-                 Returns a not-found message if user or policies are missing.
+            dict: Customer name and policies with number, type, coverage, premium, next due date, and status.
+                  Returns an error if user or policies are missing.
         """
         logger.info("-------------------------------------")
         logger.info("Tool calling (Get Policy Info):")
         logger.info("-------------------------------------")
 
-        if user_email not in USERS:
-            return "User not found."
-        user = USERS[user_email]
+        user = CUSTOMERS.get_customer(user_email)
+        if user is None:
+            return {"error": "User not found."}
         policies = user["policies"]
         if not policies:
-            return "No active policies found."
-        response = [f"Policies for {user['name']}:"]
-        for p in policies:
-            response.append(
-                f"- Policy Number: {p['policy_number']}\n"
-                f"  Type: {p['type']}\n"
-                f"  Coverage: {p['coverage']}\n"
-                f"  Premium: Rs.{p['premium']}\n"
-                f"  Next Due: {p['next_due']}\n"
-                f"  Status: {p['status']}"
-            )
-        return "\n\n".join(response)
+            return {"error": "No active policies found."}
+        return {
+            "customer": user["name"],
+            "policies": [
+                {
+                    "policy_number": p["policy_number"],
+                    "type": p["type"],
+                    "coverage": p["coverage"],
+                    "premium_rs": p["premium"],
+                    "next_due": p["next_due"],
+                    "status": p["status"],
+                }
+                for p in policies
+            ],
+        }
 
 
     # -------- Get Payment History --------
     @function_tool()
-    async def get_payment_history(self, context: RunContext, user_email: str) -> str:
+    @token_budget(cursors={"payments": payment_cursor, "latest_payments": payment_cursor})
+    async def get_payment_history(
+        self,
+        context: RunContext,
+        user_email: str,
+        mode: str = "summary",
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> dict:
         """
         Retrieve payment history for a specific customer email.
 
         Args:
             context (RunContext): The context of the current conversation.
             user_email (str): Email of the user requesting payment history.
+            mode (str): "summary" (default) for totals per policy plus the latest payments,
+                or "list" for one page of payments.
+            cursor (Optional[str]): `next_cursor` from the previous call to get the next page.
+            limit (int): Payments per page (max 20).
 
         Returns:
-            str: A chronological list of payments with policy number, date, amount, payment method, and transaction ID.
-                 Returns a not-found message if no payment history exists.
+            dict: Summary and/or a page of payments (newest first) with policy number, date,
+                  amount, method and transaction ID, plus `next_cursor` when more exist.
+                  Returns an error if no payment history exists.
         """
         logger.info("-------------------------------------")
         logger.info("Tool calling (Get Payment History):")
         logger.info("-------------------------------------")
-        if user_email not in PAYMENT_HISTORY:
-            return "No payment history found for your account."
-        history = "\n".join(
-            [f"{p['date']} (Policy {p['policy_number']}): Rs.{p['amount']} via {p['method']} (Txn: {p['transaction_id']})"
-            for p in PAYMENT_HISTORY[user_email]]
-        )
-        return f"Payment history for {user_email}:\n{history}"
+        try:
+            payments, next_cursor = CUSTOMERS.payments_page(user_email, limit, cursor)
+        except ValueError as e:
+            return {"error": str(e)}
+        if not payments and not cursor:
+            return {"error": "No payment history found for your account."}
+
+        result = {"payments": payments}
+        if mode == "summary" and not cursor:
+            result = {"summary": CUSTOMERS.payment_summary(user_email), "latest_payments": payments}
+        if next_cursor:
+            result["next_cursor"] = next_cursor
+        return result
 
 
     # -------- File Claim --------
@@ -494,16 +528,16 @@ class InsuranceAgent(Agent):
         logger.info("-------------------------------------")
 
         # Check if user exists
-        if user_email not in USERS:
+        user = CUSTOMERS.get_customer(user_email)
+        if user is None:
             return "User not found."
 
         # Check if user owns the given policy number
-        owns_policy = any(p["policy_number"] == request.policy_number for p in USERS[user_email]["policies"])
-        if not owns_policy:
+        if CUSTOMERS.policy_owner(request.policy_number) != user["email"]:
             return "❌ You do not have this policy number. Please check your policy details."
 
         # Create claim
-        claim_id = f"CLM{random.randint(1000, 9999)}"
+        claim_id = new_id("CLM")
         claim_data = {
             "claim_id": claim_id,
             "policy_number": request.policy_number,
@@ -514,15 +548,13 @@ class InsuranceAgent(Agent):
             "attachments": request.attachments or [],
         }
 
-        if user_email not in CLAIMS:
-            CLAIMS[user_email] = []
-        CLAIMS[user_email].append(claim_data)
+        CUSTOMERS.add_claim(user["email"], claim_data)
 
         # Send confirmation email
         send_email(
             to_email=user_email,
             subject="Claim Filed Successfully",
-            body=f"Dear {USERS[user_email]['name']},\n\n"
+            body=f"Dear {user['name']},\n\n"
                 f"Your claim ({claim_id}) has been filed successfully and is under review.\n\n"
                 f"Details:\n{claim_data}"
         )
@@ -534,63 +566,86 @@ class InsuranceAgent(Agent):
 
     # -------- Get Claim Status --------
     @function_tool()
-    async def get_claim_status(self, context: RunContext, user_email: str, claim_id: Optional[str] = None) -> str:
+    @token_budget(cursors={"claims": lambda claim: encode_cursor(claim["date"], claim["claim_id"])})
+    async def get_claim_status(
+        self,
+        context: RunContext,
+        user_email: str,
+        claim_id: Optional[str] = None,
+        status: Optional[str] = None,
+        cursor: Optional[str] = None,
+    ) -> Union[ClaimResult, ToolError]:
         """
         Retrieve the status of claims filed by the user.
 
         Args:
             context (RunContext): The context of the current conversation.
             user_email (str): Email of the user requesting claim status.
-            claim_id (Optional[str]): Specific claim ID to query. If None, returns all claims for the user.
+            claim_id (Optional[str]): Specific claim ID to query. If None, returns counts by
+                status plus the most recent claims.
+            status (Optional[str]): Only list claims with this status (e.g. "Approved").
+            cursor (Optional[str]): `next_cursor` from the previous call to get the next page.
 
         Returns:
-            str: Claim details including claim ID, policy number, type, date, status, and description.
-                 Returns an error message if no claims are found or claim ID does not match.
+            dict: Claims with claim ID, policy number, type, date and status
+                  (plus the description when a single claim is requested).
+                  Returns an error if no claims are found or claim ID does not match.
         """
         logger.info("-------------------------------------")
         logger.info("Tool calling (Get Claim Status):")
         logger.info("-------------------------------------")
 
-        if user_email not in CLAIMS:
-            return "No claims found for your account."
-        claims = CLAIMS[user_email]
-        results = []
-        for claim in claims:
-            if not claim_id or claim["claim_id"] == claim_id:
-                results.append(
-                    f"Claim ID: {claim['claim_id']}\n"
-                    f"Policy Number: {claim['policy_number']}\n"
-                    f"Type: {claim['claim_type']}\n"
-                    f"Date: {claim['incident_date']}\n"
-                    f"Status: {claim['status']}\n"
-                    f"Description: {claim['description']}"
-                )
-        return "\n\n".join(results) if results else "No matching claims found."
-    
+        def compact(claim: dict) -> dict:
+            return {
+                "claim_id": claim["claim_id"],
+                "policy_number": claim["policy_number"],
+                "type": claim["claim_type"],
+                "date": claim["incident_date"],
+                "status": claim["status"],
+            }
+
+        if claim_id:
+            claim = CUSTOMERS.get_claim(normalize_id(claim_id))
+            if claim is None or claim["owner_email"] != CUSTOMERS.resolve_email(user_email):
+                return {"error": "No matching claims found."}
+            return {"claims": [dict(compact(claim), description=claim["description"])]}
+
+        try:
+            claims, next_cursor = CUSTOMERS.claims_page(user_email, cursor=cursor, status=status)
+        except ValueError as e:
+            return {"error": str(e)}
+        if not claims and not cursor:
+            return {"error": "No claims found for your account."}
+
+        result: ClaimResult = {"claims": [compact(c) for c in claims]}
+        if not cursor:
+            result["summary"] = CUSTOMERS.claim_summary(user_email)
+        if next_cursor:
+            result["next_cursor"] = next_cursor
+        return result
+
     from datetime import datetime
 
     @function_tool()
     async def calculate_late_payment_penalty(self, context: RunContext, request: LatePaymentRequest) -> str:
         """
         Calculates late payment penalty if the premium is overdue.
-        Penalty = 1% of premium per week after due date.
+        Penalty = 1% of premium per started week after due date.
         """
-        due = datetime.strptime(request.due_date, "%Y-%m-%d")
-        paid = datetime.strptime(request.paid_date, "%Y-%m-%d") if request.paid_date else datetime.now()
-
-        if paid <= due:
+        try:
+            due = dt_date.fromisoformat(request.due_date)
+            paid = dt_date.fromisoformat(request.paid_date) if request.paid_date else None
+        except ValueError:
+            return "Dates must be in YYYY-MM-DD format."
+
+        quote = penalty_for(request.premium_amount, due, paid)
+        if quote.days_late == 0:
             return f"No penalty. Payment is on time ✅"
 
-        days_late = (paid - due).days
-        weeks_late = days_late // 7 or 1  # round up to 1 week minimum
-        penalty = round(request.premium_amount * 0.01 * weeks_late, 2)
-
-        total_due = request.premium_amount + penalty
-
         return (
-            f"📅 Payment was {days_late} days late.\n"
-            f"💸 Penalty (1% per week): Rs. {penalty}\n"
-            f"Total Amount Due (with penalty): Rs. {total_due}"
+            f"📅 Payment was {quote.days_late} days late.\n"
+            f"💸 Penalty (1% per week): Rs. {quote.penalty}\n"
+            f"Total Amount Due (with penalty): Rs. {quote.total_due}"
         )
 
 
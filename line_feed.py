@@ -0,0 +1,200 @@
+# line_feed.py
+"""
+Shared plumbing for newline-delimited status feeds.
+
+`LineFeedIngestor` follows a growing file (in a daemon thread) or accepts
+feeds over TCP and hands complete lines to `ingest_lines`, which subclasses
+implement. A file feed reaches every worker process; a TCP feed reaches only
+the process that bound the port, so it suits single-process deployments. `StatusNotifier` fans the resulting changes out to the voice
+sessions watching them, across threads and event loops. `normalize_ts` puts
+every feed timestamp into one UTC format, so timestamps compare as strings.
+"""
+
+import asyncio
+import codecs
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger("line-feed")
+
+TAIL_POLL_SECONDS = 0.5
+TAIL_RETRY_SECONDS = 5.0  # wait between attempts to open a missing feed file
+TS_FORMAT = "%Y-%m-%dT%H:%M:%SZ"  # fixed width, so string order is time order
+
+
+# ------------------ Timestamps ------------------
+def normalize_ts(ts: Any) -> Optional[str]:
+    """
+    ISO 8601 (with an offset, "Z" or naive, taken as UTC) or epoch seconds ->
+    "YYYY-MM-DDTHH:MM:SSZ" in UTC. None if it cannot be parsed.
+    """
+    try:
+        if isinstance(ts, (int, float)) and not isinstance(ts, bool):
+            moment = datetime.fromtimestamp(ts, tz=timezone.utc)
+        else:
+            text = str(ts).strip()
+            if text[-1:] in ("Z", "z"):
+                text = text[:-1] + "+00:00"
+            moment = datetime.fromisoformat(text)
+    except (ValueError, TypeError, OverflowError, OSError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).strftime(TS_FORMAT)
+
+
+def utc_now_ts() -> str:
+    return datetime.now(timezone.utc).strftime(TS_FORMAT)
+
+
+# ------------------ Notifications ------------------
+class StatusNotifier:
+    """
+    Fan-out of status changes to watchers. Each watcher is an asyncio queue on
+    its own event loop, so ingestion can publish from any thread.
+    """
+
+    def __init__(self) -> None:
+        self._watchers: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = threading.Lock()
+
+    def watch(self, key: str, queue: asyncio.Queue) -> None:
+        """Call from the watcher's event loop."""
+        entry = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._watchers.setdefault(key.upper(), set()).add(entry)
+
+    def unwatch_all(self, queue: asyncio.Queue) -> None:
+        with self._lock:
+            for key in list(self._watchers):
+                watchers = {w for w in self._watchers[key] if w[1] is not queue}
+                if watchers:
+                    self._watchers[key] = watchers
+                else:
+                    del self._watchers[key]
+
+    def publish(self, changed: Dict[str, dict]) -> int:
+        """Queue a copy of each changed projection for its watchers; returns deliveries."""
+        if not self._watchers:
+            return 0
+        delivered = 0
+        with self._lock:
+            for key, projection in changed.items():
+                for loop, queue in self._watchers.get(key, ()):
+                    try:
+                        loop.call_soon_threadsafe(queue.put_nowait, dict(projection))
+                    except RuntimeError:  # watcher's loop already closed
+                        continue
+                    delivered += 1
+        return delivered
+
+
+# ------------------ Transports ------------------
+class LineFeedIngestor(ABC):
+    """File-tail and TCP transports for a line-oriented feed."""
+
+    feed_name = "feed"
+
+    @abstractmethod
+    def ingest_lines(self, lines: Iterable[str]) -> int:
+        """Apply a batch of raw feed lines; returns how many were accepted."""
+
+    def ingest_file(self, path: str) -> int:
+        with open(path, encoding="utf-8") as f:
+            return self.ingest_lines(f)
+
+    def tail_file(
+        self,
+        path: str,
+        stop: threading.Event,
+        poll_seconds: float = TAIL_POLL_SECONDS,
+        retry_seconds: float = TAIL_RETRY_SECONDS,
+    ) -> None:
+        """
+        Follow a growing feed file until `stop` is set (run in a thread). A file
+        that is missing or unreadable is logged and retried instead of ending the tail.
+        """
+        while not stop.is_set():
+            try:
+                f = open(path, encoding="utf-8")
+            except OSError as e:
+                logger.warning(f"Cannot open {self.feed_name} {path}: {e}; retrying in {retry_seconds}s")
+                stop.wait(retry_seconds)
+                continue
+            with f:
+                pending = ""
+                while not stop.is_set():
+                    chunk = f.read(1 << 20)
+                    if not chunk:
+                        stop.wait(poll_seconds)
+                        continue
+                    lines = (pending + chunk).split("\n")
+                    pending = lines.pop()  # partial last line waits for the next read
+                    try:
+                        self.ingest_lines(lines)
+                    except Exception:
+                        logger.exception(f"Failed to apply {len(lines)} {self.feed_name} lines from {path}")
+
+    def start_tail(self, path: str) -> threading.Event:
+        """Tail `path` in a daemon thread; set the returned event to stop."""
+        stop = threading.Event()
+        threading.Thread(
+            target=self.tail_file, args=(path, stop), name=f"{self.feed_name}-tail", daemon=True
+        ).start()
+        logger.info(f"Tailing {self.feed_name} {path}")
+        return stop
+
+    async def serve(self, host: str, port: int) -> asyncio.AbstractServer:
+        """
+        Accept newline-delimited feeds over TCP. Batches are applied in the
+        default executor, so a large batch never blocks the event loop.
+        """
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            peer = writer.get_extra_info("peername")
+            loop = asyncio.get_running_loop()
+            decoder = codecs.getincrementaldecoder("utf-8")("replace")
+            pending = ""
+            try:
+                while True:
+                    chunk = await reader.read(1 << 16)
+                    if not chunk:
+                        break
+                    lines = (pending + decoder.decode(chunk)).split("\n")
+                    pending = lines.pop()
+                    await loop.run_in_executor(None, self.ingest_lines, lines)
+                if pending:
+                    await loop.run_in_executor(None, self.ingest_lines, [pending])
+            finally:
+                writer.close()
+                logger.info(f"{self.feed_name} from {peer} closed")
+
+        server = await asyncio.start_server(handle, host, port)
+        logger.info(f"Listening for {self.feed_name} on {host}:{port}")
+        return server
+
+    def start_serve(self, host: str, port: int) -> threading.Event:
+        """
+        Run `serve` on its own event loop in a daemon thread, for callers without a
+        running loop (worker prewarm). Set the returned event to stop; a port that
+        can't be bound is logged and the feed stays off.
+        """
+        stop = threading.Event()
+
+        async def run() -> None:
+            try:
+                server = await self.serve(host, port)
+            except OSError as e:
+                logger.error(f"Cannot listen for {self.feed_name} on {host}:{port}: {e}")
+                return
+            async with server:
+                while not stop.is_set():
+                    await asyncio.sleep(TAIL_POLL_SECONDS)
+
+        threading.Thread(
+            target=asyncio.run, args=(run(),), name=f"{self.feed_name}-server", daemon=True
+        ).start()
+        return stop
@@ -0,0 +1,147 @@
+# location_resolver.py
+"""
+City / airport / country resolver shared by the airline and courier agents.
+
+Loaded once from the bundled info/locations.csv (IATA codes, city and country
+names, aliases and Urdu spellings). Resolution tries, in order: an exact alias
+hit, a unique prefix through a PrefixTrie ("isla" -> Islamabad) and finally a
+trigram + edit-distance fuzzy match for misheard names ("karachee"). Results
+are cached, so repeated lookups of the same phrase are a dict hit.
+"""
+
+import csv
+import logging
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from text_match import NGramIndex, PrefixTrie, normalize_text, similarity
+
+logger = logging.getLogger("location-resolver")
+
+LOCATIONS_CSV = Path(__file__).parent / "info" / "locations.csv"
+
+AIRPORT = "airport"
+CITY = "city"  # city without its own airport; `code` is the airport that serves it
+COUNTRY = "country"
+
+MIN_PREFIX_CHARS = 3
+FUZZY_MIN_SCORE = 0.75
+NOISE_WORDS = {"airport", "international", "city", "from", "to", "the", "shehar", "ایئرپورٹ", "شہر"}
+
+# Arabic-script letter variants that STT and keyboards mix freely in Urdu text
+_URDU_FOLD = str.maketrans({"ي": "ی", "ى": "ی", "ك": "ک", "ة": "ہ", "ه": "ہ", "ۀ": "ہ", "أ": "ا", "إ": "ا", "آ": "ا"})
+_URDU_MARKS_RE = re.compile("[\u064b-\u065f\u0670\u200c\u200d]")  # harakat, zero-width joiners
+
+
+class Location(NamedTuple):
+    type: str  # AIRPORT, CITY or COUNTRY
+    code: str  # IATA code (airport / serving airport) or ISO country code
+    name: str
+    country_code: str
+
+
+def location_key(text: str) -> str:
+    """Normalized lookup key: casefolded, Urdu letters folded, noise words dropped."""
+    text = _URDU_MARKS_RE.sub("", (text or "").translate(_URDU_FOLD))
+    tokens = [t for t in normalize_text(text).split() if t not in NOISE_WORDS]
+    return " ".join(tokens)
+
+
+class LocationResolver:
+    """Alias, prefix and fuzzy lookup over a fixed set of locations."""
+
+    def __init__(self, locations: Iterable[Location], aliases: Dict[int, List[str]]) -> None:
+        self.locations: List[Location] = list(locations)
+        self._exact: Dict[str, List[int]] = {}
+        self._keys: List[str] = []
+        self._key_owner: List[int] = []
+        self._trie = PrefixTrie()
+        self._fuzzy = NGramIndex()
+
+        for loc_id, loc in enumerate(self.locations):
+            for alias in [loc.code, loc.name, *aliases.get(loc_id, [])]:
+                key = location_key(alias)
+                if not key:
+                    continue
+                owners = self._exact.setdefault(key, [])
+                if loc_id in owners:
+                    continue
+                owners.append(loc_id)
+                key_id = len(self._keys)
+                self._keys.append(key)
+                self._key_owner.append(loc_id)
+                self._trie.insert(key, key_id)
+                self._fuzzy.add(key)
+
+        self._countries = {
+            loc.code: loc for loc in self.locations if loc.type == COUNTRY
+        }
+        self.resolve = lru_cache(maxsize=4096)(self._resolve)
+
+    @classmethod
+    def from_csv(cls, path: Path = LOCATIONS_CSV) -> "LocationResolver":
+        locations: List[Location] = []
+        aliases: Dict[int, List[str]] = {}
+        with open(path, encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                aliases[len(locations)] = [a for a in row["aliases"].split("|") if a]
+                locations.append(Location(row["type"], row["code"], row["name"], row["country_code"]))
+        logger.info(f"Loaded {len(locations)} locations from {path.name}")
+        return cls(locations, aliases)
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    # ------------------ Lookup ------------------
+    def _pick(self, loc_ids: Iterable[int], types: Optional[tuple]) -> Optional[Location]:
+        """First match of an allowed type; places win over countries of the same name."""
+        candidates = [self.locations[i] for i in loc_ids]
+        if types:
+            candidates = [loc for loc in candidates if loc.type in types]
+        candidates.sort(key=lambda loc: loc.type == COUNTRY)
+        return candidates[0] if candidates else None
+
+    def _resolve(self, text: str, types: Optional[tuple] = None) -> Optional[Location]:
+        key = location_key(text)
+        if not key:
+            return None
+
+        exact = self._exact.get(key)
+        if exact:
+            found = self._pick(exact, types)
+            if found:
+                return found
+
+        if len(key) >= MIN_PREFIX_CHARS:
+            owners = {self._key_owner[k] for k in self._trie.prefix(key)}
+            found = self._pick(owners, types) if owners else None
+            allowed = {i for i in owners if not types or self.locations[i].type in types}
+            if found and len(allowed) == 1:
+                return found
+
+        best, best_score = None, 0.0
+        for key_id, _dice in self._fuzzy.search(key, limit=5):
+            loc = self.locations[self._key_owner[key_id]]
+            if types and loc.type not in types:
+                continue
+            score = similarity(key, self._keys[key_id], floor=FUZZY_MIN_SCORE)
+            if score > best_score:
+                best, best_score = loc, score
+        return best
+
+    def airport_code(self, text: str) -> Optional[str]:
+        """IATA code for a city or airport name/code ("Karachi", "khi", "کراچی")."""
+        loc = self.resolve(text, (AIRPORT, CITY))
+        return loc.code if loc else None
+
+    def country_of(self, text: str) -> Optional[Location]:
+        """Country for a country name or for any city/airport in it."""
+        loc = self.resolve(text)
+        if loc is None:
+            return None
+        return loc if loc.type == COUNTRY else self._countries.get(loc.country_code)
+
+
+LOCATIONS = LocationResolver.from_csv()
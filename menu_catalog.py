@@ -0,0 +1,153 @@
+# menu_catalog.py
+"""
+Category-scoped views of the menu for browsing.
+
+Instead of handing the whole nested MENU to the LLM on every browse, the
+catalog precomputes one compact JSON view per category and subcategory plus a
+headlines view (section names, item counts and price ranges). Views are
+serialized once, so the same request always returns the same bytes; only
+price-filtered browses are built per call, from the per-section item tables.
+"""
+
+import json
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from menu_matcher import iter_menu_items
+from text_match import normalize_text, similarity
+
+logger = logging.getLogger("menu-catalog")
+
+SECTION_MATCH_MIN_SCORE = 0.75
+NOISE_WORDS = {"menu", "section", "items", "item", "dishes", "dish", "the", "your", "some", "all"}
+
+Section = Tuple[str, Optional[str]]  # (category, subcategory or None)
+
+
+def _dumps(payload: dict) -> str:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+def section_key(text: str) -> str:
+    """Lookup key for a section name: normalized, noise words dropped, singular."""
+    words = [
+        w[:-1] if w.endswith("s") and not w.endswith("ss") else w
+        for w in normalize_text(text).split()
+        if w not in NOISE_WORDS
+    ]
+    return " ".join(words)
+
+
+def _headline(items: Dict[str, int]) -> str:
+    prices = items.values()
+    return f"{len(items)} items, Rs {min(prices)}-{max(prices)}"
+
+
+class MenuCatalog:
+    """Precomputed per-section menu views with name resolution for categories."""
+
+    def __init__(self, menu: Dict[str, dict], aliases: Optional[Dict[str, Iterable[str]]] = None) -> None:
+        self._sections: Dict[Section, Dict[str, int]] = {}
+        self._subsections: Dict[str, List[str]] = {}
+        for item, price, category, subcategory in iter_menu_items(menu):
+            self._sections.setdefault((category, subcategory), {})[item] = price
+            subs = self._subsections.setdefault(category, [])
+            if subcategory and subcategory not in subs:
+                subs.append(subcategory)
+
+        self._names: Dict[str, Section] = {}
+        for category, subs in self._subsections.items():
+            self._names.setdefault(section_key(category), (category, None))
+            for sub in subs:
+                self._names.setdefault(section_key(sub), (category, sub))
+        for name, spoken in (aliases or {}).items():
+            target = self._names.get(section_key(name))
+            if target is None:
+                logger.warning(f"Alias target section '{name}' not found in MENU — skipped.")
+                continue
+            for alias in spoken:
+                self._names.setdefault(section_key(alias), target)
+
+        # Precomputed, serialized once
+        self._headlines = _dumps({"categories": {c: self._summary(c) for c in self._subsections}})
+        self._views: Dict[Tuple[Section, bool], str] = {}
+        for category, subs in self._subsections.items():
+            self._views[((category, None), False)] = _dumps({"category": category, "items": self._items(category)})
+            self._views[((category, None), True)] = _dumps({"category": category, "sections": self._summary(category)})
+            for sub in subs:
+                view = _dumps({"category": category, "subcategory": sub, "items": self._sections[(category, sub)]})
+                self._views[((category, sub), False)] = self._views[((category, sub), True)] = view
+
+    # ------------------ Builders ------------------
+    def _items(self, category: str) -> dict:
+        subs = self._subsections[category]
+        if not subs:
+            return dict(self._sections[(category, None)])
+        return {sub: dict(self._sections[(category, sub)]) for sub in subs}
+
+    def _summary(self, category: str):
+        subs = self._subsections[category]
+        if not subs:
+            return _headline(self._sections[(category, None)])
+        return {sub: _headline(self._sections[(category, sub)]) for sub in subs}
+
+    # ------------------ Lookups ------------------
+    def sections(self) -> List[str]:
+        return [name for category, subs in self._subsections.items() for name in [category, *subs]]
+
+    def find_section(self, text: str) -> Optional[Section]:
+        """Category or subcategory for a spoken name ("pizzas", "mains", "drinks")."""
+        key = section_key(text)
+        if not key:
+            return None
+        if key in self._names:
+            return self._names[key]
+        best, best_score = None, 0.0
+        for name, section in self._names.items():
+            score = similarity(key, name, floor=SECTION_MATCH_MIN_SCORE)
+            if score > best_score:
+                best, best_score = section, score
+        return best
+
+    def browse(
+        self,
+        category: Optional[str] = None,
+        subcategory: Optional[str] = None,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        headlines_only: bool = False,
+    ) -> str:
+        """
+        JSON view of one section, optionally price-filtered. With no section and
+        no price filter, the headlines (sections, item counts, price ranges).
+        """
+        section: Optional[Section] = None
+        for text in (subcategory, category):
+            if text:
+                section = self.find_section(text)
+                if section is None:
+                    return _dumps({"error": f"No menu section called '{text}'.", "sections": self.sections()})
+                break
+
+        if min_price is None and max_price is None:
+            if section is None:
+                return self._headlines
+            return self._views[(section, headlines_only)]
+
+        low = min_price if min_price is not None else 0
+        high = max_price if max_price is not None else float("inf")
+        scope = [s for s in self._sections if section is None or s == section or (section[1] is None and s[0] == section[0])]
+        items: Dict[str, Dict[str, int]] = {}
+        for category_name, sub in scope:
+            for item, price in self._sections[(category_name, sub)].items():
+                if low <= price <= high:
+                    items.setdefault(sub or category_name, {})[item] = price
+        payload: dict = {"price_range": [min_price, max_price]}
+        if section:
+            payload["category"] = section[0]
+            if section[1]:
+                payload["subcategory"] = section[1]
+        payload["items"] = items
+        if not items:
+            payload["message"] = "Nothing on the menu in that price range."
+        return _dumps(payload)
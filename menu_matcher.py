@@ -0,0 +1,179 @@
+# menu_matcher.py
+"""
+Fuzzy resolver for menu item names coming out of speech-to-text.
+
+The catalog is flattened once into alias entries, indexed by character trigrams,
+and candidates are re-ranked by edit distance, so "margarita", "pepperoni pizza
+large" or "کوک" resolve to a real menu item instead of failing the tool call.
+"""
+
+import logging
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from text_match import NGramIndex, normalize_text, window_similarity
+
+logger = logging.getLogger("menu-matcher")
+
+# Words callers add that never distinguish one menu item from another
+NOISE_WORDS = {
+    "a",
+    "an",
+    "the",
+    "please",
+    "large",
+    "medium",
+    "small",
+    "regular",
+    "plate",
+    "portion",
+    "some",
+}
+
+
+# How many distinct items survive the trigram pass into edit-distance re-ranking
+RERANK_LIMIT = 4
+# Alias entries pulled from the trigram index to fill that shortlist
+SEARCH_LIMIT = 48
+# A best match this close to the runner-up is ambiguous; ask the caller instead
+AMBIGUITY_MARGIN = 0.1
+# Spoken variants repeat a lot across calls; remember recent fuzzy results
+QUERY_CACHE_SIZE = 1024
+
+
+class MenuMatch(NamedTuple):
+    item: str
+    price: int
+    category: str
+    subcategory: Optional[str]
+    confidence: float
+
+
+def _strip_noise(text: str) -> str:
+    kept = [w for w in text.split() if w not in NOISE_WORDS]
+    return " ".join(kept) if kept else text
+
+
+def _singular(word: str) -> str:
+    return word[:-1] if word.endswith("s") and not word.endswith("ss") else word
+
+
+def iter_menu_items(menu: Dict[str, dict]):
+    """Yield (item, price, category, subcategory) for both nested and flat categories."""
+    for category, section in menu.items():
+        if all(isinstance(v, dict) for v in section.values()):
+            for subcategory, items in section.items():
+                for item, price in items.items():
+                    yield item, price, category, subcategory
+        else:
+            for item, price in section.items():
+                yield item, price, category, None
+
+
+class MenuMatcher:
+    """Precomputed alias table + trigram index over a (possibly nested) MENU dict."""
+
+    def __init__(
+        self,
+        menu: Dict[str, dict],
+        aliases: Optional[Dict[str, Iterable[str]]] = None,
+        min_confidence: float = 0.75,
+    ) -> None:
+        self.min_confidence = min_confidence
+        self._items: Dict[str, MenuMatch] = {}
+        self._exact: Dict[str, str] = {}
+        self._entry_items: List[str] = []
+        self._entry_texts: List[str] = []
+        self._index = NGramIndex(n=3)
+        self._cache: Dict[str, List[MenuMatch]] = {}
+
+        for item, price, category, subcategory in iter_menu_items(menu):
+            self._items[item] = MenuMatch(item, price, category, subcategory, 1.0)
+            name = normalize_text(item)
+            variants = {name, f"{name} {normalize_text(category)}"}
+            if subcategory:
+                sub = normalize_text(subcategory)
+                variants.add(f"{name} {sub}")
+                if _singular(sub) not in name.split():
+                    variants.add(f"{name} {_singular(sub)}")
+            for variant in variants:
+                self._add_alias(variant, item)
+
+        for item, item_aliases in (aliases or {}).items():
+            if item not in self._items:
+                logger.warning(f"Alias target '{item}' not found in MENU — skipped.")
+                continue
+            for alias in item_aliases:
+                self._add_alias(normalize_text(alias), item)
+
+    def _add_alias(self, text: str, item: str) -> None:
+        for key in {text, _strip_noise(text)}:
+            if key in self._exact:
+                continue
+            self._exact[key] = item
+            self._entry_items.append(item)
+            self._entry_texts.append(key)
+            self._index.add(key)
+
+    # ------------------ Lookups ------------------
+    def __contains__(self, item: str) -> bool:
+        return item in self._items
+
+    def get(self, item: str) -> Optional[MenuMatch]:
+        """Exact lookup by canonical menu name."""
+        return self._items.get(item)
+
+    def candidates(self, query: str, limit: int = 3) -> List[MenuMatch]:
+        """Top distinct menu items for a spoken query, best first."""
+        text = _strip_noise(normalize_text(query))
+        if not text:
+            return []
+
+        exact = self._exact.get(text)
+        if exact:
+            return [self._items[exact]]
+
+        cached = self._cache.get(text)
+        if cached is None:
+            cached = self._rank(text)
+            if len(self._cache) >= QUERY_CACHE_SIZE:
+                self._cache.clear()
+            self._cache[text] = cached
+        return cached[:limit]
+
+    def _rank(self, text: str) -> List[MenuMatch]:
+        # The trigram pass picks the top few items; each is scored on its best
+        # alias among those that share trigrams with the query
+        shortlisted: Dict[str, List[int]] = {}
+        for entry_id, _ in self._index.search(text, limit=SEARCH_LIMIT):
+            item = self._entry_items[entry_id]
+            if item in shortlisted:
+                shortlisted[item].append(entry_id)
+            elif len(shortlisted) < RERANK_LIMIT:
+                shortlisted[item] = [entry_id]
+
+        best: Dict[str, float] = {}
+        for item, entry_ids in shortlisted.items():
+            score = 0.0
+            for entry_id in entry_ids:
+                # Aliases that cannot beat the item's best so far are cut off early
+                score = max(score, window_similarity(text, self._entry_texts[entry_id], floor=max(0.4, score)))
+            best[item] = score
+
+        ranked = sorted(best.items(), key=lambda pair: (-pair[1], pair[0]))
+        return [
+            self._items[item]._replace(confidence=round(score, 3))
+            for item, score in ranked
+            if score > 0
+        ]
+
+    def resolve(self, query: str) -> Optional[MenuMatch]:
+        """
+        Best match if it clears the confidence threshold and is clearly ahead of
+        the runner-up, else None (the caller offers the candidates instead).
+        """
+        matches = self.candidates(query, limit=2)
+        if not matches or matches[0].confidence < self.min_confidence:
+            return None
+        if len(matches) > 1 and matches[0].confidence - matches[1].confidence < AMBIGUITY_MARGIN:
+            return None
+        return matches[0]
@@ -0,0 +1,76 @@
+# order_cart.py
+"""
+Per-session order cart with running totals.
+
+Each tool call changes one line of the cart, so the LLM only sends the item
+that changed instead of re-sending the whole order. The subtotal is kept
+running, so adding or removing a line costs O(1) regardless of cart size.
+"""
+
+from typing import Dict, NamedTuple, Optional
+
+from ids import new_id
+
+
+class CartLine(NamedTuple):
+    quantity: int
+    price: int
+
+
+class OrderCart:
+    """Items, quantities and running subtotal for one caller's order."""
+
+    def __init__(self, order_id: Optional[str] = None) -> None:
+        self.order_id = order_id or new_id("ORD")
+        self.name: Optional[str] = None
+        self.email: Optional[str] = None
+        self.subtotal = 0
+        self._lines: Dict[str, CartLine] = {}
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def __contains__(self, item: str) -> bool:
+        return item in self._lines
+
+    def quantity(self, item: str) -> int:
+        line = self._lines.get(item)
+        return line.quantity if line else 0
+
+    # ------------------ Changes ------------------
+    def set_quantity(self, item: str, quantity: int, price: int) -> int:
+        """Set an item's quantity (0 removes it); returns the new quantity."""
+        line = self._lines.get(item)
+        if line is not None:
+            self.subtotal -= line.quantity * line.price
+        if quantity <= 0:
+            self._lines.pop(item, None)
+            return 0
+        self._lines[item] = CartLine(quantity, price)  # an existing item keeps its place
+        self.subtotal += quantity * price
+        return quantity
+
+    def add(self, item: str, quantity: int, price: int) -> int:
+        return self.set_quantity(item, self.quantity(item) + quantity, price)
+
+    def remove(self, item: str) -> bool:
+        if item not in self._lines:
+            return False
+        self.set_quantity(item, 0, 0)
+        return True
+
+    # ------------------ Views ------------------
+    def items(self) -> Dict[str, int]:
+        return {item: line.quantity for item, line in self._lines.items()}
+
+    def summary(self, delivery_rs: int) -> dict:
+        summary = {
+            "order_id": self.order_id,
+            "items": self.items(),
+            "subtotal_rs": self.subtotal,
+            "delivery_rs": delivery_rs if self._lines else 0,
+            "total_rs": self.subtotal + delivery_rs if self._lines else 0,
+        }
+        if self.name:
+            summary["customer"] = self.name
+        return summary
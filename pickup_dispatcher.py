@@ -0,0 +1,231 @@
+# pickup_dispatcher.py
+"""
+Pickup dispatcher for courier riders.
+
+Riders are indexed by area, and each rider's day is split into pickup windows
+with a fixed capacity (pickups per window). The dispatcher also keeps a per-area
+count of spare capacity per window, so "is anyone free at 11:00 in KHI?" and
+the next-free-window search never scan the fleet; only the final rider pick
+looks at the riders of one area. Previews take a TTL hold and every mutation
+happens under one lock, so concurrent sessions can't overbook a rider.
+"""
+
+import logging
+import threading
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from holds import DEFAULT_HOLD_TTL_SECONDS, Hold, HoldRegistry
+
+logger = logging.getLogger("pickup-dispatcher")
+
+WINDOW_MINUTES = 60
+DEFAULT_SHIFT = ("09:00", "18:00")
+DEFAULT_WINDOW_CAPACITY = 2  # pickups one rider can do in one window
+SEARCH_HORIZON_DAYS = 7
+
+
+class PickupWindow(NamedTuple):
+    day: date
+    start: str  # "HH:MM"
+    end: str
+
+
+def to_minutes(hhmm: str) -> int:
+    hour, minute = map(int, hhmm.split(":"))
+    return hour * 60 + minute
+
+
+def format_minutes(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class PickupDispatcher:
+    """Per-area rider index with per-rider, per-day window capacity and expiring holds."""
+
+    def __init__(
+        self,
+        agents: Iterable[dict],
+        window_minutes: int = WINDOW_MINUTES,
+        shift: Tuple[str, str] = DEFAULT_SHIFT,
+        window_capacity: int = DEFAULT_WINDOW_CAPACITY,
+        hold_ttl_seconds: float = DEFAULT_HOLD_TTL_SECONDS,
+    ) -> None:
+        self.window_minutes = window_minutes
+        self.window_capacity = window_capacity
+        self.shift_start = to_minutes(shift[0])
+        self.windows = (to_minutes(shift[1]) - self.shift_start) // window_minutes
+
+        self._agents: Dict[str, dict] = {}
+        self._by_area: Dict[str, List[str]] = {}
+        for agent in agents:
+            if not agent.get("on_duty", True):
+                continue
+            self._agents[agent["id"]] = agent
+            self._by_area.setdefault(agent["area"].upper(), []).append(agent["id"])
+
+        # (day, agent_id) -> pickups per window; (day, area) -> spare capacity per window
+        self._load: Dict[Tuple[date, str], List[int]] = {}
+        self._day_total: Dict[Tuple[date, str], int] = {}
+        self._spare: Dict[Tuple[date, str], List[int]] = {}
+        self._holds = HoldRegistry(ttl_seconds=hold_ttl_seconds)
+        self._lock = threading.RLock()
+
+    def agents_in(self, area: str) -> List[dict]:
+        return [self._agents[a] for a in self._by_area.get(area.upper(), [])]
+
+    def window_for(self, pickup_time: str) -> Optional[int]:
+        """Index of the window containing `pickup_time`, or None outside the shift."""
+        offset = to_minutes(pickup_time) - self.shift_start
+        if offset < 0 or offset >= self.windows * self.window_minutes:
+            return None
+        return offset // self.window_minutes
+
+    def _window(self, day: date, index: int) -> PickupWindow:
+        start = self.shift_start + index * self.window_minutes
+        return PickupWindow(day, format_minutes(start), format_minutes(start + self.window_minutes))
+
+    # ------------------ Internal counters ------------------
+    def _spare_for(self, day: date, area: str) -> List[int]:
+        key = (day, area)
+        spare = self._spare.get(key)
+        if spare is None:
+            riders = len(self._by_area.get(area, []))
+            spare = self._spare[key] = [riders * self.window_capacity] * self.windows
+        return spare
+
+    def _load_for(self, day: date, agent_id: str) -> List[int]:
+        key = (day, agent_id)
+        load = self._load.get(key)
+        if load is None:
+            load = self._load[key] = [0] * self.windows
+        return load
+
+    def _take(self, day: date, agent_id: str, window: int) -> None:
+        self._load_for(day, agent_id)[window] += 1
+        self._day_total[(day, agent_id)] = self._day_total.get((day, agent_id), 0) + 1
+        self._spare_for(day, self._agents[agent_id]["area"].upper())[window] -= 1
+
+    def _give_back(self, day: date, agent_id: str, window: int) -> None:
+        load = self._load.get((day, agent_id))
+        if load is None or load[window] == 0:
+            return
+        load[window] -= 1
+        self._day_total[(day, agent_id)] -= 1
+        self._spare_for(day, self._agents[agent_id]["area"].upper())[window] += 1
+
+    def _expire_holds(self) -> None:
+        for hold in self._holds.pop_expired():
+            day, agent_id, window = hold.key
+            self._give_back(day, agent_id, window)
+            logger.info(f"Pickup hold {hold.hold_id} on {agent_id} expired")
+
+    def _pick_agent(self, day: date, area: str, window: int) -> Optional[str]:
+        """Least-loaded rider (over the whole day) with room in `window`."""
+        if self._spare_for(day, area)[window] <= 0:
+            return None
+        best, best_load = None, None
+        for agent_id in self._by_area[area]:
+            load = self._load.get((day, agent_id))
+            if load is None:
+                return agent_id  # nothing booked for this rider yet today
+            if load[window] >= self.window_capacity:
+                continue
+            day_load = self._day_total.get((day, agent_id), 0)
+            if best_load is None or day_load < best_load:
+                best, best_load = agent_id, day_load
+        return best
+
+    # ------------------ Queries ------------------
+    def has_capacity(self, area: str, day: date, pickup_time: str) -> bool:
+        window = self.window_for(pickup_time)
+        if window is None:
+            return False
+        with self._lock:
+            self._expire_holds()
+            return self._spare_for(day, area.upper())[window] > 0
+
+    def next_available(
+        self,
+        area: str,
+        day: date,
+        after_time: str,
+        limit: int = 3,
+        horizon_days: int = SEARCH_HORIZON_DAYS,
+    ) -> List[PickupWindow]:
+        """The next `limit` windows at or after `after_time` on `day` with a free rider."""
+        area = area.upper()
+        if area not in self._by_area:
+            return []
+        after = to_minutes(after_time) - self.shift_start
+        first = max(0, -(-after // self.window_minutes))
+        found: List[PickupWindow] = []
+        with self._lock:
+            self._expire_holds()
+            for offset in range(horizon_days):
+                current = day + timedelta(days=offset)
+                spare = self._spare_for(current, area)
+                for index in range(first if offset == 0 else 0, self.windows):
+                    if spare[index] > 0:
+                        found.append(self._window(current, index))
+                        if len(found) == limit:
+                            return found
+        return found
+
+    # ------------------ Mutations ------------------
+    def hold(self, area: str, day: date, pickup_time: str) -> Optional[Hold]:
+        """Atomically pick a rider for the window containing `pickup_time` and hold the slot."""
+        area, window = area.upper(), self.window_for(pickup_time)
+        if window is None or area not in self._by_area:
+            return None
+        with self._lock:
+            self._expire_holds()
+            agent_id = self._pick_agent(day, area, window)
+            if agent_id is None:
+                return None
+            self._take(day, agent_id, window)
+            slot = self._window(day, window)
+            return self._holds.place(
+                (day, agent_id, window),
+                {
+                    "agent_id": agent_id, "agent_name": self._agents[agent_id]["name"],
+                    "area": area, "date": day, "window": f"{slot.start}-{slot.end}",
+                },
+            )
+
+    def confirm(self, hold_id: str) -> Optional[dict]:
+        """Turn a live hold into a booking. Returns None if the hold is gone or expired."""
+        with self._lock:
+            hold = self._holds.release(hold_id)
+            if hold is None:
+                return None
+            if self._holds.is_expired(hold):
+                day, agent_id, window = hold.key
+                self._give_back(day, agent_id, window)
+                return None
+            return dict(hold.payload)
+
+    def cancel_hold(self, hold_id: str) -> None:
+        with self._lock:
+            hold = self._holds.release(hold_id)
+            if hold is not None:
+                self._give_back(*hold.key)
+
+    def assign(self, agent_id: str, day: date, pickup_time: str) -> bool:
+        """Record an existing booking for a specific rider (seeding). False if it doesn't fit."""
+        window = self.window_for(pickup_time)
+        if window is None or agent_id not in self._agents:
+            return False
+        with self._lock:
+            if self._load_for(day, agent_id)[window] >= self.window_capacity:
+                return False
+            self._take(day, agent_id, window)
+            return True
+
+    def release(self, agent_id: str, day: date, pickup_time: str) -> None:
+        """Free a confirmed pickup's slot (cancellation)."""
+        window = self.window_for(pickup_time)
+        if window is None or agent_id not in self._agents:
+            return
+        with self._lock:
+            self._give_back(day, agent_id, window)
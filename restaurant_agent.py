@@ -1,9 +1,10 @@
 # restaurant_agent.py
 
+import asyncio
+import json
 import os
 import smtplib
 import logging
-import random
 from datetime import datetime, date as dt_date, time as dt_time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -29,6 +30,15 @@ from livekit.agents.llm import ChatMessage
 from livekit import rtc
 from openai import OpenAI
 from context import RESTAURANT_CONTEXT
+from menu_catalog import MenuCatalog
+from menu_matcher import MenuMatcher
+from order_cart import OrderCart
+from upsell_recommender import UpsellRecommender, append_order
+from table_availability import build_from_slot_table
+from state_store import ConflictError, IndexedStore, TransactionalStore, session_id, session_state
+from ids import new_id, normalize_id
+from tool_cache import cached_tool
+from tool_results import OrderPreview, ReservationPreview
 import re
 
 logger = logging.getLogger("restaurant-voice-agent")
@@ -37,9 +47,6 @@ load_dotenv(dotenv_path=".env")
 # OpenAI client for helper calls (mirrors your usage)
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 today = datetime.now().date()
-# Session data fallback
-if not hasattr(RunContext, "session_data"):
-    RunContext.session_data = {}
 
 # --------------------- Sample Conversation between the User and the Agent ------------------------
 """
@@ -60,7 +67,7 @@ if not hasattr(RunContext, "session_data"):
       Would you like me to tell you about a particular section?
 
    - User: What desserts do you have?
-     Tool Called: browse_menu()
+     Tool Called: browse_menu(category="desserts")
      Agent Response:
      Our desserts include Chocolate Lava Cake and Cheesecake. Both are delicious!
 
@@ -79,9 +86,14 @@ if not hasattr(RunContext, "session_data"):
 
 🍕 5. Place Order
    - User: I’d like to order one Margherita pizza and a lemonade.
-     Tool Called: place_order(request={ "name": "Sara Khan", "email": "sara.khan@example.com", "items": [ {"item_name": "Margherita", "quantity": 1},{"item_name": "Lemonade", "quantity": 1}]})
-     Agent Response: That’s one Margherita pizza and a lemonade — your total comes to 1,400 rupees.
-     Would you like to confirm your order or add something else, like garlic bread?
+     Tool Called: add_item(item_name="Margherita", quantity=1)
+     Tool Called: add_item(item_name="Lemonade", quantity=1)
+     Agent Response: One Margherita pizza and a lemonade — that’s 1,400 rupees so far.
+     Would you like anything else, like garlic bread?
+
+   - User: No, that’s all. I’m Sara Khan, sara.khan@example.com.
+     Tool Called: place_order(request={ "name": "Sara Khan", "email": "sara.khan@example.com"})
+     Agent Response: With delivery your total comes to 1,600 rupees. Shall I confirm the order?
 
 🏆 6. Confirm Order
    - User: Yes, please confirm my order.
@@ -198,6 +210,8 @@ MENU = {
 }
 
 
+DELIVERY_CHARGE = 200  # flat delivery fee in Rs.
+
 # Upselling combos (all items now exist in MENU)
 UPSELL_MAP = {
     "Classic Burger": ["Fries", "Coke"],
@@ -207,9 +221,67 @@ UPSELL_MAP = {
 }
 
 
-# In-memory stores
-RESERVATIONS: Dict[str, dict] = {}
-ORDERS: Dict[str, dict] = {}
+# Spoken / transliterated names that STT commonly produces for menu items
+MENU_ALIASES = {
+    "Margherita": ["margarita pizza", "plain pizza", "مارگریٹا پیزا"],
+    "Pepperoni": ["پیپرونی"],
+    "BBQ Chicken": ["barbecue chicken pizza", "bar b q chicken", "باربی کیو چکن"],
+    "Classic Burger": ["burger", "plain burger", "برگر"],
+    "Cheese Burger": ["cheeseburger", "چیز برگر"],
+    "Chicken Corn Soup": ["corn soup", "کارن سوپ"],
+    "Hot & Sour Soup": ["hot n sour", "ہاٹ اینڈ ساور"],
+    "Fries": ["french fries", "chips", "فرائز"],
+    "Garlic Bread": ["گارلک بریڈ"],
+    "Chocolate Lava Cake": ["lava cake", "chocolate cake"],
+    "Brownie with Ice Cream": ["brownie", "براؤنی"],
+    "Coke": ["coca cola", "cola", "کوک"],
+    "Sprite": ["7up", "seven up", "سپرائٹ"],
+    "Lemonade": ["nimbu pani", "lemon water", "لیمونیڈ", "نیمبو پانی"],
+    "Iced Tea": ["ice tea", "آئس ٹی"],
+    "Cold Coffee": ["iced coffee", "کولڈ کافی"],
+    "Fresh Lime Soda": ["lime soda", "soda lime"],
+    "Bottled Water": ["water", "mineral water", "pani", "پانی"],
+}
+
+MENU_MATCHER = MenuMatcher(MENU, aliases=MENU_ALIASES)
+
+# Upsells learned from confirmed orders, seeded with the hand-written combos.
+# Confirmed orders are appended to ORDER_LOG; `python upsell_recommender.py
+# restaurant_orders.jsonl upsell_model.json` rebuilds the model offline.
+# Both paths can be set with RESTAURANT_ORDER_LOG / RESTAURANT_UPSELL_MODEL.
+ORDER_LOG = os.getenv("RESTAURANT_ORDER_LOG", "restaurant_orders.jsonl")
+UPSELL_MODEL_FILE = os.getenv("RESTAURANT_UPSELL_MODEL", "upsell_model.json")
+for _item, _upsells in UPSELL_MAP.items():
+    for _upsell in _upsells:
+        if _upsell not in MENU_MATCHER:
+            logger.warning(f"Upsell item '{_upsell}' not found in MENU — skipped.")
+UPSELLS = UpsellRecommender(
+    {item: [u for u in upsells if u in MENU_MATCHER] for item, upsells in UPSELL_MAP.items()}
+)
+UPSELLS.load_file(UPSELL_MODEL_FILE)
+
+# Spoken names for menu sections
+MENU_SECTION_ALIASES = {
+    "Main Course": ["mains", "main", "entrees", "main dishes", "khana", "کھانا"],
+    "Starters": ["small plates"],
+    "Appetizers": ["appetiser", "snacks"],
+    "Desserts": ["sweets", "sweet dish", "meetha", "میٹھا"],
+    "Drinks": ["beverages", "cold drinks", "mashroobat", "مشروبات"],
+}
+
+MENU_CATALOG = MenuCatalog(MENU, aliases=MENU_SECTION_ALIASES)
+
+
+# In-memory stores (confirmed records only; previews live in each session's state)
+RESERVATIONS = IndexedStore(
+    "reservation",
+    index_on={
+        "email": lambda v: v.strip().lower() if v else None,
+        "phone": lambda v: re.sub(r"\D", "", v)[-10:] or None if v else None,
+        "date": lambda v: str(v) if v else None,
+    },
+)
+ORDERS = TransactionalStore("order")
 
 FILLER_AUDIO = [
     "audio/filler_1.wav",
@@ -307,6 +379,12 @@ TABLE_AVAILABILITY = {
 }
 
 
+# Slots marked False above are treated as standing daily bookings
+TABLE_ENGINE = build_from_slot_table(
+    TABLE_AVAILABILITY, RESTAURANT_INFO["hours"]["open"], RESTAURANT_INFO["hours"]["close"]
+)
+
+
 # ------------------ EMAIL UTILITY ------------------
 def send_email(to_email: str, subject: str, body: str):
     sender_email = os.getenv("EMAIL_USER")
@@ -348,6 +426,21 @@ def normalize_relative_date(input_date: date) -> date:
     return input_date
 
 
+def check_opening_hours(v: dt_time) -> dt_time:
+    # Ensure both times are naive for safe comparison
+    if v.tzinfo is not None:
+        v = v.replace(tzinfo=None)
+
+    open_time = RESTAURANT_INFO["hours"]["open"]
+    close_time = RESTAURANT_INFO["hours"]["close"]
+
+    if v < open_time or v > close_time:
+        raise ValueError(
+            f"Reservation time must be within restaurant hours ({open_time.strftime('%I:%M %p')} – {close_time.strftime('%I:%M %p')})."
+        )
+    return v
+
+
 # ------------------ Pydantic Models ------------------
 class ReservationRequest(BaseModel):
     name: str
@@ -389,19 +482,29 @@ class ReservationRequest(BaseModel):
 
     @field_validator("time")
     def validate_time(cls, v):
-        # Ensure both times are naive for safe comparison
-        if v.tzinfo is not None:
-            v = v.replace(tzinfo=None)
+        return check_opening_hours(v)
 
-        open_time = RESTAURANT_INFO["hours"]["open"]
-        close_time = RESTAURANT_INFO["hours"]["close"]
 
-        if v < open_time or v > close_time:
-            raise ValueError(
-                f"Reservation time must be within restaurant hours ({open_time.strftime('%I:%M %p')} – {close_time.strftime('%I:%M %p')})."
-            )
+class ReservationChange(BaseModel):
+    reservation_id: str
+    date: Optional[dt_date] = None
+    time: Optional[dt_time] = None
+    people: Optional[int] = None
+
+    @field_validator("people")
+    def validate_people(cls, v):
+        if v is not None and v <= 0:
+            raise ValueError("Number of people must be at least 1.")
         return v
 
+    @field_validator("date")
+    def validate_date(cls, v):
+        return normalize_relative_date(v) if v else v
+
+    @field_validator("time")
+    def validate_time(cls, v):
+        return check_opening_hours(v) if v else v
+
 
 class OrderItem(BaseModel):
     item_name: str
@@ -411,7 +514,7 @@ class OrderItem(BaseModel):
 class OrderRequest(BaseModel):
     name: str
     email: EmailStr
-    items: List[OrderItem]  # List of objects instead of a dict
+    items: List[OrderItem] = []  # optional: items can also be added one by one with add_item
 
     @field_validator("name")
     def validate_name(cls, v):
@@ -421,33 +524,65 @@ class OrderRequest(BaseModel):
 
 
 # ------------------ Helper Functions ----------------------------
+def session_cart(context: RunContext) -> OrderCart:
+    """The caller's open cart, created on first use."""
+    state = session_state(context)
+    cart = state.get("cart")
+    if cart is None:
+        cart = state["cart"] = OrderCart()
+    return cart
+
+
+def menu_item_error(item_name: str) -> dict:
+    candidates = MENU_MATCHER.candidates(item_name)
+    if len(candidates) > 1 and candidates[1].confidence >= MENU_MATCHER.min_confidence:
+        error = f"'{item_name}' could be more than one menu item — ask which one they mean."
+    else:
+        error = f"Item '{item_name}' not found in menu."
+    return {"error": error, "did_you_mean": [m.item for m in candidates]}
+
+
+def cart_update(cart: OrderCart, item: str) -> dict:
+    """Small result for a one-line cart change: the line plus running totals."""
+    update = {
+        "item": item,
+        "quantity": cart.quantity(item),
+        "items_in_cart": len(cart),
+        "subtotal_rs": cart.subtotal,
+    }
+    suggestions = UPSELLS.recommend(cart.items())
+    if suggestions:
+        update["suggestions"] = suggestions
+    return update
 
 
-def find_available_table(people: int, requested_time: dt_time) -> dict:
-    """Check if any table for the given group size is available at the requested time."""
-    time_str = requested_time.strftime("%H:%M")
-
-    if people not in TABLE_AVAILABILITY:
-        return {"error": f"No tables configured for {people} people."}
+def cart_preview(cart: OrderCart) -> OrderPreview:
+    preview: OrderPreview = cart.summary(DELIVERY_CHARGE)
+    suggestions = UPSELLS.recommend(cart.items())
+    if suggestions:
+        preview["suggestions"] = suggestions
+    preview["requires_confirmation"] = bool(len(cart))
+    return preview
 
-    tables = TABLE_AVAILABILITY[people]
-    available_tables = [t for t, slots in tables.items() if slots.get(time_str)]
-    if available_tables:
-        return {"available": True, "table": random.choice(available_tables)}
 
-    # If no exact time is available, suggest next available times
-    alternate_times = set()
-    for t, slots in tables.items():
-        for alt_time, available in slots.items():
-            if available:
-                alternate_times.add(alt_time)
 
+def reservation_summary(record: dict) -> dict:
+    """What the caller hears about a stored reservation."""
     return {
-        "available": False,
-        "alternatives": sorted(alternate_times),
+        "reservation_id": record["id"],
+        "name": record["name"],
+        "people": record["people"],
+        "date": dt_date.fromisoformat(record["date"]).strftime("%B %d, %Y"),
+        "time": dt_time.fromisoformat(record["time"]).strftime("%I:%M %p"),
+        "table": record["table"],
+        "status": record["status"],
     }
 
 
+def format_alternatives(times: List[dt_time]) -> str:
+    return ", ".join(t.strftime("%I:%M %p") for t in times)
+
+
 # ------------------ RESTAURANT AGENT ------------------
 class RestaurantAgent(Agent):
     def __init__(self, voice: str = "alloy") -> None:
@@ -491,9 +626,23 @@ class RestaurantAgent(Agent):
 
     # -------- Browse Menu --------
     @function_tool()
-    async def browse_menu(self, context: RunContext) -> dict:
-        """Returns full detailed menu with categories, subcategories, items, and prices."""
-        return MENU
+    @cached_tool()
+    async def browse_menu(
+        self,
+        context: RunContext,
+        category: Optional[str] = None,
+        subcategory: Optional[str] = None,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        headlines_only: bool = False,
+    ) -> str:
+        """
+        Browse one menu section ("pizza", "desserts", "main course") with items and
+        prices, optionally within a price range in Rs. Without a section, returns
+        the headlines: section names, item counts and price ranges. Set
+        headlines_only for a category's sub-sections without the items.
+        """
+        return MENU_CATALOG.browse(category, subcategory, min_price, max_price, headlines_only)
 
     # -------- Make Reservation (Preview) --------
     @function_tool
@@ -501,246 +650,373 @@ class RestaurantAgent(Agent):
         self, context: RunContext, request: ReservationRequest
     ) -> dict:
         """Handles reservation requests, checking table availability."""
-        res_id = f"RES{random.randint(1000,9999)}"
+        res_id = new_id("RES")
         slot_key = f"{request.date}-{request.time.strftime('%H:%M')}"
 
-        # --- Check if table is available ---
-        availability = find_available_table(request.people, request.time)
+        # --- A new preview replaces the previous one; free its table first ---
+        state = session_state(context)
+        previous = state.get("pending_reservation")
+        if previous and previous.get("hold_id"):
+            TABLE_ENGINE.cancel_hold(previous["hold_id"])
 
-        if "error" in availability:
-            return {"error": availability["error"]}
+        # --- Hold the best-fitting free table while the caller confirms ---
+        hold = TABLE_ENGINE.hold(request.date, request.time, request.people)
 
-        if not availability["available"]:
-            alternatives = availability["alternatives"]
-            formatted_times = ", ".join(alternatives)
+        if hold is None:
+            if request.people > TABLE_ENGINE.max_capacity:
+                return {
+                    "error": f"Sorry, our largest table seats {TABLE_ENGINE.max_capacity} people."
+                }
+            alternatives = TABLE_ENGINE.alternatives(
+                request.date, request.time, request.people
+            )
+            if not alternatives:
+                return {
+                    "error": f"Sorry, we have no tables for {request.people} people on {request.date.strftime('%B %d, %Y')}."
+                }
             return {
                 "error": (
                     f"Sorry, no tables for {request.people} people are available at {request.time.strftime('%I:%M %p')}.\n"
-                    f"However, we do have availability at these times: {formatted_times}.\n"
+                    f"However, we do have availability at these times: {format_alternatives(alternatives)}.\n"
                     "Would you like to choose one of these instead?"
                 )
             }
 
         # --- Proceed with booking preview if available ---
-        chosen_table = availability["table"]
-        RESERVATIONS[res_id] = {
+        chosen_table = hold.payload["table"]
+        pending = {
             "id": res_id,
             "table": chosen_table,
             "slot": slot_key,
+            "date": str(request.date),
+            "time": request.time.strftime("%H:%M"),
+            "hold_id": hold.hold_id,
             "name": request.name,
             "email": request.email,
+            "phone": request.phone,
             "people": request.people,
             "status": "pending",
         }
 
-        summary = (
-            f"Here's your reservation preview:\n\n"
-            f"✅ **Table:** {chosen_table}\n"
-            f"**Reservation ID:** {res_id}\n"
-            f"**Name:** {request.name}\n"
-            f"**Number of People:** {request.people}\n"
-            f"**Date & Time:** {request.date.strftime('%B %d, %Y')} at {request.time.strftime('%I:%M %p')}\n\n"
-            f"Please confirm to finalize your reservation."
-        )
-
-        context.session_data["pending_reservation"] = RESERVATIONS[res_id]
-        return {
+        state["pending_reservation"] = pending
+        preview: ReservationPreview = {
             "reservation_id": res_id,
-            "summary": summary,
+            "table": chosen_table,
+            "name": request.name,
+            "people": request.people,
+            "date": request.date.strftime("%B %d, %Y"),
+            "time": request.time.strftime("%I:%M %p"),
             "requires_confirmation": True,
         }
+        return preview
 
     # -------- Confirm Reservation --------
     @function_tool()
-    async def confirm_reservation(self, context: RunContext) -> str:
-        pending = context.session_data.get("pending_reservation")
-        if not pending:
+    async def confirm_reservation(
+        self, context: RunContext, reservation_id: Optional[str] = None
+    ) -> str:
+        """
+        Confirms the pending reservation preview. Safe to retry: confirming the
+        same reservation_id again returns the original confirmation.
+        """
+        state = session_state(context)
+        pending = state.get("pending_reservation")
+        res_id = reservation_id or (pending["id"] if pending else None)
+        if not res_id:
             return "❌ No pending reservation found."
 
-        pending["status"] = "confirmed"
-        RESERVATIONS[pending["id"]] = pending
-        context.session_data.pop("pending_reservation", None)
-
-        table = pending.get("table", "N/A")
-
-        msg = (
-            f"✅ Reservation Confirmed!\n\n"
-            f"Reservation ID: {pending['id']}\n"
-            f"Name: {pending['name']}\n"
-            f"Number of People: {pending['people']}\n"
-            f"Table: {table}\n"
-            f"Date & Time: {pending['slot']}"
-            f"📍 Location: {RESTAURANT_INFO['address']}\n"
-            f"📞 Contact: {RESTAURANT_INFO['phone']}\n"
-            f"📧 Email: {RESTAURANT_INFO['email']}\n\n"
-            f"We look forward to serving you at La Piazza Bistro!"
-        )
+        idempotency_key = f"{session_id(context)}:{res_id}"
+        previous = RESERVATIONS.idempotent_result(idempotency_key)
+        if previous is not None:
+            return previous
+        if not pending or pending["id"] != res_id:
+            return "❌ No pending reservation found."
+
+        def commit() -> str:
+            booking = TABLE_ENGINE.confirm(pending["hold_id"])
+            if booking is None:
+                # Hold expired while the caller was deciding; grab any table still free
+                res_date = dt_date.fromisoformat(pending["date"])
+                res_time = dt_time.fromisoformat(pending["time"])
+                booking = TABLE_ENGINE.book(res_date, res_time, pending["people"])
+                if booking is None:
+                    alternatives = TABLE_ENGINE.alternatives(
+                        res_date, res_time, pending["people"]
+                    )
+                    raise ConflictError(
+                        "❌ Sorry, that table was taken while we were waiting for confirmation. "
+                        f"Available times: {format_alternatives(alternatives) or 'none on that day'}."
+                    )
+
+            record = {k: v for k, v in pending.items() if k != "hold_id"}
+            record["table"] = booking["table"]
+            record["status"] = "confirmed"
+            RESERVATIONS.write(res_id, record, expected_version=0)
+
+            return (
+                f"✅ Reservation Confirmed!\n\n"
+                f"Reservation ID: {record['id']}\n"
+                f"Name: {record['name']}\n"
+                f"Number of People: {record['people']}\n"
+                f"Table: {record['table']}\n"
+                f"Date & Time: {record['slot']}"
+                f"📍 Location: {RESTAURANT_INFO['address']}\n"
+                f"📞 Contact: {RESTAURANT_INFO['phone']}\n"
+                f"📧 Email: {RESTAURANT_INFO['email']}\n\n"
+                f"We look forward to serving you at La Piazza Bistro!"
+            )
+
+        try:
+            msg, created = RESERVATIONS.run_idempotent(idempotency_key, commit)
+        except ConflictError as e:
+            state.pop("pending_reservation", None)
+            return str(e)
 
-        send_email(pending["email"], "Reservation Confirmed", msg)
-        send_email(RESTAURANT_INFO["email"], "New Reservation", msg)
+        state.pop("pending_reservation", None)
+        if created:
+            send_email(pending["email"], "Reservation Confirmed", msg)
+            send_email(RESTAURANT_INFO["email"], "New Reservation", msg)
         return msg
 
-    # -------- Place Order (Preview) --------
+    # -------- Find / Modify / Cancel Reservation --------
     @function_tool()
-    async def place_order(self, context: RunContext, request: OrderRequest) -> dict:
+    async def find_reservation(
+        self,
+        context: RunContext,
+        reservation_id: Optional[str] = None,
+        email: Optional[str] = None,
+        phone: Optional[str] = None,
+    ) -> dict:
+        """Looks up the caller's reservations by reservation ID, email or phone number."""
+        if reservation_id:
+            record = RESERVATIONS.get(normalize_id(reservation_id))
+            records = [record] if record else []
+        elif email:
+            records = RESERVATIONS.find("email", email)
+        elif phone:
+            records = RESERVATIONS.find("phone", phone)
+        else:
+            return {"error": "Please share the reservation ID, email or phone number."}
+
+        if not records:
+            return {"error": "No reservation found for those details."}
+        records.sort(key=lambda r: (r["status"] == "cancelled", r["date"], r["time"]))
+        return {"reservations": [reservation_summary(r) for r in records[:5]]}
+
+    @function_tool()
+    async def modify_reservation(self, context: RunContext, change: ReservationChange) -> dict:
         """
-        Places an order (preview mode). Calculates total, suggests upsells,
-        and prepares a summary for confirmation.
+        Moves a confirmed reservation to a new date and/or time, or changes the
+        party size. Keeps the original booking if nothing is free.
         """
-        order_id = f"ORD{random.randint(1000,9999)}"
-        subtotal = 0
-        upsell_suggestions = []
-        DELIVERY_CHARGE = 200  # flat delivery fee in Rs.
-
-        # --- Helper function to check if an item exists anywhere in MENU
-        def item_exists_in_menu(search_item: str) -> bool:
-            search_item = search_item.lower()
-            for cat, subcats in MENU.items():
-                if all(isinstance(v, dict) for v in subcats.values()):
-                    for sub, items in subcats.items():
-                        for menu_item in items.keys():
-                            if menu_item.lower() == search_item:
-                                return True
-                else:
-                    for menu_item in subcats.keys():
-                        if menu_item.lower() == search_item:
-                            return True
-            return False
-
-        # --- Process each order item
-        for item in request.items:
-            item_name = item.item_name.strip().lower()
-            qty = item.quantity
-            price = None
-
-            # Search for item in nested or flat menus
-            for cat, subcats in MENU.items():
-                # Case 1: Nested menu (e.g., Main Course → Pizza)
-                if all(isinstance(v, dict) for v in subcats.values()):
-                    for sub, items in subcats.items():
-                        for menu_item, menu_price in items.items():
-                            normalized_menu_item = menu_item.lower()
-                            if (
-                                item_name == normalized_menu_item
-                                or item_name == f"{normalized_menu_item} {sub.lower()}"
-                                or item_name == f"{normalized_menu_item} {cat.lower()}"
-                            ):
-                                price = menu_price
-                                item.item_name = menu_item  # Standardize
-                                break
-
-                # Case 2: Flat menu (e.g., Desserts or Drinks)
-                else:
-                    for menu_item, menu_price in subcats.items():
-                        normalized_menu_item = menu_item.lower()
-                        if (
-                            item_name == normalized_menu_item
-                            or item_name == f"{normalized_menu_item} {cat.lower()}"
-                        ):
-                            price = menu_price
-                            item.item_name = menu_item
-                            break
-
-                if price is not None:
-                    break
-
-            if price is None:
-                raise ValueError(f"Item '{item.item_name}' not found in menu.")
-
-            subtotal += price * qty
-
-            # --- Handle upsell suggestions
-            if item.item_name in UPSELL_MAP:
-                for upsell_item in UPSELL_MAP[item.item_name]:
-                    if item_exists_in_menu(upsell_item):
-                        upsell_suggestions.append(upsell_item)
-                    else:
-                        logging.warning(
-                            f"Upsell item '{upsell_item}' not found in MENU — skipped."
-                        )
-
-        # --- Order summary
-        # total = subtotal
-        total = subtotal + DELIVERY_CHARGE
-
-        summary_lines = [
-            f"🧾 Order Preview (ID: {order_id})",
-            f"👤 Customer: {request.name} <{request.email}>",
-            "",
-            "Items:",
-        ]
+        res_id = normalize_id(change.reservation_id)
+        record, version = RESERVATIONS.read(res_id)
+        if record is None:
+            return {"error": f"No reservation found with ID {res_id}."}
+        if record["status"] == "cancelled":
+            return {"error": f"Reservation {res_id} was cancelled. Would you like to make a new one?"}
+
+        old_date, old_time = dt_date.fromisoformat(record["date"]), dt_time.fromisoformat(record["time"])
+        new_date, new_time = change.date or old_date, change.time or old_time
+        people = change.people or record["people"]
+        if people > TABLE_ENGINE.max_capacity:
+            return {"error": f"Sorry, our largest table seats {TABLE_ENGINE.max_capacity} people."}
+
+        def move_table(current: dict) -> Optional[dict]:
+            # Runs only if nobody changed the reservation since we read it
+            booking = TABLE_ENGINE.move(current["table"], old_date, old_time, new_date, new_time, people)
+            if booking is None:
+                return None
+            current.update(
+                table=booking["table"],
+                date=str(new_date),
+                time=new_time.strftime("%H:%M"),
+                slot=f"{new_date}-{new_time.strftime('%H:%M')}",
+                people=people,
+            )
+            return current
+
+        try:
+            updated = RESERVATIONS.update(res_id, version, move_table)
+        except ConflictError:
+            return {"error": "That reservation was just changed elsewhere. Please check it again."}
+        if updated is None:
+            alternatives = TABLE_ENGINE.alternatives(new_date, new_time, people)
+            return {
+                "error": f"Sorry, no table for {people} is free at {new_time.strftime('%I:%M %p')} on {new_date.strftime('%B %d, %Y')}. Your original booking is unchanged.",
+                "alternatives": format_alternatives(alternatives),
+            }
 
-        for item in request.items:
-            summary_lines.append(f"  • {item.item_name} x{item.quantity}")
+        summary = reservation_summary(updated)
+        send_email(updated["email"], "Reservation Updated", f"Your reservation has been updated: {summary}")
+        return {"updated": summary}
 
-        summary_lines.append(f"\n💰 Subtotal: Rs. {subtotal}")
-        summary_lines.append(f"🚚 Delivery Charges: Rs. {DELIVERY_CHARGE}")
-        summary_lines.append(f"🧮 Total (incl. delivery): Rs. {total}")
+    @function_tool()
+    async def cancel_reservation(self, context: RunContext, reservation_id: str) -> dict:
+        """Cancels a confirmed reservation and frees its table."""
+        res_id = normalize_id(reservation_id)
+        record, version = RESERVATIONS.read(res_id)
+        if record is None:
+            return {"error": f"No reservation found with ID {res_id}."}
+        if record["status"] == "cancelled":
+            return {"message": f"Reservation {res_id} is already cancelled."}
+
+        record["status"] = "cancelled"
+        try:
+            RESERVATIONS.write(res_id, record, expected_version=version)
+        except ConflictError:
+            return {"error": "That reservation was just changed elsewhere. Please check it again."}
+        TABLE_ENGINE.release(record["table"], dt_date.fromisoformat(record["date"]), dt_time.fromisoformat(record["time"]))
+
+        send_email(record["email"], "Reservation Cancelled", f"Your reservation {res_id} has been cancelled.")
+        send_email(RESTAURANT_INFO["email"], "Reservation Cancelled", f"Reservation {res_id} ({record['name']}) was cancelled.")
+        return {"cancelled": reservation_summary(record)}
+
+    # -------- Order Cart --------
+    @function_tool()
+    async def add_item(self, context: RunContext, item_name: str, quantity: int = 1) -> dict:
+        """
+        Adds an item to the caller's order, or more of an item already in it.
+        Returns the item's quantity, the running subtotal and upsell suggestions.
+        """
+        if quantity < 1:
+            return {"error": "Quantity must be at least 1."}
+        match = MENU_MATCHER.resolve(item_name)
+        if match is None:
+            return menu_item_error(item_name)
+        cart = session_cart(context)
+        cart.add(match.item, quantity, match.price)
+        return cart_update(cart, match.item)
 
-        if upsell_suggestions:
-            summary_lines.append(
-                f"💡 You might also like: {', '.join(set(upsell_suggestions))}"
-            )
-        summary_lines.append("\nPlease confirm to finalize your order.")
+    @function_tool()
+    async def remove_item(self, context: RunContext, item_name: str) -> dict:
+        """Removes an item from the caller's order."""
+        cart = session_cart(context)
+        match = MENU_MATCHER.resolve(item_name)
+        if match is None or match.item not in cart:
+            return {"error": f"'{item_name}' is not in your order.", "items": cart.items()}
+        cart.remove(match.item)
+        return cart_update(cart, match.item)
 
-        # --- Save pending order
-        ORDERS[order_id] = {
-            "id": order_id,
-            "name": request.name,
-            "email": request.email,
-            "items": {item.item_name: item.quantity for item in request.items},
-            "total": total,
-            "status": "pending",
-        }
-        context.session_data["pending_order"] = ORDERS[order_id]
+    @function_tool()
+    async def update_qty(self, context: RunContext, item_name: str, quantity: int) -> dict:
+        """Sets the quantity of an item in the order (0 removes it)."""
+        if quantity < 0:
+            return {"error": "Quantity can't be negative."}
+        match = MENU_MATCHER.resolve(item_name)
+        if match is None:
+            return menu_item_error(item_name)
+        cart = session_cart(context)
+        cart.set_quantity(match.item, quantity, match.price)
+        return cart_update(cart, match.item)
 
-        # --- Return response
-        return {
-            "order_id": order_id,
-            "summary": "\n".join(summary_lines),
-            "requires_confirmation": True,
-        }
+    @function_tool()
+    async def get_cart(self, context: RunContext) -> OrderPreview:
+        """Returns the full order so far with subtotal, delivery charge and total."""
+        return cart_preview(session_cart(context))
+
+    # -------- Place Order (Preview) --------
+    @function_tool()
+    async def place_order(self, context: RunContext, request: OrderRequest) -> dict:
+        """
+        Sets the customer's name and email on the order, adds any items given,
+        and returns the order preview for confirmation.
+        """
+        # --- Resolve every item first so a bad name leaves the cart untouched
+        matches = []
+        for item in request.items:
+            match = MENU_MATCHER.resolve(item.item_name)
+            if match is None:
+                return menu_item_error(item.item_name)
+            matches.append((match, item.quantity))
+
+        cart = session_cart(context)
+        cart.name, cart.email = request.name, request.email
+        for match, quantity in matches:
+            cart.add(match.item, quantity, match.price)
+        if not len(cart):
+            return {"error": "The order is empty. What would you like to order?"}
+        return cart_preview(cart)
 
     # -------- Confirm Order --------
     @function_tool()
-    async def confirm_order(self, context: RunContext) -> str:
-        DELIVERY_CHARGE = 200
-        pending = context.session_data.get("pending_order")
-        if not pending:
+    async def confirm_order(
+        self, context: RunContext, order_id: Optional[str] = None
+    ) -> str:
+        """
+        Confirms the caller's order (the cart). Safe to retry: confirming the
+        same order_id again returns the original confirmation.
+        """
+        state = session_state(context)
+        cart = state.get("cart")
+        order_id = order_id or (cart.order_id if cart else None)
+        if not order_id:
             return "❌ No pending order found."
 
-        pending["status"] = "confirmed"
-        ORDERS[pending["id"]] = pending
-        context.session_data.pop("pending_order", None)
-
-        # msg = (
-        #     f"✅ Order Confirmed!\n\n"
-        #     f"ID: {pending['id']}\n"
-        #     f"Customer: {pending['name']} <{pending['email']}>\n"
-        #     f"Items: {pending['items']}\n"
-        #     f"Total: Rs. {pending['total']}"
-        # )
-        msg = (
-            f"Dear {pending['name']},\n\n"
-            f"Your order has been successfully confirmed! 🎉\n\n"
-            f"🧾 **Order Details:**\n"
-            f"Order ID: {pending['id']}\n"
-            # f"Items: {pending['items']}\n"
-            f"Items Ordered:\n"
-            + "\n".join(
-                [f"  • {item} x{qty}" for item, qty in pending["items"].items()]
+        idempotency_key = f"{session_id(context)}:{order_id}"
+        previous = ORDERS.idempotent_result(idempotency_key)
+        if previous is not None:
+            return previous
+        if not cart or cart.order_id != order_id or not len(cart):
+            return "❌ No pending order found."
+        if not cart.name or not cart.email:
+            return "❌ Please share your name and email (place_order) before confirming."
+
+        pending = {
+            "id": cart.order_id,
+            "name": cart.name,
+            "email": cart.email,
+            "items": cart.items(),
+            "total": cart.subtotal + DELIVERY_CHARGE,
+            "status": "pending",
+        }
+
+        def commit() -> str:
+            record = dict(pending, status="confirmed")
+            ORDERS.write(order_id, record, expected_version=0)
+
+            # msg = (
+            #     f"✅ Order Confirmed!\n\n"
+            #     f"ID: {pending['id']}\n"
+            #     f"Customer: {pending['name']} <{pending['email']}>\n"
+            #     f"Items: {pending['items']}\n"
+            #     f"Total: Rs. {pending['total']}"
+            # )
+            return (
+                f"Dear {record['name']},\n\n"
+                f"Your order has been successfully confirmed! 🎉\n\n"
+                f"🧾 **Order Details:**\n"
+                f"Order ID: {record['id']}\n"
+                # f"Items: {pending['items']}\n"
+                f"Items Ordered:\n"
+                + "\n".join(
+                    [f"  • {item} x{qty}" for item, qty in record["items"].items()]
+                )
+                + "\n\n"
+                f"Delivery Charges: Rs. {DELIVERY_CHARGE}\n"
+                f"Total Amount: Rs. {record['total']}\n\n"
+                f"Thank you for choosing La Piazza Bistro! 🍽️\n"
+                f"We’ll have your delicious meal delivered shortly.\n\n"
+                f"Warm regards,\n"
+                f"La Piazza Bistro Team"
+            )
+
+        try:
+            msg, created = ORDERS.run_idempotent(idempotency_key, commit)
+        except ConflictError as e:
+            logger.error(f"Order {order_id} could not be confirmed: {e}")
+            return "❌ Sorry, we couldn't confirm this order. Please place it again."
+
+        state.pop("cart", None)
+        if created:
+            # Learn upsells from the order and log it for the offline rebuild
+            UPSELLS.record_order(pending["items"])
+            await asyncio.to_thread(
+                append_order, ORDER_LOG, {"id": order_id, "items": pending["items"], "total": pending["total"]}
             )
-            + "\n\n"
-            f"Delivery Charges: Rs. {DELIVERY_CHARGE}\n"
-            f"Total Amount: Rs. {pending['total']}\n\n"
-            f"Thank you for choosing La Piazza Bistro! 🍽️\n"
-            f"We’ll have your delicious meal delivered shortly.\n\n"
-            f"Warm regards,\n"
-            f"La Piazza Bistro Team"
-        )
 
-        # Send confirmation to both customer and restaurant
-        send_email(pending["email"], "Your Order Confirmation - La Piazza Bistro", msg)
-        send_email(RESTAURANT_INFO["email"], "New Customer Order Received", msg)
+            # Send confirmation to both customer and restaurant
+            send_email(pending["email"], "Your Order Confirmation - La Piazza Bistro", msg)
+            send_email(RESTAURANT_INFO["email"], "New Customer Order Received", msg)
 
         return msg
@@ -0,0 +1,143 @@
+# seat_inventory.py
+"""
+Seat inventory and fare tables per flight and cabin.
+
+Fares are converted from display strings to integer PKR once, when the table
+is built, so pricing a booking is a dict lookup and a multiply. Every
+(flight, cabin) pair has a seats-left counter. A preview holds seats by
+decrementing it under the lock, and the hold expires back into the counter if
+nobody confirms. Two callers racing for the last seats can never both get them.
+"""
+
+import logging
+import threading
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from flight_search import parse_fare
+from holds import DEFAULT_HOLD_TTL_SECONDS, Hold, HoldRegistry
+
+logger = logging.getLogger("seat-inventory")
+
+CABIN_ALIASES = {
+    "economy": "economy", "eco": "economy", "coach": "economy", "standard": "economy",
+    "premium": "premium economy", "premium economy": "premium economy",
+    "business": "business", "biz": "business", "business class": "business",
+    "first": "first", "first class": "first",
+}
+
+
+class FareQuote(NamedTuple):
+    flight_number: str
+    cabin: str
+    fare_each: int
+    total: int
+    seats_left: int
+
+
+def normalize_cabin(text: str) -> Optional[str]:
+    key = " ".join((text or "").lower().replace("class", " ").split())
+    return CABIN_ALIASES.get(key) or CABIN_ALIASES.get(f"{key} class")
+
+
+class SeatInventory:
+    """Per-flight, per-cabin seat counters and integer fare tables with expiring holds."""
+
+    def __init__(
+        self,
+        flights: Iterable[dict],
+        cabin_seats: Dict[str, int],
+        cabin_fare_multiplier: Dict[str, float],
+        hold_ttl_seconds: float = DEFAULT_HOLD_TTL_SECONDS,
+    ) -> None:
+        self._fares: Dict[str, Dict[str, int]] = {}
+        self._seats: Dict[str, Dict[str, int]] = {}
+        for flight in flights:
+            number = flight["flight_number"].upper()
+            base = parse_fare(flight.get("fare", ""))
+            # round cabin fares to the nearest PKR 100, as printed on the fare sheet
+            self._fares[number] = {
+                cabin: int(round(base * cabin_fare_multiplier.get(cabin, 1.0), -2))
+                for cabin in cabin_seats
+            }
+            self._seats[number] = dict(cabin_seats)
+        self._holds = HoldRegistry(ttl_seconds=hold_ttl_seconds)
+        self._lock = threading.Lock()
+
+    def _expire_holds(self) -> None:
+        for hold in self._holds.pop_expired():
+            number, cabin = hold.key
+            self._seats[number][cabin] += hold.payload["passengers"]
+            logger.info(f"Seat hold {hold.hold_id} on {number}/{cabin} expired")
+
+    # ------------------ Queries ------------------
+    def cabins(self, flight_number: str) -> Dict[str, int]:
+        """Seats left per cabin (after live holds)."""
+        with self._lock:
+            self._expire_holds()
+            return dict(self._seats.get(flight_number.upper(), {}))
+
+    def quote(self, flight_number: str, cabin: str, passengers: int) -> Optional[FareQuote]:
+        """Price for `passengers` seats; None for an unknown flight or cabin."""
+        number = flight_number.upper()
+        fare = self._fares.get(number, {}).get(cabin)
+        if fare is None:
+            return None
+        with self._lock:
+            self._expire_holds()
+            seats_left = self._seats[number][cabin]
+        return FareQuote(number, cabin, fare, fare * passengers, seats_left)
+
+    # ------------------ Mutations ------------------
+    def take(self, flight_number: str, cabin: str, passengers: int) -> bool:
+        """Book seats directly (seeding, or confirm without a preview)."""
+        number = flight_number.upper()
+        with self._lock:
+            self._expire_holds()
+            seats = self._seats.get(number)
+            if seats is None or seats.get(cabin, 0) < passengers:
+                return False
+            seats[cabin] -= passengers
+            return True
+
+    def hold(self, flight_number: str, cabin: str, passengers: int) -> Optional[Hold]:
+        """Atomically set aside seats for a preview; None if the cabin can't seat everyone."""
+        number = flight_number.upper()
+        with self._lock:
+            self._expire_holds()
+            seats = self._seats.get(number)
+            if seats is None or seats.get(cabin, 0) < passengers:
+                return None
+            seats[cabin] -= passengers
+            fare = self._fares[number][cabin]
+            return self._holds.place(
+                (number, cabin),
+                {"flight_number": number, "cabin": cabin, "passengers": passengers,
+                 "fare_each": fare, "total": fare * passengers},
+            )
+
+    def confirm(self, hold_id: str) -> Optional[dict]:
+        """Turn a live hold into sold seats. Returns None if the hold is gone or expired."""
+        with self._lock:
+            hold = self._holds.release(hold_id)
+            if hold is None:
+                return None
+            if self._holds.is_expired(hold):
+                number, cabin = hold.key
+                self._seats[number][cabin] += hold.payload["passengers"]
+                return None
+            return dict(hold.payload)
+
+    def cancel_hold(self, hold_id: str) -> None:
+        with self._lock:
+            hold = self._holds.release(hold_id)
+            if hold is not None:
+                number, cabin = hold.key
+                self._seats[number][cabin] += hold.payload["passengers"]
+
+    def release(self, flight_number: str, cabin: str, passengers: int) -> None:
+        """Return sold seats (cancellation)."""
+        number = flight_number.upper()
+        with self._lock:
+            seats = self._seats.get(number)
+            if seats is not None and cabin in seats:
+                seats[cabin] += passengers
@@ -0,0 +1,176 @@
+# state_store.py
+"""
+Per-session state and shared transactional records for the voice agents.
+
+`session_state(context)` replaces the old `RunContext.session_data` class attribute,
+which was one dict shared by every session in the worker. Each AgentSession now
+gets its own dict, dropped automatically when the session is garbage collected.
+
+`TransactionalStore` holds the shared confirmed records (reservations, orders, ...)
+with a version per key for optimistic locking, plus idempotency keys so a retried
+confirm returns the original result instead of creating a duplicate.
+`IndexedStore` adds secondary indexes (email, phone, date, ...) maintained on write.
+"""
+
+import copy
+import threading
+import uuid
+import weakref
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+SESSION_ID_KEY = "_session_id"
+
+_SESSIONS: "weakref.WeakKeyDictionary[Any, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+_SESSIONS_LOCK = threading.Lock()
+
+
+# ------------------ Per-session state ------------------
+def session_state(context: Any) -> Dict[str, Any]:
+    """Private state dict for the AgentSession behind a RunContext."""
+    session = getattr(context, "session", None) or context
+    with _SESSIONS_LOCK:
+        state = _SESSIONS.get(session)
+        if state is None:
+            state = {SESSION_ID_KEY: uuid.uuid4().hex}
+            _SESSIONS[session] = state
+    return state
+
+
+def session_id(context: Any) -> str:
+    """Stable opaque id of the session behind a RunContext."""
+    return session_state(context)[SESSION_ID_KEY]
+
+
+# ------------------ Shared transactional records ------------------
+class ConflictError(Exception):
+    """The record changed (or the resource was taken) since it was read."""
+
+
+class TransactionalStore:
+    """
+    Thread-safe keyed records with optimistic locking and idempotent commits.
+
+    Every key carries a version that starts at 0 (absent) and increments on each
+    write; `write()` only succeeds if the caller saw the current version.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._records: Dict[str, dict] = {}
+        self._versions: Dict[str, int] = {}
+        self._results: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            record = self._records.get(key)
+            return copy.deepcopy(record) if record is not None else None
+
+    def read(self, key: str) -> Tuple[Optional[dict], int]:
+        """Return (copy of record or None, version) for a later `write()`."""
+        with self._lock:
+            return self.get(key), self._versions.get(key, 0)
+
+    def write(self, key: str, record: dict, expected_version: int) -> int:
+        """Compare-and-set a record; raises ConflictError if the version moved."""
+        with self._lock:
+            current = self._versions.get(key, 0)
+            if current != expected_version:
+                raise ConflictError(
+                    f"{self.name} record {key} is at version {current}, expected {expected_version}."
+                )
+            self._records[key] = copy.deepcopy(record)
+            self._versions[key] = current + 1
+            return current + 1
+
+    def update(self, key: str, expected_version: int, fn: Callable[[dict], Optional[dict]]) -> Optional[dict]:
+        """
+        Version-checked update with side effects. Under the store lock, raises
+        ConflictError if the version moved, otherwise calls `fn` with a copy of
+        the record and writes what it returns. `fn` runs only after the check,
+        so it can change other resources (e.g. move a table) without a rollback;
+        it returns None to leave the record unchanged. Returns the new record.
+        """
+        with self._lock:
+            current = self._versions.get(key, 0)
+            if current != expected_version:
+                raise ConflictError(
+                    f"{self.name} record {key} is at version {current}, expected {expected_version}."
+                )
+            record = fn(self.get(key))
+            if record is not None:
+                self.write(key, record, expected_version)
+            return record
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        with self._lock:
+            snapshot = list(self._records.items())
+        for key, record in snapshot:
+            yield key, copy.deepcopy(record)
+
+    def values(self) -> Iterator[dict]:
+        for _, record in self.items():
+            yield record
+
+    # ------------------ Idempotency ------------------
+    def idempotent_result(self, idempotency_key: str) -> Optional[Any]:
+        return self._results.get(idempotency_key)
+
+    def run_idempotent(self, idempotency_key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run `fn` at most once per idempotency key, serialised with other writers.
+        Returns (result, created); a retry gets the first result with created=False.
+        If `fn` raises, nothing is recorded and the call can be retried.
+        """
+        with self._lock:
+            if idempotency_key in self._results:
+                return self._results[idempotency_key], False
+            result = fn()
+            self._results[idempotency_key] = result
+            return result, True
+
+
+class IndexedStore(TransactionalStore):
+    """
+    TransactionalStore with secondary indexes. `index_on` maps a record field to a
+    normalizer (e.g. lower-cased email); records are found by the normalized value.
+    """
+
+    def __init__(self, name: str, index_on: Dict[str, Callable[[Any], Optional[str]]]) -> None:
+        super().__init__(name)
+        self._index_on = index_on
+        self._indexes: Dict[str, Dict[str, Set[str]]] = {field: {} for field in index_on}
+
+    def write(self, key: str, record: dict, expected_version: int) -> int:
+        with self._lock:
+            old = self._records.get(key)
+            version = super().write(key, record, expected_version)
+            for field, normalize in self._index_on.items():
+                old_value = normalize(old.get(field)) if old else None
+                new_value = normalize(record.get(field))
+                if old_value == new_value:
+                    continue
+                if old_value is not None:
+                    keys = self._indexes[field].get(old_value)
+                    if keys:
+                        keys.discard(key)
+                        if not keys:
+                            del self._indexes[field][old_value]
+                if new_value is not None:
+                    self._indexes[field].setdefault(new_value, set()).add(key)
+            return version
+
+    def find(self, field: str, value: Any) -> List[dict]:
+        """Copies of the records whose `field` matches `value` (after normalizing)."""
+        normalized = self._index_on[field](value)
+        if normalized is None:
+            return []
+        with self._lock:
+            keys = sorted(self._indexes[field].get(normalized, ()))
+            return [copy.deepcopy(self._records[key]) for key in keys]
@@ -0,0 +1,258 @@
+# table_availability.py
+"""
+Table availability engine for restaurant reservations.
+
+Each table's day is a bitmap of SLOT_MINUTES slots (bit i = slot i is busy), so
+checking or booking an interval is a single AND/OR. Tables are assigned best-fit
+by capacity, previews take a TTL hold, and all mutation happens under one lock so
+concurrent callers can never double-book a table.
+"""
+
+import bisect
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import date, time
+from typing import Dict, Iterable, List, Optional
+
+from holds import DEFAULT_HOLD_TTL_SECONDS, Hold, HoldRegistry
+
+logger = logging.getLogger("table-availability")
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+DEFAULT_DURATION_MINUTES = 60
+ALTERNATIVE_STEP_MINUTES = 30
+
+
+@dataclass(frozen=True)
+class Table:
+    table_id: str
+    capacity: int
+
+
+def to_minutes(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+
+def from_minutes(minutes: int) -> time:
+    return time(minutes // 60, minutes % 60)
+
+
+def interval_mask(start_minute: int, duration_minutes: int) -> int:
+    """Bitmask of every slot touched by [start, start + duration)."""
+    first = start_minute // SLOT_MINUTES
+    last = min(-(-(start_minute + duration_minutes) // SLOT_MINUTES), SLOTS_PER_DAY)
+    return ((1 << (last - first)) - 1) << first
+
+
+class TableAvailability:
+    """Per-table, per-day slot bitmaps with best-fit assignment and expiring holds."""
+
+    def __init__(
+        self,
+        tables: Iterable[Table],
+        open_time: time,
+        close_time: time,
+        duration_minutes: int = DEFAULT_DURATION_MINUTES,
+        hold_ttl_seconds: float = DEFAULT_HOLD_TTL_SECONDS,
+    ) -> None:
+        self.open_minute = to_minutes(open_time)
+        self.close_minute = to_minutes(close_time)
+        self.duration_minutes = duration_minutes
+
+        self._tables: Dict[str, Table] = {}
+        self._by_capacity: Dict[int, List[str]] = {}
+        for table in sorted(tables, key=lambda t: (t.capacity, t.table_id)):
+            self._tables[table.table_id] = table
+            self._by_capacity.setdefault(table.capacity, []).append(table.table_id)
+        self._capacities = sorted(self._by_capacity)
+
+        self._booked: Dict[date, Dict[str, int]] = {}
+        self._held: Dict[date, Dict[str, int]] = {}
+        self._recurring: Dict[str, int] = {}
+        self._holds = HoldRegistry(ttl_seconds=hold_ttl_seconds)
+        self._pruned_on: Optional[date] = None
+        self._lock = threading.RLock()
+
+    @property
+    def max_capacity(self) -> int:
+        return self._capacities[-1] if self._capacities else 0
+
+    # ------------------ Internal bitmap helpers ------------------
+    def _busy(self, day: date, table_id: str) -> int:
+        return (
+            self._booked.get(day, {}).get(table_id, 0)
+            | self._held.get(day, {}).get(table_id, 0)
+            | self._recurring.get(table_id, 0)
+        )
+
+    def _set_bits(self, store: Dict[date, Dict[str, int]], day: date, table_id: str, mask: int) -> None:
+        tables = store.setdefault(day, {})
+        tables[table_id] = tables.get(table_id, 0) | mask
+
+    def _clear_bits(self, store: Dict[date, Dict[str, int]], day: date, table_id: str, mask: int) -> None:
+        tables = store.get(day)
+        if tables and table_id in tables:
+            tables[table_id] &= ~mask
+
+    def _prune_past_days(self) -> None:
+        """Drop bitmaps for days before today; runs at most once per day."""
+        today = date.today()
+        if self._pruned_on == today:
+            return
+        for store in (self._booked, self._held):
+            for day in [d for d in store if d < today]:
+                del store[day]
+        self._pruned_on = today
+
+    def _expire_holds(self) -> None:
+        self._prune_past_days()
+        for hold in self._holds.pop_expired():
+            day, table_id = hold.key
+            self._clear_bits(self._held, day, table_id, hold.payload["mask"])
+            logger.info(f"Hold {hold.hold_id} on {table_id} expired")
+
+    def _best_fit(self, day: date, mask: int, people: int) -> Optional[str]:
+        start = bisect.bisect_left(self._capacities, people)
+        for capacity in self._capacities[start:]:
+            for table_id in self._by_capacity[capacity]:
+                if not self._busy(day, table_id) & mask:
+                    return table_id
+        return None
+
+    # ------------------ Seeding ------------------
+    def block_daily(self, table_id: str, start: time, duration_minutes: Optional[int] = None) -> None:
+        """Mark an interval as unavailable on every day (standing bookings, demo data)."""
+        mask = interval_mask(to_minutes(start), duration_minutes or self.duration_minutes)
+        with self._lock:
+            self._recurring[table_id] = self._recurring.get(table_id, 0) | mask
+
+    # ------------------ Queries ------------------
+    def is_free(self, table_id: str, day: date, start: time) -> bool:
+        mask = interval_mask(to_minutes(start), self.duration_minutes)
+        with self._lock:
+            self._expire_holds()
+            return not self._busy(day, table_id) & mask
+
+    def find_table(self, day: date, start: time, people: int) -> Optional[str]:
+        """Smallest free table that seats `people` at `start`, or None."""
+        mask = interval_mask(to_minutes(start), self.duration_minutes)
+        with self._lock:
+            self._expire_holds()
+            return self._best_fit(day, mask, people)
+
+    def alternatives(self, day: date, start: time, people: int, limit: int = 3) -> List[time]:
+        """Nearest start times that have a table for `people` and finish by closing."""
+        requested = to_minutes(start)
+        last_start = self.close_minute - self.duration_minutes
+        candidates = range(self.open_minute, last_start + 1, ALTERNATIVE_STEP_MINUTES)
+        ordered = sorted(
+            (m for m in candidates if m != requested),
+            key=lambda m: (abs(m - requested), m),
+        )
+        found: List[time] = []
+        with self._lock:
+            self._expire_holds()
+            for minute in ordered:
+                if self._best_fit(day, interval_mask(minute, self.duration_minutes), people):
+                    found.append(from_minutes(minute))
+                    if len(found) == limit:
+                        break
+        return sorted(found)
+
+    # ------------------ Mutations ------------------
+    def hold(self, day: date, start: time, people: int) -> Optional[Hold]:
+        """Atomically pick a best-fit table and hold it for the preview TTL."""
+        mask = interval_mask(to_minutes(start), self.duration_minutes)
+        with self._lock:
+            self._expire_holds()
+            table_id = self._best_fit(day, mask, people)
+            if table_id is None:
+                return None
+            self._set_bits(self._held, day, table_id, mask)
+            return self._holds.place(
+                (day, table_id),
+                {"table": table_id, "date": day, "time": start, "people": people, "mask": mask},
+            )
+
+    def confirm(self, hold_id: str) -> Optional[dict]:
+        """Turn a live hold into a booking. Returns None if the hold is gone or expired."""
+        with self._lock:
+            hold = self._holds.release(hold_id)
+            if hold is None:
+                return None
+            day, table_id = hold.key
+            mask = hold.payload["mask"]
+            self._clear_bits(self._held, day, table_id, mask)
+            if self._holds.is_expired(hold):
+                return None
+            self._set_bits(self._booked, day, table_id, mask)
+            return {k: v for k, v in hold.payload.items() if k != "mask"}
+
+    def book(self, day: date, start: time, people: int) -> Optional[dict]:
+        """Book directly without a preview hold (e.g. when a hold expired)."""
+        mask = interval_mask(to_minutes(start), self.duration_minutes)
+        with self._lock:
+            self._expire_holds()
+            table_id = self._best_fit(day, mask, people)
+            if table_id is None:
+                return None
+            self._set_bits(self._booked, day, table_id, mask)
+            return {"table": table_id, "date": day, "time": start, "people": people}
+
+    def release(self, table_id: str, day: date, start: time) -> None:
+        """Free a confirmed booking's interval (cancellation or modification)."""
+        mask = interval_mask(to_minutes(start), self.duration_minutes)
+        with self._lock:
+            self._clear_bits(self._booked, day, table_id, mask)
+
+    def move(self, table_id: str, day: date, start: time, new_day: date, new_start: time, people: int) -> Optional[dict]:
+        """
+        Atomically move a confirmed booking to a new time / party size. Only the old
+        and new intervals are touched; if nothing fits, the old booking is kept.
+        """
+        old_mask = interval_mask(to_minutes(start), self.duration_minutes)
+        new_mask = interval_mask(to_minutes(new_start), self.duration_minutes)
+        with self._lock:
+            self._expire_holds()
+            self._clear_bits(self._booked, day, table_id, old_mask)
+            table = self._tables.get(table_id)
+            if table and table.capacity >= people and not self._busy(new_day, table_id) & new_mask:
+                new_table = table_id  # keep the same table when it still fits
+            else:
+                new_table = self._best_fit(new_day, new_mask, people)
+            if new_table is None:
+                self._set_bits(self._booked, day, table_id, old_mask)
+                return None
+            self._set_bits(self._booked, new_day, new_table, new_mask)
+            return {"table": new_table, "date": new_day, "time": new_start, "people": people}
+
+    def cancel_hold(self, hold_id: str) -> None:
+        with self._lock:
+            hold = self._holds.release(hold_id)
+            if hold is not None:
+                day, table_id = hold.key
+                self._clear_bits(self._held, day, table_id, hold.payload["mask"])
+
+
+def build_from_slot_table(
+    slot_table: Dict[int, Dict[str, Dict[str, bool]]], open_time: time, close_time: time
+) -> TableAvailability:
+    """
+    Build an engine from the legacy {capacity: {table: {"HH:MM": available}}} layout;
+    every slot marked False becomes a standing daily block.
+    """
+    tables = [
+        Table(table_id, capacity)
+        for capacity, by_table in slot_table.items()
+        for table_id in by_table
+    ]
+    engine = TableAvailability(tables, open_time, close_time)
+    for by_table in slot_table.values():
+        for table_id, slots in by_table.items():
+            for slot, available in slots.items():
+                if not available:
+                    hour, minute = map(int, slot.split(":"))
+                    engine.block_daily(table_id, time(hour, minute))
+    return engine
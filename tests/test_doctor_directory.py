@@ -0,0 +1,50 @@
+import pytest
+
+from doctor_directory import DoctorDirectory
+
+DOCTORS = {
+    "Dr. Sara Khan": {"specialization": "Cardiologist"},
+    "Dr. Fatima Ahmed": {"specialization": "Pediatrician"},
+    "Dr. Ali Raza": {"specialization": "Dermatologist"},
+    "Dr. Ayesha Khan": {"specialization": "Dermatologist"},
+}
+SYNONYMS = {"Dermatologist": ["skin doctor", "skin"], "Cardiologist": ["heart"]}
+
+
+@pytest.fixture
+def directory() -> DoctorDirectory:
+    return DoctorDirectory(DOCTORS, SYNONYMS)
+
+
+def test_partial_names_rank_the_named_doctor_first(directory):
+    assert directory.search("fat ahm")[0].name == "Dr. Fatima Ahmed"
+    top = directory.search("Dr. Raza")[0]
+    assert (top.name, top.matched_on) == ("Dr. Ali Raza", "name")
+
+
+def test_specialization_synonyms(directory):
+    assert directory.resolve_specialization("I need a skin doctor") == "Dermatologist"
+    assert {m.name for m in directory.search("skin doctor")} == {"Dr. Ali Raza", "Dr. Ayesha Khan"}
+    assert directory.by_specialization("Cardiologist") == ["Dr. Sara Khan"]
+
+
+def test_misheard_name_falls_back_to_fuzzy(directory):
+    top = directory.search("fatma ahmad")[0]
+    assert (top.name, top.matched_on) == ("Dr. Fatima Ahmed", "fuzzy")
+
+
+@pytest.mark.parametrize(
+    "spoken, doctor",
+    [
+        ("Dr. Fatima Ahmed", "Dr. Fatima Ahmed"),
+        ("Dr. Fatima", "Dr. Fatima Ahmed"),
+        ("fatima ahmed", "Dr. Fatima Ahmed"),
+        ("Raza", "Dr. Ali Raza"),
+        ("Sara Khan", "Dr. Sara Khan"),
+        ("Khan", None),  # two doctors
+        ("heart", None),  # a specialization, not a name
+        ("Dr. Nobody", None),
+    ],
+)
+def test_resolve_name_accepts_only_a_single_top_match(directory, spoken, doctor):
+    assert directory.resolve_name(spoken) == doctor
@@ -0,0 +1,52 @@
+from datetime import date, datetime
+
+from doctor_schedule import AppointmentBook, ScheduleCalendar
+
+DOCTORS = {"Dr. Ayesha Khan": {"specialization": "Cardiologist", "timings": "Mon–Fri: 10 AM – 2 PM"}}
+MONDAY = date(2026, 10, 19)
+
+
+def test_check_excludes_window_end():
+    calendar = ScheduleCalendar(DOCTORS)
+    assert calendar.check("Dr. Ayesha Khan", MONDAY, "1:45 PM")[0]
+    assert not calendar.check("Dr. Ayesha Khan", MONDAY, "2 PM")[0]
+    assert not calendar.check("Dr. Ayesha Khan", MONDAY, "9:59 AM")[0]
+
+
+def test_off_grid_time_falls_in_containing_slot():
+    book = AppointmentBook(ScheduleCalendar(DOCTORS))
+    assert book.slot_for("Dr. Ayesha Khan", MONDAY, 10 * 60 + 15) == 10 * 60
+    assert book.slot_for("Dr. Ayesha Khan", MONDAY, 13 * 60 + 59) == 13 * 60 + 30
+    assert book.slot_for("Dr. Ayesha Khan", MONDAY, 14 * 60) is None
+
+
+def test_next_available_starts_at_requested_slot():
+    book = AppointmentBook(ScheduleCalendar(DOCTORS))
+    slot = book.find_next_available(after=datetime(2026, 10, 19, 10, 0), doctors=["Dr. Ayesha Khan"])
+    assert (slot.day, slot.minute) == (MONDAY, 10 * 60)
+    book.reserve("Dr. Ayesha Khan", MONDAY, 10 * 60)
+    slot = book.find_next_available(after=datetime(2026, 10, 19, 10, 0), doctors=["Dr. Ayesha Khan"])
+    assert slot.minute == 10 * 60 + 30
+
+
+def test_bare_and_spoken_hours_resolve_inside_working_hours(monkeypatch):
+    import builtins
+
+    real_import = builtins.__import__
+
+    def no_dateparser(name, *args, **kwargs):
+        if name == "dateparser":
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", no_dateparser)
+    calendar = ScheduleCalendar(DOCTORS)
+    resolve = lambda text: calendar.resolve_time("Dr. Ayesha Khan", MONDAY, text)  # noqa: E731
+    assert resolve("10") == 10 * 60
+    assert resolve("1") == 13 * 60
+    assert resolve("ten o'clock") == 10 * 60
+    assert resolve("half past ten") == 10 * 60 + 30
+    assert resolve("quarter to one") == 12 * 60 + 45
+    assert resolve("half past twelve pm") == 12 * 60 + 30
+    assert calendar.check("Dr. Ayesha Khan", MONDAY, "10")[0]
+    assert resolve("whenever suits") is None
@@ -0,0 +1,58 @@
+from datetime import date
+
+import pytest
+
+from flight_search import DateWindow, parse_travel_dates
+
+TODAY = date(2026, 10, 19)  # a Monday
+
+
+def _day(year: int, month: int, day: int) -> DateWindow:
+    return DateWindow(date(year, month, day), date(year, month, day))
+
+
+@pytest.mark.parametrize(
+    "phrase, window",
+    [
+        ("2026-11-02", _day(2026, 11, 2)),
+        ("today", _day(2026, 10, 19)),
+        ("tomorrow", _day(2026, 10, 20)),
+        ("day after tomorrow", _day(2026, 10, 21)),
+        ("in 3 days", _day(2026, 10, 22)),
+        ("Friday", _day(2026, 10, 23)),
+        ("next Monday", _day(2026, 10, 26)),
+        ("any day next week", DateWindow(date(2026, 10, 26), date(2026, 11, 1))),
+        ("this weekend", DateWindow(date(2026, 10, 24), date(2026, 10, 25))),
+        ("Oct 20", _day(2026, 10, 20)),
+        ("oct. 20th", _day(2026, 10, 20)),
+        ("20 October", _day(2026, 10, 20)),
+        ("the 20th of October", _day(2026, 10, 20)),
+        ("October 20, 2027", _day(2027, 10, 20)),
+        ("Sept 3", _day(2027, 9, 3)),  # already past this year
+        ("next month", DateWindow(date(2026, 11, 1), date(2026, 11, 30))),
+        ("this month", DateWindow(date(2026, 10, 19), date(2026, 10, 31))),
+        ("in December", DateWindow(date(2026, 12, 1), date(2026, 12, 31))),
+    ],
+)
+def test_phrases_parse_without_dateparser(phrase, window):
+    assert parse_travel_dates(phrase, TODAY) == window
+
+
+def test_next_month_in_december_rolls_over():
+    assert parse_travel_dates("next month", date(2026, 12, 5)) == DateWindow(date(2027, 1, 1), date(2027, 1, 31))
+
+
+@pytest.mark.parametrize("phrase", ["Feb 30", "", "blorp"])
+def test_unparseable_phrases_return_none(phrase, monkeypatch):
+    import builtins
+
+    real_import = builtins.__import__
+
+    def no_dateparser(name, *args, **kwargs):
+        if name == "dateparser":
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", no_dateparser)
+    parse_travel_dates.cache_clear()
+    assert parse_travel_dates(phrase, TODAY) is None
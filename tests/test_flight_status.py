@@ -0,0 +1,24 @@
+from flight_status import FlightStatusBoard, FlightStatusIngestor, parse_status_line
+
+FLIGHTS = [{"flight_number": "PK301", "date": "2026-10-19", "status": "Scheduled", "gate": "A1"}]
+
+
+def test_parse_normalizes_timestamp():
+    update = parse_status_line('{"flight": "pk301", "date": "2026-10-19", "ts": "2026-10-19 14:00:00+05:00", "status": "Boarding"}')
+    assert update.flight_number == "PK301"
+    assert update.ts == "2026-10-19T09:00:00Z"
+
+
+def test_parse_rejects_bad_timestamp():
+    assert parse_status_line("PK301,2026-10-19,soon,Delayed,B2") is None
+
+
+def test_mixed_timestamp_formats_order_correctly():
+    board = FlightStatusBoard(FLIGHTS)
+    ingestor = FlightStatusIngestor(board)
+    ingestor.ingest_lines(["PK301,2026-10-19,2026-10-19T09:00:00Z,Boarding,A1"])
+    # 10:00 local UTC+5 is 05:00 UTC: older than the boarding update
+    ingestor.ingest_lines(["PK301,2026-10-19,2026-10-19 10:00:00+05:00,Delayed,B2"])
+    assert board.get("PK301", "2026-10-19")["status"] == "Boarding"
+    ingestor.ingest_lines(["PK301,2026-10-19,2026-10-19 23:00:00,Departed,A1"])
+    assert board.get("PK301", "2026-10-19")["status"] == "Departed"
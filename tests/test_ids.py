@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+import ids
+from ids import created_at, is_valid, new_id
+
+
+@pytest.fixture
+def fresh_sequence(monkeypatch):
+    monkeypatch.setattr(ids, "_sequence", ids._Sequence())
+    return ids._sequence
+
+
+def test_minted_ids_are_valid_and_sortable(fresh_sequence):
+    first = new_id("ORD", now=1_800_000_000)
+    second = new_id("ORD", now=1_800_000_001)
+    assert is_valid(first) and is_valid(second)
+    assert first < second
+    assert created_at(first).timestamp() == 1_800_000_000
+
+
+def test_sequence_overflow_moves_to_next_second(fresh_sequence):
+    now = 1_800_000_000
+    minted = [new_id("ORD", now=now) for _ in range((1 << ids.SEQ_BITS) + 10)]
+    assert len(set(minted)) == len(minted)
+    assert created_at(minted[-1]).timestamp() == now + 1
+
+
+def test_clock_stepping_back_does_not_reuse_sequence(fresh_sequence):
+    minted = {new_id("ORD", now=1_800_000_005) for _ in range(100)}
+    minted |= {new_id("ORD", now=1_800_000_004) for _ in range(100)}
+    assert len(minted) == 200
+
+
+def test_forked_process_draws_its_own_state(fresh_sequence, monkeypatch):
+    monkeypatch.delenv("AGENT_NODE_ID", raising=False)
+    new_id("ORD", now=1_800_000_000)
+    parent_pid = fresh_sequence._pid
+    monkeypatch.setattr(ids.os, "getpid", lambda: parent_pid + 1)
+    new_id("ORD", now=1_800_000_000)
+    assert fresh_sequence._pid == parent_pid + 1
+    assert [next(counter) for counter, _ in fresh_sequence._counters.values()] == [1]
+
+
+def test_minting_never_sleeps(fresh_sequence, monkeypatch):
+    def no_sleep(seconds):
+        raise AssertionError("new_id slept")
+
+    monkeypatch.setattr(ids.time, "sleep", no_sleep)
+    minted = [new_id("ORD") for _ in range((1 << ids.SEQ_BITS) + 10)]
+    assert len(set(minted)) == len(minted)
+
+
+def test_threads_mint_unique_ids(fresh_sequence):
+    minted = []
+
+    def mint() -> None:
+        minted.extend([new_id("ORD", now=1_800_000_000) for _ in range(5000)])
+
+    threads = [threading.Thread(target=mint) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(minted)) == len(minted) == 40000
+
+
+def test_configured_node_id(fresh_sequence, monkeypatch):
+    monkeypatch.setenv("AGENT_NODE_ID", "7")
+    id_ = new_id("ORD", now=1_800_000_000)
+    assert ids._decode(id_[3:-1]) & ((1 << ids.NODE_BITS) - 1) == 7
+
+
+def test_out_of_range_node_id_is_rejected(fresh_sequence, monkeypatch):
+    monkeypatch.setenv("AGENT_NODE_ID", "32")
+    with pytest.raises(ValueError):
+        new_id("ORD")
@@ -0,0 +1,117 @@
+import random
+import time
+
+import pytest
+
+import text_match
+from menu_matcher import MenuMatcher
+from text_match import levenshtein, window_similarity
+
+MENU = {
+    "Appetizers": {"Garlic Bread": 450, "Crispy Chicken Wings": 850},
+    "Main Course": {
+        "Pizzas": {"Margherita": 1400, "Pepperoni": 1600, "BBQ Chicken": 1700},
+        "Burgers": {"Classic Burger": 1100, "Cheese Burger": 1250, "BBQ Beef Burger": 1450},
+        "Pasta": {"Chicken Parmesan": 1500, "Chicken Stroganoff": 1550},
+        "Seafood": {"Grilled Salmon": 2600},
+    },
+    "Desserts": {"Chocolate Lava Cake": 750, "Tiramisu": 800},
+    "Drinks": {"Coke": 200, "Mint Margarita": 450, "Iced Tea": 350},
+}
+
+MENU_ALIASES = {
+    "Coke": ["coca cola", "کوک"],
+    "Classic Burger": ["burger", "plain burger"],
+    "Cheese Burger": ["cheeseburger"],
+    "Chocolate Lava Cake": ["lava cake"],
+}
+
+
+def _reference_levenshtein(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b):
+            current.append(min(previous[j] + (ca != cb), previous[j + 1] + 1, current[j] + 1))
+        previous = current
+    return previous[-1]
+
+
+@pytest.fixture(scope="module")
+def matcher() -> MenuMatcher:
+    return MenuMatcher(MENU, aliases=MENU_ALIASES)
+
+
+def test_levenshtein_matches_reference():
+    rng = random.Random(7)
+    for _ in range(2000):
+        a = "".join(rng.choice("abc d") for _ in range(rng.randint(0, 20)))
+        b = "".join(rng.choice("abc d") for _ in range(rng.randint(0, 20)))
+        expected = _reference_levenshtein(a, b)
+        assert levenshtein(a, b) == expected
+        assert levenshtein(a, b, max_distance=2) == min(expected, 3)
+
+
+def test_extra_query_words_are_not_free():
+    assert window_similarity("zinger burger", "burger") < 0.75
+    assert window_similarity("margarita", "margherita") > window_similarity("margarita", "mint margarita")
+
+
+@pytest.mark.parametrize(
+    "query, item",
+    [
+        ("margherita", "Margherita"),
+        ("pepperoni pizza large", "Pepperoni"),
+        ("lava cake", "Chocolate Lava Cake"),
+        ("کوک", "Coke"),
+        ("cheeseburger", "Cheese Burger"),
+        ("mint margarita", "Mint Margarita"),
+    ],
+)
+def test_exact_names_and_aliases_resolve(matcher, query, item):
+    match = matcher.resolve(query)
+    assert match is not None and match.item == item
+    assert match.confidence == 1.0
+
+
+def test_fuzzy_near_miss_resolves(matcher):
+    match = matcher.resolve("peperoni pizza")
+    assert match is not None and match.item == "Pepperoni"
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("margarita", {"Margherita", "Mint Margarita"}),
+        ("pizza", {"Margherita", "Pepperoni"}),
+        ("chicken", {"BBQ Chicken", "Chicken Parmesan", "Chicken Stroganoff"}),
+    ],
+)
+def test_close_matches_are_ambiguous(matcher, query, expected):
+    assert matcher.resolve(query) is None
+    offered = {m.item for m in matcher.candidates(query, limit=3)}
+    assert len(offered & expected) >= 2
+
+
+def test_different_item_does_not_resolve(matcher):
+    assert matcher.resolve("zinger burger") is None
+
+
+def test_item_scored_on_best_alias(matcher):
+    # "burger" is only an alias of Classic Burger; the name alone would score lower
+    top = matcher.candidates("burgr")[0]
+    assert top.item == "Classic Burger"
+    assert top.confidence >= 0.8
+
+
+def test_fuzzy_lookup_is_sub_millisecond(matcher):
+    queries = ["margarita", "zinger burger", "peperoni pizza", "chiken tika", "salmon"]
+    runs = 20
+    start = time.perf_counter()
+    for _ in range(runs):
+        for query in queries:
+            matcher._cache.clear()
+            text_match._bit_parallel_distance.cache_clear()
+            matcher.resolve(query)
+    per_query = (time.perf_counter() - start) / (runs * len(queries))
+    assert per_query < 0.001
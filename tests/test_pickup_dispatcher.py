@@ -0,0 +1,27 @@
+from datetime import date
+
+from pickup_dispatcher import PickupDispatcher
+
+AGENTS = [
+    {"id": "R1", "name": "Ali", "area": "KHI"},
+    {"id": "R2", "name": "Sara", "area": "KHI"},
+]
+DAY = date(2026, 10, 20)
+
+
+def test_release_without_booking_then_hold():
+    dispatcher = PickupDispatcher(AGENTS)
+    dispatcher.release("R1", DAY, "10:00")  # nothing booked: must be a no-op
+    dispatcher.assign("R2", DAY, "11:00")
+    hold = dispatcher.hold("KHI", DAY, "10:30")
+    assert hold is not None
+    assert hold.payload["agent_id"] == "R1"
+
+
+def test_hold_prefers_least_loaded_rider():
+    dispatcher = PickupDispatcher(AGENTS)
+    dispatcher.assign("R1", DAY, "09:00")
+    dispatcher.assign("R1", DAY, "12:00")
+    dispatcher.assign("R2", DAY, "13:00")
+    hold = dispatcher.hold("KHI", DAY, "10:00")
+    assert hold.payload["agent_id"] == "R2"
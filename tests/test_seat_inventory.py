@@ -0,0 +1,67 @@
+import threading
+
+from seat_inventory import SeatInventory, normalize_cabin
+
+FLIGHTS = [{"flight_number": "PK301", "fare": "PKR 20,050"}]
+CABIN_SEATS = {"economy": 10, "business": 2}
+MULTIPLIER = {"economy": 1.0, "business": 2.5}
+
+
+def _seats(**kwargs) -> SeatInventory:
+    return SeatInventory(FLIGHTS, CABIN_SEATS, MULTIPLIER, **kwargs)
+
+
+def test_fares_are_integer_pkr_per_cabin():
+    quote = _seats().quote("pk301", "business", 2)
+    assert (quote.fare_each, quote.total, quote.seats_left) == (50100, 100200, 2)
+    assert normalize_cabin("Business Class") == "business"
+    assert _seats().quote("PK999", "economy", 1) is None
+
+
+def test_holds_and_takes_never_oversell():
+    seats = _seats()
+    assert seats.hold("PK301", "business", 2) is not None
+    assert seats.hold("PK301", "business", 1) is None
+    assert not seats.take("PK301", "business", 1)
+    assert seats.cabins("PK301")["business"] == 0
+
+
+def test_racing_callers_get_exactly_the_seats_there_are():
+    seats, won = _seats(), []
+
+    def grab() -> None:
+        if seats.take("PK301", "economy", 3):
+            won.append(3)
+
+    threads = [threading.Thread(target=grab) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(won) == 9
+    assert seats.cabins("PK301")["economy"] == 1
+
+
+def test_expired_hold_returns_its_seats():
+    seats = _seats(hold_ttl_seconds=0)
+    seats.hold("PK301", "business", 2)
+    assert seats.cabins("PK301")["business"] == 2
+
+
+def test_confirming_an_expired_hold_fails_and_frees_seats_once():
+    seats = _seats(hold_ttl_seconds=0)
+    hold = seats.hold("PK301", "business", 2)
+    assert seats.confirm(hold.hold_id) is None
+    assert seats.confirm(hold.hold_id) is None
+    assert seats.cabins("PK301")["business"] == 2
+
+
+def test_live_hold_confirms_and_cancelled_hold_gives_seats_back():
+    seats = _seats()
+    hold = seats.hold("PK301", "business", 2)
+    assert seats.confirm(hold.hold_id)["total"] == 100200
+    assert seats.cabins("PK301")["business"] == 0
+    held = seats.hold("PK301", "economy", 4)
+    seats.cancel_hold(held.hold_id)
+    seats.cancel_hold(held.hold_id)
+    assert seats.cabins("PK301")["economy"] == 10
@@ -0,0 +1,42 @@
+import pytest
+
+from state_store import ConflictError, IndexedStore
+
+
+def _store() -> IndexedStore:
+    store = IndexedStore("reservations", {"date": lambda d: d or None})
+    store.write("RES1", {"table": "T1", "date": "2026-10-20", "people": 2}, expected_version=0)
+    return store
+
+
+def test_update_runs_side_effect_only_after_version_check():
+    store = _store()
+    _, version = store.read("RES1")
+    store.write("RES1", {"table": "T2", "date": "2026-10-20", "people": 2}, expected_version=version)
+    calls = []
+    with pytest.raises(ConflictError):
+        store.update("RES1", version, lambda record: calls.append(record) or record)
+    assert calls == []
+    assert store.get("RES1")["table"] == "T2"
+
+
+def test_update_writes_result_and_keeps_indexes():
+    store = _store()
+    _, version = store.read("RES1")
+
+    def move(record: dict) -> dict:
+        record.update(table="T3", date="2026-10-21")
+        return record
+
+    updated = store.update("RES1", version, move)
+    assert updated["table"] == "T3"
+    assert store.read("RES1") == (updated, version + 1)
+    assert store.find("date", "2026-10-20") == []
+    assert [r["table"] for r in store.find("date", "2026-10-21")] == ["T3"]
+
+
+def test_update_returning_none_leaves_record():
+    store = _store()
+    _, version = store.read("RES1")
+    assert store.update("RES1", version, lambda record: None) is None
+    assert store.read("RES1")[1] == version
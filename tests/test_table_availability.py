@@ -0,0 +1,72 @@
+from datetime import date, time
+
+from table_availability import Table, TableAvailability
+
+DAY = date(2099, 10, 20)
+TABLES = [Table("T2", 2), Table("T4", 4), Table("T6", 6)]
+
+
+def _engine(**kwargs) -> TableAvailability:
+    return TableAvailability(TABLES, time(12, 0), time(22, 0), **kwargs)
+
+
+def test_best_fit_picks_smallest_free_table():
+    engine = _engine()
+    assert engine.book(DAY, time(19, 0), 2)["table"] == "T2"
+    assert engine.book(DAY, time(19, 0), 2)["table"] == "T4"
+    assert engine.book(DAY, time(19, 0), 3)["table"] == "T6"
+    assert engine.book(DAY, time(19, 0), 1) is None
+    assert engine.find_table(DAY, time(20, 0), 5) == "T6"  # 19:00 booking has ended
+
+
+def test_alternatives_finish_by_closing():
+    engine = _engine()
+    assert engine.alternatives(DAY, time(21, 30), 2) == [time(20, 0), time(20, 30), time(21, 0)]
+    for table in TABLES:
+        engine.block_daily(table.table_id, time(20, 0), duration_minutes=120)
+    assert engine.alternatives(DAY, time(21, 0), 2) == [time(18, 0), time(18, 30), time(19, 0)]
+
+
+def test_expired_hold_frees_the_table_and_cannot_be_confirmed():
+    engine = _engine(hold_ttl_seconds=0)
+    hold = engine.hold(DAY, time(19, 0), 2)
+    assert hold.payload["table"] == "T2"
+    assert engine.is_free("T2", DAY, time(19, 0))
+    assert engine.confirm(hold.hold_id) is None
+
+
+def test_live_hold_blocks_until_confirmed_or_cancelled():
+    engine = _engine()
+    first = engine.hold(DAY, time(19, 0), 2)
+    assert engine.hold(DAY, time(19, 0), 2).payload["table"] == "T4"
+    engine.cancel_hold(first.hold_id)
+    assert engine.is_free("T2", DAY, time(19, 0))
+    assert engine.confirm(first.hold_id) is None
+    second = engine.hold(DAY, time(19, 0), 2)
+    assert engine.confirm(second.hold_id)["table"] == "T2"
+    assert not engine.is_free("T2", DAY, time(19, 0))
+
+
+def test_move_keeps_table_when_it_fits_and_rolls_back_when_nothing_does():
+    engine = _engine()
+    engine.book(DAY, time(19, 0), 2)
+    moved = engine.move("T2", DAY, time(19, 0), DAY, time(20, 0), 2)
+    assert moved["table"] == "T2"
+    assert engine.is_free("T2", DAY, time(19, 0))
+
+    moved = engine.move("T2", DAY, time(20, 0), DAY, time(20, 0), 4)
+    assert moved["table"] == "T4"
+    assert engine.is_free("T2", DAY, time(20, 0))
+
+    engine.book(DAY, time(21, 0), 6)
+    assert engine.move("T4", DAY, time(20, 0), DAY, time(21, 0), 6) is None
+    assert not engine.is_free("T4", DAY, time(20, 0))  # old booking kept
+
+
+def test_past_days_are_pruned():
+    engine = _engine()
+    engine.book(date(2020, 1, 1), time(19, 0), 2)
+    engine.book(DAY, time(19, 0), 2)
+    engine._pruned_on = None  # as if the date rolled over
+    engine.is_free("T2", DAY, time(19, 0))
+    assert list(engine._booked) == [DAY]
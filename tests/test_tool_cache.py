@@ -0,0 +1,43 @@
+import asyncio
+
+from tool_cache import cache_stats, cached_tool
+
+
+def make_tools():
+    class Tools:
+        calls = 0
+
+        @cached_tool(ttl_seconds=60, max_entries=2)
+        async def lookup(self, field=None, context=None) -> dict:
+            Tools.calls += 1
+            return {"field": field}
+
+    return Tools
+
+
+def test_results_are_shared_across_sessions():
+    tools = make_tools()
+    name = tools.lookup.__qualname__
+    before = cache_stats().get(name, {"hits": 0, "misses": 0})
+
+    async def run() -> None:
+        first = await tools().lookup("phone", context=object())
+        again = await tools().lookup("phone", context=object())
+        assert first is again  # shared object: callers must not mutate it
+        await tools().lookup("email")
+
+    asyncio.run(run())
+    assert tools.calls == 2
+    stats = cache_stats()[name]
+    assert (stats["hits"] - before["hits"], stats["misses"] - before["misses"]) == (1, 2)
+
+
+def test_cache_is_bounded():
+    tools = make_tools()
+
+    async def run() -> None:
+        for field in ("a", "b", "c", "a"):
+            await tools().lookup(field)
+
+    asyncio.run(run())
+    assert tools.calls == 4  # "a" was evicted by "c"
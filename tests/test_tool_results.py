@@ -0,0 +1,101 @@
+import asyncio
+
+from customer_store import CustomerStore, payment_cursor
+from tool_results import ELLIPSIS, enforce_budget, estimate_tokens, token_budget
+
+EMAIL = "sara@example.com"
+
+
+def _store(payment_count: int) -> CustomerStore:
+    store = CustomerStore()
+    store.bulk_load(
+        {EMAIL: {"name": "Sara", "policies": [{"policy_number": "POL-1", "type": "Car", "premium": 5000}]}},
+        payments={
+            EMAIL: [
+                {
+                    "transaction_id": f"TXN{i:04d}",
+                    "policy_number": "POL-1",
+                    "date": f"2026-{1 + i // 28:02d}-{1 + i % 28:02d}",
+                    "amount": 5000 + i,
+                    "method": "Credit card ending in 4242",
+                }
+                for i in range(payment_count)
+            ]
+        },
+    )
+    return store
+
+
+def test_budget_trimmed_pages_still_reach_every_row():
+    store = _store(28)
+
+    @token_budget(cursors={"payments": payment_cursor})
+    async def payment_history(cursor=None, limit=20) -> dict:
+        # mirrors get_payment_history in list mode
+        payments, next_cursor = store.payments_page(EMAIL, limit, cursor)
+        result = {"payments": payments}
+        if next_cursor:
+            result["next_cursor"] = next_cursor
+        return result
+
+    async def page_through() -> list:
+        seen, cursor, pages = [], None, 0
+        while True:
+            page = await payment_history(cursor=cursor)
+            pages += 1
+            assert "payments_omitted" not in page
+            seen += [p["transaction_id"] for p in page["payments"]]
+            cursor = page.get("next_cursor")
+            if cursor is None:
+                return seen
+            assert pages < 28
+
+    seen = asyncio.run(page_through())
+    assert len(seen) == 28
+    assert sorted(seen) == sorted(f"TXN{i:04d}" for i in range(28))
+
+
+def test_estimate_tokens_counts_compact_json():
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+    assert estimate_tokens({"a": 1}) == 2  # '{"a":1}' is 7 characters
+
+
+def test_results_within_budget_pass_through_untouched():
+    result = {"claims": [{"claim_id": "CLM1"}], "summary": {"open": 1}}
+    assert enforce_budget(result, 400) is result
+    assert enforce_budget(["a" * 4000], 10) == ["a" * 4000]  # only dicts and strings are trimmed
+
+
+def test_longest_list_is_trimmed_first_and_omitted_rows_counted():
+    result = {
+        "policies": [{"policy_number": f"POL-{i}"} for i in range(3)],
+        "claims": [{"claim_id": f"CLM{i:03d}", "description": "Windscreen damage"} for i in range(50)],
+    }
+    trimmed = enforce_budget(result, 200)
+    assert estimate_tokens(trimmed) <= 200
+    assert trimmed["policies"] == result["policies"]
+    kept = len(trimmed["claims"])
+    assert 0 < kept < 50 and trimmed["claims_omitted"] == 50 - kept
+    assert trimmed["claims"] == result["claims"][:kept]
+    assert len(result["claims"]) == 50  # the tool's own result is not mutated
+
+
+def test_long_strings_are_truncated_but_cursors_are_not():
+    result = {"note": "word " * 400, "next_cursor": "c" * 60}
+    trimmed = enforce_budget(result, 50)
+    assert trimmed["note"].endswith(ELLIPSIS) and len(trimmed["note"]) < len(result["note"])
+    assert trimmed["next_cursor"] == result["next_cursor"]
+    assert enforce_budget("x" * 100, 5) == "x" * 19 + ELLIPSIS
+
+
+def test_decorator_trims_and_keeps_the_tool_name():
+    @token_budget(max_tokens=30)
+    async def list_claims() -> dict:
+        """Claims for a customer."""
+        return {"claims": [f"CLM{i:03d}" for i in range(40)]}
+
+    result = asyncio.run(list_claims())
+    assert list_claims.__name__ == "list_claims" and list_claims.__doc__ == "Claims for a customer."
+    assert result["claims_omitted"] == 40 - len(result["claims"])
+    assert estimate_tokens(result) <= 30
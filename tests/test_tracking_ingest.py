@@ -0,0 +1,129 @@
+import asyncio
+import socket
+import threading
+import time
+
+from line_feed import normalize_ts
+from tracking_ingest import TrackingIngestor, parse_scan
+from tracking_store import TrackingStore
+
+
+def _store() -> TrackingStore:
+    return TrackingStore.from_records(
+        {
+            "AWB1": {
+                "status": "In Transit",
+                "events": [{"ts": "2026-10-19 08:00:00.123456", "text": "Received at KHI"}],
+            }
+        }
+    )
+
+
+def test_normalize_ts_formats():
+    assert normalize_ts("2026-10-19T09:00:00Z") == "2026-10-19T09:00:00Z"
+    assert normalize_ts("2026-10-19 23:00:00") == "2026-10-19T23:00:00Z"
+    assert normalize_ts("2026-10-19T14:00:00+05:00") == "2026-10-19T09:00:00Z"
+    assert normalize_ts(0) == "1970-01-01T00:00:00Z"
+    assert normalize_ts("yesterday") is None
+    assert normalize_ts("") is None
+
+
+def test_parse_scan_rejects_bad_timestamp():
+    assert parse_scan("AWB1,not-a-time,Delivered,LHE") is None
+    awb, event = parse_scan('{"awb": "AWB1", "ts": "2026-10-19T14:00:00+05:00", "status": "Delivered"}')
+    assert (awb, event.ts) == ("AWB1", "2026-10-19T09:00:00Z")
+
+
+def test_feed_scan_after_manual_event_is_not_late():
+    store = _store()
+    store.append_event("AWB1", "Out for Delivery", ts="2026-10-19 09:00:00")
+    ingestor = TrackingIngestor(store)
+    assert ingestor.ingest_lines(["AWB1,2026-10-19T10:00:00Z,Delivered,LHE"]) == 1
+    assert store.status("AWB1")["status"] == "Delivered"
+
+
+def test_late_scan_does_not_roll_status_back():
+    store = _store()
+    ingestor = TrackingIngestor(store)
+    ingestor.ingest_lines(["AWB1,2026-10-19T10:00:00Z,Delivered,LHE"])
+    ingestor.ingest_lines(["AWB1,2026-10-19 14:00:00+05:00,Out for Delivery,LHE"])
+    assert store.status("AWB1")["status"] == "Delivered"
+
+
+def test_replay_in_another_format_is_deduplicated():
+    store = _store()
+    ingestor = TrackingIngestor(store)
+    ingestor.ingest_lines(["AWB1,2026-10-19T10:00:00Z,Delivered,LHE"])
+    ingestor.ingest_lines(['{"awb": "AWB1", "ts": "2026-10-19 15:00:00+05:00", "status": "Delivered"}'])
+    assert store.event_count("AWB1") == 2
+
+
+def test_serve_ingests_off_the_event_loop():
+    store = _store()
+    threads = []
+
+    class RecordingIngestor(TrackingIngestor):
+        def ingest_lines(self, lines):
+            threads.append(threading.current_thread())
+            return super().ingest_lines(lines)
+
+    async def run() -> None:
+        server = await RecordingIngestor(store).serve("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        _, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"AWB1,2026-10-19T10:00:00Z,Delivered,LHE\n")
+        await writer.drain()
+        writer.close()
+        for _ in range(100):
+            if store.status("AWB1")["status"] == "Delivered":
+                break
+            await asyncio.sleep(0.01)
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(run())
+    assert store.status("AWB1")["status"] == "Delivered"
+    assert threads and all(t is not threading.main_thread() for t in threads)
+
+
+def _wait_for(condition) -> bool:
+    for _ in range(200):
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_tail_waits_for_a_missing_file(tmp_path):
+    store, path = _store(), tmp_path / "scans.csv"
+    stop = threading.Event()
+    tail = threading.Thread(target=TrackingIngestor(store).tail_file, args=(str(path), stop, 0.01, 0.01))
+    tail.start()
+    try:
+        time.sleep(0.05)
+        assert tail.is_alive()
+        path.write_text("AWB1,2026-10-19T10:00:00Z,Delivered,LHE\n")
+        assert _wait_for(lambda: store.status("AWB1")["status"] == "Delivered")
+    finally:
+        stop.set()
+        tail.join(timeout=1)
+
+
+def test_start_serve_runs_without_a_caller_loop():
+    store = _store()
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    stop = TrackingIngestor(store).start_serve("127.0.0.1", port)
+    try:
+        for _ in range(200):
+            try:
+                conn = socket.create_connection(("127.0.0.1", port))
+                break
+            except OSError:
+                time.sleep(0.01)
+        with conn:
+            conn.sendall(b"AWB1,2026-10-19T10:00:00Z,Delivered,LHE\n")
+        assert _wait_for(lambda: store.status("AWB1")["status"] == "Delivered")
+    finally:
+        stop.set()
@@ -0,0 +1,44 @@
+import json
+
+from upsell_recommender import UpsellRecommender, append_order, main, read_order_log
+
+SEED = {"Margherita Pizza": ["Garlic Bread", "Cold Coffee"]}
+
+
+def test_seed_leads_until_orders_disagree():
+    recommender = UpsellRecommender(SEED)
+    assert recommender.recommend(["Margherita Pizza"]) == ["Cold Coffee", "Garlic Bread"]
+    for _ in range(5):
+        recommender.record_order(["Margherita Pizza", "Fresh Lime Soda"])
+    assert recommender.recommend(["Margherita Pizza"], k=1) == ["Fresh Lime Soda"]
+
+
+def test_recommend_skips_items_already_in_cart():
+    recommender = UpsellRecommender(SEED)
+    assert "Garlic Bread" not in recommender.recommend(["Margherita Pizza", "Garlic Bread"])
+    assert recommender.recommend(["Unknown Dish"]) == []
+
+
+def test_snapshot_round_trips_through_offline_rebuild(tmp_path):
+    log, model = tmp_path / "orders.jsonl", tmp_path / "model.json"
+    for i in range(3):
+        assert append_order(str(log), {"id": f"ORD{i}", "items": {"Pasta": 1, "Garlic Bread": 2}, "total": 900})
+    with open(log, "a", encoding="utf-8") as f:
+        f.write("not json\n\n")
+    assert list(read_order_log(str(log))) == [["Pasta", "Garlic Bread"]] * 3
+
+    assert main([str(log), str(model)]) == 0
+    recommender = UpsellRecommender()
+    assert recommender.load_file(str(model))
+    assert recommender.recommend(["Pasta"]) == ["Garlic Bread"]
+    assert json.loads(model.read_text())["orders"] == {"Pasta": 3, "Garlic Bread": 3}
+
+
+def test_file_errors_are_logged_not_raised(tmp_path):
+    assert not append_order(str(tmp_path / "missing" / "orders.jsonl"), {"id": "ORD1", "items": {}})
+    corrupt = tmp_path / "model.json"
+    corrupt.write_text("{truncated")
+    recommender = UpsellRecommender(SEED)
+    assert not recommender.load_file(str(corrupt))
+    assert not recommender.load_file(str(tmp_path / "absent.json"))
+    assert recommender.recommend(["Margherita Pizza"]) == ["Cold Coffee", "Garlic Bread"]
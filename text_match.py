@@ -0,0 +1,199 @@
+# text_match.py
+"""Small text-matching helpers shared by the agents' fuzzy lookups."""
+
+import re
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+_NON_WORD_RE = re.compile(r"[^\w\s]+", re.UNICODE)
+_SPACE_RE = re.compile(r"\s+")
+
+EDIT_DISTANCE_CACHE_SIZE = 4096
+
+
+# ------------------ Normalization ------------------
+def normalize_text(text: str) -> str:
+    """Casefold, drop punctuation and collapse whitespace (keeps Urdu letters)."""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    text = text.replace("&", " and ")
+    text = _NON_WORD_RE.sub(" ", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def char_ngrams(text: str, n: int = 3) -> Set[str]:
+    """Character n-grams of a normalized string, padded so short words still index."""
+    padded = f" {text} "
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i : i + n] for i in range(len(padded) - n + 1)}
+
+
+# ------------------ Edit distance ------------------
+def levenshtein(a: str, b: str, max_distance: Optional[int] = None) -> int:
+    """
+    Levenshtein distance with Myers' bit-parallel algorithm: one pass over the
+    longer string, a handful of integer operations per character instead of a
+    full DP row. If max_distance is given, anything larger is reported as
+    max_distance + 1. Recent pairs are memoized: fuzzy lookups compare the same
+    word windows against many aliases of one item.
+    """
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        distance = len(a)
+    elif max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+    else:
+        distance = _bit_parallel_distance(b, a)
+    if max_distance is not None and distance > max_distance:
+        return max_distance + 1
+    return distance
+
+
+@lru_cache(maxsize=EDIT_DISTANCE_CACHE_SIZE)
+def _bit_parallel_distance(pattern: str, text: str) -> int:
+    """Myers/Hyyrö global edit distance; bit i of the vectors tracks pattern[i]."""
+    peq: Dict[str, int] = {}
+    for i, ch in enumerate(pattern):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+    full = (1 << len(pattern)) - 1
+    last = 1 << (len(pattern) - 1)
+    pv, mv, distance = full, 0, len(pattern)
+    for ch in text:
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & last:
+            distance += 1
+        elif mh & last:
+            distance -= 1
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+    return distance
+
+
+def similarity(a: str, b: str, floor: float = 0.0) -> float:
+    """Edit-distance similarity in [0, 1]; anything below `floor` is reported as 0."""
+    longest = max(len(a), len(b))
+    if longest == 0:
+        return 1.0
+    max_distance = int((1.0 - floor) * longest)
+    distance = levenshtein(a, b, max_distance=max_distance)
+    if distance > max_distance:
+        return 0.0
+    return 1.0 - distance / longest
+
+
+def window_similarity(query: str, candidate: str, floor: float = 0.0) -> float:
+    """
+    Word-window similarity between a spoken query and a candidate name.
+
+    A query that only names part of the candidate ("lava cake") is penalized, so
+    a full-name near miss ("margarita" → Margherita) is not beaten by a partial
+    exact hit (Mint Margarita). Extra query words cost more still: "zinger burger"
+    names a different item, not a Classic Burger.
+    """
+    q_tokens = query.split()
+    c_tokens = candidate.split()
+    if len(q_tokens) == len(c_tokens):
+        return similarity(query, candidate, floor)
+
+    if len(q_tokens) > len(c_tokens):
+        longer, shorter, weight = q_tokens, candidate, 0.6
+    else:
+        longer, shorter, weight = c_tokens, query, 0.5
+
+    width = len(shorter.split())
+    penalty = 1.0 - weight + weight * width / len(longer)
+    best = similarity(query, candidate, floor)
+    for start in range(len(longer) - width + 1):
+        window = " ".join(longer[start : start + width])
+        # Length difference alone caps the score; skip windows that cannot win
+        bound = 1.0 - abs(len(window) - len(shorter)) / max(len(window), len(shorter))
+        if bound * penalty <= best:
+            continue
+        best = max(best, similarity(window, shorter, max(floor, best / penalty)) * penalty)
+    return best
+
+
+# ------------------ N-gram inverted index ------------------
+class NGramIndex:
+    """Inverted index from character n-grams to entry ids, scored with the Dice coefficient."""
+
+    def __init__(self, n: int = 3) -> None:
+        self.n = n
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._sizes: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def add(self, text: str) -> int:
+        """Index a normalized string and return its entry id."""
+        entry_id = len(self._sizes)
+        grams = char_ngrams(text, self.n)
+        for gram in grams:
+            self._postings[gram].append(entry_id)
+        self._sizes.append(len(grams))
+        return entry_id
+
+    def search(self, text: str, limit: int = 10) -> List[Tuple[int, float]]:
+        """Return up to `limit` (entry_id, dice_score) pairs, best first."""
+        grams = char_ngrams(text, self.n)
+        hits: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for entry_id in self._postings.get(gram, ()):
+                hits[entry_id] += 1
+        scored = [
+            (entry_id, 2.0 * count / (len(grams) + self._sizes[entry_id]))
+            for entry_id, count in hits.items()
+        ]
+        scored.sort(key=lambda pair: pair[1], reverse=True)
+        return scored[:limit]
+
+
+# ------------------ Prefix trie ------------------
+class _TrieNode:
+    __slots__ = ("children", "values")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.values: Set[int] = set()
+
+
+class PrefixTrie:
+    """
+    Maps every prefix of the inserted words to the ids stored under them, so a
+    prefix lookup costs O(len(prefix)) no matter how many words are indexed.
+    """
+
+    def __init__(self) -> None:
+        self._root = _TrieNode()
+        self._words: Dict[str, Set[int]] = defaultdict(set)
+
+    def insert(self, word: str, value: int) -> None:
+        node = self._root
+        for ch in word:
+            node = node.children.setdefault(ch, _TrieNode())
+            node.values.add(value)
+        self._words[word].add(value)
+
+    def prefix(self, text: str) -> Set[int]:
+        """Ids of every word starting with `text`."""
+        node = self._root
+        for ch in text:
+            node = node.children.get(ch)
+            if node is None:
+                return set()
+        return node.values
+
+    def exact(self, word: str) -> Set[int]:
+        return self._words.get(word, set())
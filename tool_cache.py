@@ -0,0 +1,129 @@
+# tool_cache.py
+"""
+Result caching for idempotent read-only tools.
+
+`cached_tool` memoizes an async tool on its arguments (minus `self` and the
+RunContext) once per worker process. It is meant for tools that build their
+answer from static data (the menu, baggage rules, policy texts); a tool that
+just returns a module-level dict gains nothing from it. Entries expire after a
+TTL and each cache is a bounded LRU. None of the cached data changes at
+runtime, so there is no invalidation beyond the TTL.
+
+Cached results are the same objects on every hit, shared by all sessions in the
+process: callers must treat them as read-only, and a tool must not return a
+live module-level dict it expects to change.
+
+Hits and misses are counted per tool; `cache_stats()` reports the hit ratio.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger("tool-cache")
+
+DEFAULT_TTL_SECONDS = 300.0
+DEFAULT_MAX_ENTRIES = 128
+
+_SKIP_ARGS = ("self", "context")
+
+
+class TTLCache:
+    """Bounded LRU whose entries expire `ttl_seconds` after they were stored."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# ------------------ Metrics ------------------
+_STATS: Dict[str, list] = {}  # tool name -> [hits, misses]
+_LOCK = threading.Lock()
+
+
+def _count(name: str, hit: bool) -> None:
+    with _LOCK:
+        _STATS[name][0 if hit else 1] += 1
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hits, misses and hit ratio per cached tool."""
+    with _LOCK:
+        return {
+            name: {"hits": hits, "misses": misses, "hit_ratio": round(hits / (hits + misses), 3) if hits + misses else 0.0}
+            for name, (hits, misses) in _STATS.items()
+        }
+
+
+def _cache_key(arguments: Dict[str, Any]) -> str:
+    """Stable key for tool arguments; pydantic inputs are keyed on their fields."""
+    payload = {k: v for k, v in arguments.items() if k not in _SKIP_ARGS}
+    return json.dumps(
+        payload,
+        sort_keys=True,
+        default=lambda o: o.model_dump() if hasattr(o, "model_dump") else str(o),
+    )
+
+
+# ------------------ Decorator ------------------
+def cached_tool(ttl_seconds: float = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+    """
+    Cache an async read-only tool's result per process. Place it under
+    @function_tool() so the tool keeps its signature and docstring.
+    """
+
+    def decorator(fn: Callable[..., Awaitable[Any]]):
+        name = fn.__qualname__
+        signature = inspect.signature(fn)
+        cache = TTLCache(ttl_seconds, max_entries)
+        with _LOCK:
+            _STATS.setdefault(name, [0, 0])
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = _cache_key(bound.arguments)
+            hit, result = cache.get(key)
+            _count(name, hit)
+            if hit:
+                return result
+            result = await fn(*args, **kwargs)
+            cache.put(key, result)
+            return result
+
+        return wrapper
+
+    return decorator
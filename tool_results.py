@@ -0,0 +1,206 @@
+# tool_results.py
+"""
+Compact structured tool results and a per-tool output token budget.
+
+Tools return small typed dicts instead of pre-formatted markdown: the LLM phrases
+the answer for voice anyway, so emoji, bold markers and repeated labels only add
+input tokens to the follow-up call. `token_budget` caps what a tool can hand back
+by trimming long lists first and then long strings. A paginated list is cut
+back to a shorter page instead: its `next_cursor` is moved to the last row
+kept, so the trimmed rows come first on the next page rather than being lost.
+"""
+
+import functools
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypedDict
+
+logger = logging.getLogger("tool-results")
+
+CHARS_PER_TOKEN = 4  # rough average for English JSON; good enough for a budget
+DEFAULT_TOOL_TOKEN_BUDGET = 400
+ELLIPSIS = "…"
+CURSOR_KEY = "next_cursor"
+
+PageCursor = Callable[[dict], str]  # row -> cursor for the page starting after it
+
+
+# ------------------ Result shapes ------------------
+class ToolError(TypedDict):
+    error: str
+
+
+class AppointmentResult(TypedDict, total=False):
+    appointment_id: str
+    patient: str
+    doctor: str
+    date: str
+    time: str
+
+
+class LabBookingResult(TypedDict, total=False):
+    booking_id: str
+    patient: str
+    test: str
+    date: str
+    time: str
+    location: str
+    home_collection: bool
+    total_rs: int
+    preparation: str
+
+
+class PolicyItem(TypedDict):
+    policy_number: str
+    type: str
+    coverage: str
+    premium_rs: int
+    next_due: str
+    status: str
+
+
+class PolicyResult(TypedDict):
+    customer: str
+    policies: List[PolicyItem]
+
+
+class ClaimItem(TypedDict, total=False):
+    claim_id: str
+    policy_number: str
+    type: str
+    date: str
+    status: str
+    description: str
+
+
+class ClaimResult(TypedDict, total=False):
+    claims: List[ClaimItem]
+    summary: Dict[str, Any]
+    next_cursor: str
+
+
+class ReservationPreview(TypedDict):
+    reservation_id: str
+    table: str
+    name: str
+    people: int
+    date: str
+    time: str
+    requires_confirmation: bool
+
+
+class OrderPreview(TypedDict, total=False):
+    order_id: str
+    customer: str
+    items: Dict[str, int]
+    subtotal_rs: int
+    delivery_rs: int
+    total_rs: int
+    suggestions: List[str]
+    requires_confirmation: bool
+
+
+# ------------------ Budget enforcement ------------------
+def estimate_tokens(result: Any) -> int:
+    if isinstance(result, str):
+        text = result
+    else:
+        text = json.dumps(result, ensure_ascii=False, separators=(",", ":"), default=str)
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    return text[: max(max_chars - 1, 0)].rstrip() + ELLIPSIS
+
+
+def _trim_list(result: Dict[str, Any], key: str, max_tokens: int) -> None:
+    """Keep the longest prefix of result[key] that fits, noting how many were dropped."""
+    items = result[key]
+    low, high = 0, len(items)
+    while low < high:
+        mid = (low + high + 1) // 2
+        # count the `_omitted` note too, so the trimmed result really fits
+        if estimate_tokens({**result, key: items[:mid], f"{key}_omitted": len(items) - mid}) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    keep = max(low, 1)
+    if keep < len(items):
+        result[key] = items[:keep]
+        result[f"{key}_omitted"] = len(items) - keep
+
+
+def _trim_page(result: Dict[str, Any], key: str, max_tokens: int, cursor_for: PageCursor) -> None:
+    """Shorten a paginated list and point `next_cursor` after its new last row."""
+    items, original = result[key], result.get(CURSOR_KEY)
+    result[CURSOR_KEY] = cursor_for(items[-1])  # about the size of the final cursor, for the estimate
+    _trim_list(result, key, max_tokens)
+    if result.pop(f"{key}_omitted", None) is not None:
+        result[CURSOR_KEY] = cursor_for(result[key][-1])
+    elif original is None:
+        del result[CURSOR_KEY]
+    else:
+        result[CURSOR_KEY] = original
+
+
+def enforce_budget(result: Any, max_tokens: int, cursors: Optional[Dict[str, PageCursor]] = None) -> Any:
+    """
+    Shrink a tool result to roughly `max_tokens`; results already within budget
+    pass through. `cursors` maps the keys of paginated lists to a function that
+    builds the cursor for the page after a given row.
+    """
+    if estimate_tokens(result) <= max_tokens:
+        return result
+    if isinstance(result, str):
+        return _truncate(result, max_tokens * CHARS_PER_TOKEN)
+    if not isinstance(result, dict):
+        return result
+
+    result = dict(result)
+    lists = sorted(
+        (k for k, v in result.items() if isinstance(v, list)),
+        key=lambda k: estimate_tokens(result[k]),
+        reverse=True,
+    )
+    for key in lists:
+        if estimate_tokens(result) <= max_tokens:
+            break
+        if cursors and key in cursors and result[key]:
+            _trim_page(result, key, max_tokens, cursors[key])
+        else:
+            _trim_list(result, key, max_tokens)
+
+    overflow = estimate_tokens(result) - max_tokens
+    if overflow > 0:
+        for key, value in sorted(result.items(), key=lambda kv: -len(str(kv[1]))):
+            if overflow <= 0 or not isinstance(value, str) or key == CURSOR_KEY:
+                continue
+            new_len = max(len(value) - overflow * CHARS_PER_TOKEN, 40)
+            result[key] = _truncate(value, new_len)
+            overflow = estimate_tokens(result) - max_tokens
+    return result
+
+
+def token_budget(max_tokens: int = DEFAULT_TOOL_TOKEN_BUDGET, cursors: Optional[Dict[str, PageCursor]] = None):
+    """
+    Cap an async tool's output at about `max_tokens`. Place it under @function_tool()
+    so the tool keeps its signature and docstring. Pass `cursors` for tools that
+    return a page of a longer list (see `enforce_budget`).
+    """
+
+    def decorator(fn: Callable[..., Awaitable[Any]]):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            result = await fn(*args, **kwargs)
+            trimmed = enforce_budget(result, max_tokens, cursors)
+            if trimmed is not result:
+                logger.info(
+                    f"{fn.__name__} output trimmed from ~{estimate_tokens(result)} to ~{estimate_tokens(trimmed)} tokens"
+                )
+            return trimmed
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,88 @@
+# tracking_ingest.py
+"""
+Bulk ingestion of scanner events into the tracking store.
+
+Scanner feeds arrive as lines, either JSON ({"awb", "ts", "status", "location"})
+or CSV (awb,ts,status,location), from a file that is tailed or from a TCP
+socket. Lines are parsed and applied in batches, so millions of scans a day
+never touch the LLM or a function tool. After every batch the changed AWBs are
+published to a `line_feed.StatusNotifier`, which hands fresh status to the
+voice sessions watching those shipments. The file/socket transports live in
+`line_feed` and are shared with the flight status feed.
+"""
+
+import json
+import logging
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from line_feed import LineFeedIngestor, StatusNotifier, normalize_ts
+from tracking_store import TrackingEvent, TrackingStore, scan_event
+
+logger = logging.getLogger("tracking-ingest")
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+# ------------------ Parsing ------------------
+def parse_scan(line: str) -> Optional[Tuple[str, TrackingEvent]]:
+    """One feed line -> (awb, event), or None for blank/malformed lines or timestamps."""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        if line[0] == "{":
+            raw = json.loads(line)
+            awb, ts, status, location = raw["awb"], raw["ts"], raw["status"], raw.get("location")
+        else:
+            parts = [p.strip() for p in line.split(",", 3)]
+            awb, ts, status = parts[0], parts[1], parts[2]
+            location = parts[3] if len(parts) > 3 and parts[3] else None
+    except (ValueError, KeyError, IndexError):
+        return None
+    ts = normalize_ts(ts)
+    if not awb or ts is None or not status:
+        return None
+    return awb, scan_event(status, location, ts)
+
+
+def batched(lines: Iterable[str], batch_size: int) -> Iterator[List[Tuple[str, TrackingEvent]]]:
+    batch: List[Tuple[str, TrackingEvent]] = []
+    for line in lines:
+        scan = parse_scan(line)
+        if scan is None:
+            continue
+        batch.append(scan)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ------------------ Ingestion ------------------
+class TrackingIngestor(LineFeedIngestor):
+    """Applies scanner feeds to a TrackingStore in batches and publishes changes."""
+
+    feed_name = "scanner feed"
+
+    def __init__(
+        self,
+        store: TrackingStore,
+        notifier: Optional[StatusNotifier] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        self.store = store
+        self.notifier = notifier
+        self.batch_size = batch_size
+        self.applied = 0
+
+    def ingest_lines(self, lines: Iterable[str]) -> int:
+        """Apply every scan in `lines`; returns how many shipments changed across batches."""
+        changed_total = 0
+        for batch in batched(lines, self.batch_size):
+            changed = self.store.apply_batch(batch)
+            changed_total += len(changed)
+            self.applied += len(batch)
+            if self.notifier and changed:
+                self.notifier.publish(changed)
+        return changed_total
@@ -0,0 +1,207 @@
+# tracking_store.py
+"""
+Shipment tracking store.
+
+Every shipment has an append-only event log and a small latest-status
+projection that is updated on each append, so a tracking read is one dict
+lookup and never walks the log. Sender references and recipient phone numbers
+are indexed for lookups without an AWB. Logs are compacted once they grow past
+a threshold: repeated scans with the same status and location collapse into
+one event, and the oldest events (except the first) are folded into a count.
+
+Scanner feeds are applied with `apply_batch()`: one lock round-trip per batch,
+and replays are dropped by (AWB, timestamp, status). Timestamps are kept in
+the `line_feed.normalize_ts` UTC format, so they order correctly as strings.
+"""
+
+import logging
+import re
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from line_feed import normalize_ts, utc_now_ts
+
+logger = logging.getLogger("tracking-store")
+
+RECENT_EVENTS = 3  # events returned to the LLM by default
+MAX_LOG_EVENTS = 50  # events kept per shipment after compaction
+MAX_LOOKUP_RESULTS = 5
+PHONE_DIGITS = 10  # compare on the subscriber part: 0300-1234567 == +92 300 1234567
+
+
+class TrackingEvent(NamedTuple):
+    ts: str
+    text: str
+    status: Optional[str] = None
+    location: Optional[str] = None
+
+
+def scan_event(status: str, location: Optional[str], ts: str) -> TrackingEvent:
+    return TrackingEvent(ts, status + (f" at {location}" if location else ""), status, location)
+
+
+def normalize_phone(phone: str) -> str:
+    return re.sub(r"\D", "", phone or "")[-PHONE_DIGITS:]
+
+
+def normalize_reference(reference: str) -> str:
+    return re.sub(r"[\s\-]", "", reference or "").upper()
+
+
+class TrackingStore:
+    """Append-only shipment event logs with a latest-status projection and lookup indexes."""
+
+    def __init__(self) -> None:
+        self._logs: Dict[str, List[TrackingEvent]] = {}
+        self._latest: Dict[str, dict] = {}
+        self._folded: Dict[str, int] = {}
+        self._seen: Dict[str, Set[Tuple[str, Optional[str]]]] = {}
+        self._by_reference: Dict[str, Set[str]] = {}
+        self._by_phone: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._latest)
+
+    def __contains__(self, tracking_id: str) -> bool:
+        return tracking_id.upper() in self._latest
+
+    @classmethod
+    def from_records(cls, shipments: Dict[str, dict]) -> "TrackingStore":
+        """Load the legacy {awb: {..., "events": [{"ts", "text"}]}} layout."""
+        store = cls()
+        for tracking_id, info in shipments.items():
+            events = [TrackingEvent(normalize_ts(e["ts"]) or e["ts"], e["text"]) for e in info.get("events", [])]
+            store.add_shipment(tracking_id, info, events)
+        return store
+
+    # ------------------ Writes ------------------
+    def add_shipment(
+        self, tracking_id: str, info: dict, events: Iterable[TrackingEvent] = ()
+    ) -> None:
+        tracking_id = tracking_id.upper()
+        projection = {k: v for k, v in info.items() if k != "events"}
+        projection["tracking_id"] = tracking_id
+        with self._lock:
+            self._logs[tracking_id] = list(events)
+            self._seen[tracking_id] = {(e.ts, e.status) for e in self._logs[tracking_id]}
+            projection["updated_at"] = self._logs[tracking_id][-1].ts if self._logs[tracking_id] else None
+            self._latest[tracking_id] = projection
+            self._folded[tracking_id] = 0
+            if info.get("reference"):
+                self._by_reference.setdefault(normalize_reference(info["reference"]), set()).add(tracking_id)
+            if info.get("recipient_phone"):
+                self._by_phone.setdefault(normalize_phone(info["recipient_phone"]), set()).add(tracking_id)
+
+    def append_event(
+        self, tracking_id: str, status: str, location: Optional[str] = None, ts: Optional[str] = None
+    ) -> Optional[dict]:
+        """Record a scan and refresh the projection; returns the projection or None if unknown."""
+        tracking_id = tracking_id.upper()
+        event = scan_event(status, location, (normalize_ts(ts) if ts else None) or utc_now_ts())
+        with self._lock:
+            if tracking_id not in self._latest:
+                return None
+            self._apply(tracking_id, event)
+            return self._latest[tracking_id]
+
+    def apply_batch(self, events: Iterable[Tuple[str, TrackingEvent]]) -> Dict[str, dict]:
+        """
+        Apply (tracking_id, event) pairs from a scanner feed. Unknown AWBs and
+        replayed (AWB, ts, status) scans are skipped. Returns the projections
+        whose status moved forward, keyed by tracking id.
+        """
+        changed: Dict[str, dict] = {}
+        skipped = 0
+        with self._lock:
+            for tracking_id, event in events:
+                tracking_id = tracking_id.upper()
+                projection = self._latest.get(tracking_id)
+                if projection is None or not self._apply(tracking_id, event):
+                    skipped += 1
+                    continue
+                if projection["updated_at"] == event.ts:
+                    changed[tracking_id] = projection
+        if skipped:
+            logger.debug(f"Skipped {skipped} unknown or duplicate scans")
+        return changed
+
+    def _apply(self, tracking_id: str, event: TrackingEvent) -> bool:
+        """Append one event under the lock; False if it was already recorded."""
+        seen = self._seen[tracking_id]
+        key = (event.ts, event.status)
+        if key in seen:
+            return False
+        seen.add(key)
+        log = self._logs[tracking_id]
+        log.append(event)
+        projection = self._latest[tracking_id]
+        # late scans go into the log but don't roll the status back
+        if projection.get("updated_at") is None or event.ts >= projection["updated_at"]:
+            if event.status:
+                projection["status"] = event.status
+            if event.location:
+                projection["last_location"] = event.location
+            projection["updated_at"] = event.ts
+        if len(log) > 2 * MAX_LOG_EVENTS:
+            self._compact(tracking_id)
+        return True
+
+    def _compact(self, tracking_id: str) -> None:
+        log = self._logs[tracking_id]
+        merged: List[TrackingEvent] = []
+        for event in log:
+            previous = merged[-1] if merged else None
+            if (
+                previous is not None
+                and event.status is not None
+                and (event.status, event.location) == (previous.status, previous.location)
+            ):
+                merged[-1] = event  # same scan repeated: keep the latest timestamp
+                self._folded[tracking_id] += 1
+                continue
+            merged.append(event)
+        if len(merged) > MAX_LOG_EVENTS:
+            dropped = len(merged) - MAX_LOG_EVENTS
+            self._folded[tracking_id] += dropped
+            merged = merged[:1] + merged[dropped + 1 :]
+        self._logs[tracking_id] = merged
+        logger.info(f"Compacted {tracking_id}: {len(log)} -> {len(merged)} events")
+
+    # ------------------ Reads ------------------
+    def status(self, tracking_id: str) -> Optional[dict]:
+        return self._latest.get(tracking_id.upper())
+
+    def recent_events(self, tracking_id: str, limit: int = RECENT_EVENTS) -> List[TrackingEvent]:
+        return self._logs.get(tracking_id.upper(), [])[-limit:] if limit > 0 else []
+
+    def event_count(self, tracking_id: str) -> int:
+        tracking_id = tracking_id.upper()
+        return len(self._logs.get(tracking_id, [])) + self._folded.get(tracking_id, 0)
+
+    def find_by_reference(self, reference: str) -> List[str]:
+        return sorted(self._by_reference.get(normalize_reference(reference), ()))[:MAX_LOOKUP_RESULTS]
+
+    def find_by_phone(self, phone: str) -> List[str]:
+        key = normalize_phone(phone)
+        if len(key) < PHONE_DIGITS:
+            return []
+        return sorted(self._by_phone.get(key, ()))[:MAX_LOOKUP_RESULTS]
+
+    def snapshot(self, tracking_id: str, events: int = RECENT_EVENTS) -> Optional[dict]:
+        """Compact tool payload: key status fields plus the last few events."""
+        projection = self.status(tracking_id)
+        if projection is None:
+            return None
+        recent = self.recent_events(tracking_id, events)
+        result = {
+            "tracking_id": projection["tracking_id"],
+            "status": projection.get("status"),
+            "last_location": projection.get("last_location"),
+            "estimated_delivery": projection.get("estimated_delivery"),
+            "recent_events": [{"ts": e.ts, "text": e.text} for e in recent],
+        }
+        older = self.event_count(tracking_id) - len(recent)
+        if older > 0:
+            result["earlier_events"] = older
+        return result
@@ -0,0 +1,161 @@
+# upsell_recommender.py
+"""
+Upsell suggestions learned from confirmed orders.
+
+Every confirmed order adds to a sparse item co-occurrence matrix. An item's
+complements are scored as P(b | a): how often b shows up in orders that
+contain a. The hand-written combos act as pseudo-counts, so they lead until
+real orders say otherwise. Each item keeps a precomputed top list that is
+refreshed only for the items in a new order, so a recommendation merges a
+few short lists and never scans the history.
+
+Run as a script to rebuild a model snapshot offline from an order log:
+
+    python upsell_recommender.py restaurant_orders.jsonl upsell_model.json
+"""
+
+import heapq
+import json
+import logging
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional
+
+logger = logging.getLogger("upsell-recommender")
+
+SEED_PSEUDO_COUNT = 3  # a hand-written combo counts as this many orders
+TOP_N = 8  # complements kept per item
+DEFAULT_SUGGESTIONS = 3
+
+
+class UpsellRecommender:
+    """Incremental co-occurrence model with per-item top complements."""
+
+    def __init__(self, seed: Optional[Mapping[str, Iterable[str]]] = None) -> None:
+        self._seed: Dict[str, set] = {item: set(upsells) for item, upsells in (seed or {}).items()}
+        self._orders: Dict[str, int] = {}  # item -> orders containing it
+        self._pairs: Dict[str, Dict[str, int]] = {}  # item -> co-ordered item -> orders
+        self._top: Dict[str, List[tuple]] = {}  # item -> [(score, complement), ...] best first
+        self._lock = threading.Lock()
+        for item in self._seed:
+            self._refresh(item)
+
+    # ------------------ Model updates ------------------
+    def _score(self, item: str, other: str) -> float:
+        seeded = SEED_PSEUDO_COUNT if other in self._seed.get(item, ()) else 0
+        prior = SEED_PSEUDO_COUNT if item in self._seed else 0
+        together = self._pairs.get(item, {}).get(other, 0)
+        return (together + seeded) / (self._orders.get(item, 0) + prior)
+
+    def _refresh(self, item: str) -> None:
+        candidates = set(self._pairs.get(item, ())) | self._seed.get(item, set())
+        self._top[item] = heapq.nlargest(TOP_N, ((self._score(item, other), other) for other in candidates))
+
+    def record_order(self, items: Iterable[str]) -> None:
+        """Add one confirmed order to the model."""
+        basket = list(dict.fromkeys(items))
+        with self._lock:
+            for item in basket:
+                self._orders[item] = self._orders.get(item, 0) + 1
+                row = self._pairs.setdefault(item, {})
+                for other in basket:
+                    if other != item:
+                        row[other] = row.get(other, 0) + 1
+            for item in basket:
+                self._refresh(item)
+
+    def rebuild(self, orders: Iterable[Iterable[str]]) -> int:
+        """Recount the model from scratch from order baskets; returns how many were read."""
+        count = 0
+        with self._lock:
+            self._orders, self._pairs, self._top = {}, {}, {}
+        for basket in orders:
+            self.record_order(basket)
+            count += 1
+        with self._lock:
+            for item in self._seed:
+                self._refresh(item)
+        logger.info(f"Upsell model rebuilt from {count} orders")
+        return count
+
+    # ------------------ Recommendations ------------------
+    def recommend(self, cart: Iterable[str], k: int = DEFAULT_SUGGESTIONS) -> List[str]:
+        """Top-k complements for the items in the cart, excluding the cart itself."""
+        in_cart = set(cart)
+        scores: Dict[str, float] = {}
+        for item in in_cart:
+            for score, other in self._top.get(item, ()):
+                if other not in in_cart:
+                    scores[other] = scores.get(other, 0.0) + score
+        return sorted(scores, key=lambda other: (-scores[other], other))[:k]
+
+    # ------------------ Snapshots ------------------
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"orders": dict(self._orders), "pairs": {k: dict(v) for k, v in self._pairs.items()}}
+
+    def load(self, snapshot: dict) -> None:
+        with self._lock:
+            self._orders = dict(snapshot.get("orders", {}))
+            self._pairs = {k: dict(v) for k, v in snapshot.get("pairs", {}).items()}
+            for item in set(self._pairs) | set(self._seed):
+                self._refresh(item)
+
+    def load_file(self, path: str) -> bool:
+        """Load a snapshot written by the offline rebuild, if there is one."""
+        if not Path(path).exists():
+            return False
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.load(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load upsell model from {path}: {e}")
+            return False
+        logger.info(f"Loaded upsell model from {path} ({len(self._orders)} items)")
+        return True
+
+
+def append_order(path: str, record: dict) -> bool:
+    """
+    Append one confirmed order to the JSON-lines log. Blocking, so async callers
+    run it via `asyncio.to_thread`; a failed write is logged, never raised.
+    """
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except OSError as e:
+        logger.error(f"Could not append order {record.get('id')} to {path}: {e}")
+        return False
+    return True
+
+
+def read_order_log(path: str) -> Iterable[List[str]]:
+    """Baskets from a JSON-lines log of confirmed order records ({"items": {name: qty}})."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield list(json.loads(line)["items"])
+            except (ValueError, KeyError, TypeError):
+                continue
+
+
+def main(argv: List[str]) -> int:
+    if len(argv) != 2:
+        print("usage: python upsell_recommender.py ORDER_LOG.jsonl MODEL.json")
+        return 2
+    order_log, model_path = argv
+    recommender = UpsellRecommender()
+    count = recommender.rebuild(read_order_log(order_log))
+    with open(model_path, "w", encoding="utf-8") as f:
+        json.dump(recommender.snapshot(), f, ensure_ascii=False)
+    print(f"Rebuilt upsell model from {count} orders -> {model_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main(sys.argv[1:]))